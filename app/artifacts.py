@@ -0,0 +1,86 @@
+import os
+import sys
+import dill as pickle
+
+import trainer.time_feature_encoder as tfe
+from trainer.compact_forest import CompactForest
+from trainer.model_registry import ModelRegistry
+from trainer.monitoring_profile import PROFILE_FILE, load_profile
+from trainer.prediction_surface import PredictionSurface, LEGACY_SURFACE_DIR
+
+
+DEFAULT_MODEL_NAME = "random_forest"
+
+
+def load_artifacts(model_dir="model", model_format=None, model_name=None, version=None):
+    """Load the served model, the date_range encoder and the time encoder.
+
+    The model is resolved through the registry in <model_dir>/registry; MODEL_NAME
+    selects the registered model (default: random_forest, e.g. random_forest_distilled
+    for a distilled student) and MODEL_VERSION pins one of its versions (default: latest). MODEL_FORMAT=compact serves the memory-mapped
+    CompactForest export instead of the joblib model, and MODEL_FORMAT=surface the
+    prediction surface compiled from the version by trainer/prediction_surface.py.
+    Model directories without a registry fall back to the legacy pickle files, unless a
+    model name or version was asked for.
+    """
+    model_format = model_format or os.environ.get("MODEL_FORMAT", "pickle")
+    named = model_name or os.environ.get("MODEL_NAME")
+    pinned = version or os.environ.get("MODEL_VERSION")
+    registry = ModelRegistry(os.path.join(model_dir, "registry"))
+    try:
+        entry = registry.load(named or DEFAULT_MODEL_NAME, pinned or "latest",
+                              model_format=model_format if model_format in ("compact", "surface") else "joblib")
+        return entry.model, entry.encoder, entry.time_encoder
+    except FileNotFoundError:
+        if named or pinned:
+            raise
+    return load_legacy_artifacts(model_dir, model_format)
+
+
+def load_monitoring_profile(model_dir="model", model_name=None, version=None):
+    """The training profile registered with the served model version, or None without one.
+
+    MONITOR_PROFILE points at a profile file instead. Model directories without a
+    registry fall back to <model_dir>/monitoring_profile.json.
+    """
+    override = os.environ.get("MONITOR_PROFILE")
+    if override:
+        return load_profile(override)
+    named = model_name or os.environ.get("MODEL_NAME")
+    pinned = version or os.environ.get("MODEL_VERSION")
+    model_name = named or DEFAULT_MODEL_NAME
+    registry = ModelRegistry(os.path.join(model_dir, "registry"))
+    try:
+        version = registry.resolve(model_name, pinned or "latest")
+    except FileNotFoundError:
+        if named or pinned:
+            raise
+        return load_profile(os.path.join(model_dir, PROFILE_FILE))
+    return load_profile(os.path.join(registry.version_path(model_name, version), PROFILE_FILE))
+
+
+def load_legacy_artifacts(model_dir="model", model_format="pickle"):
+    """Load the pre-registry pickle files written directly into model_dir."""
+    if model_format == "surface":
+        model = PredictionSurface.load(os.path.join(model_dir, LEGACY_SURFACE_DIR))
+    elif model_format == "compact":
+        model = CompactForest.load(os.path.join(model_dir, "random_forest_compact"))
+    else:
+        with open(os.path.join(model_dir, "random_forest_model.pkl"), "rb") as f:
+            model = pickle.load(f)
+    with open(os.path.join(model_dir, "encoder.pkl"), "rb") as f:
+        encoder = pickle.load(f)
+
+    # time_encoder.pkl may have been pickled from a script run as __main__
+    original_main = sys.modules.get('__main__')
+    sys.modules['__main__'] = tfe
+    try:
+        with open(os.path.join(model_dir, "time_encoder.pkl"), "rb") as f:
+            time_encoder = pickle.load(f)
+    finally:
+        if original_main is not None:
+            sys.modules['__main__'] = original_main
+        else:
+            del sys.modules['__main__']
+
+    return model, encoder, time_encoder
@@ -0,0 +1,163 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from app.artifacts import load_artifacts
+from app.features import output_categories
+from app.streaming import score_columns
+
+# Columns the serving feature path reads; everything else in the input is skipped
+INPUT_COLUMNS = ["date", "date_range", "time", "consumed_power"]
+
+# Per-worker state, set once by _init_worker
+_worker = {}
+
+
+def index_chunks(path, chunk_size, block_size=64 << 20):
+    """Scan the file once and return (header, [(byte_start, byte_end, first_row), ...], n_rows).
+
+    Chunks hold chunk_size lines each and always start on a line boundary, so
+    workers can read and parse their own byte range independently.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        position = f.tell()
+        starts = [position]
+        n_lines = 0
+        last_byte = b"\n"
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+            line_numbers = n_lines + np.arange(1, len(newlines) + 1)
+            boundaries = newlines[line_numbers % chunk_size == 0]
+            starts.extend((position + boundaries + 1).tolist())
+            n_lines += len(newlines)
+            position += len(block)
+            last_byte = block[-1:]
+    if last_byte != b"\n":
+        n_lines += 1
+    if starts[-1] == position:
+        starts.pop()
+
+    chunks = [(start, end, i * chunk_size)
+              for i, (start, end) in enumerate(zip(starts, starts[1:] + [position]))]
+    return header, chunks, n_lines
+
+
+def _init_worker(model_dir, input_path, output_dir, header):
+    model, encoder, time_encoder = load_artifacts(model_dir)
+    names = next(csv.reader([header.decode("utf-8")]))
+    # Raw files can repeat a header (e.g. `lighting`); only the first occurrence is read
+    positions = {}
+    for i, name in enumerate(names):
+        positions.setdefault(name.strip(), i)
+    _worker.update(
+        model=model, encoder=encoder, time_encoder=time_encoder,
+        input_path=input_path,
+        usecols={name: i for name, i in positions.items() if name in INPUT_COLUMNS},
+        outputs={category: np.load(os.path.join(output_dir, f"{category}.npy"), mmap_mode="r+")
+                 for category in output_categories},
+    )
+
+
+def _score_chunk(task):
+    start, end, first_row = task
+    with open(_worker["input_path"], "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    usecols = _worker["usecols"]
+    frame = pd.read_csv(io.BytesIO(data), header=None, usecols=list(usecols.values()),
+                        dtype=str, keep_default_na=False)
+    columns = {name: frame[i].to_numpy() for name, i in usecols.items()}
+    predictions = score_columns(columns, _worker["model"], _worker["encoder"], _worker["time_encoder"])
+
+    # Write straight into this chunk's slice of the shared output arrays
+    for i, category in enumerate(output_categories):
+        _worker["outputs"][category][first_row:first_row + len(predictions)] = predictions[:, i]
+    for output in _worker["outputs"].values():
+        output.flush()
+    return first_row, len(predictions)
+
+
+def batch_score(input_path, output_dir, model_dir="model", workers=None, chunk_size=50000):
+    """Score a CSV of raw readings in parallel; write one .npy per category in input order."""
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+
+    header, chunks, n_rows = index_chunks(input_path, chunk_size)
+    print(f"Indexed {n_rows} rows into {len(chunks)} chunks in {time.perf_counter() - started:.2f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for category in output_categories:
+        np.lib.format.open_memmap(os.path.join(output_dir, f"{category}.npy"),
+                                  mode="w+", dtype=np.float64, shape=(n_rows,)).flush()
+
+    scored = 0
+    score_started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_dir, input_path, output_dir, header)) as pool:
+        pending = set()
+        remaining = iter(chunks)
+        # Keep a bounded number of chunks in flight so memory does not grow with the input
+        for task in remaining:
+            pending.add(pool.submit(_score_chunk, task))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                first_row, rows = future.result()
+                expected = min(chunk_size, n_rows - first_row)
+                if rows != expected:
+                    raise ValueError(f"Chunk at row {first_row} parsed {rows} rows, expected {expected}")
+                scored += rows
+                task = next(remaining, None)
+                if task is not None:
+                    pending.add(pool.submit(_score_chunk, task))
+            elapsed = time.perf_counter() - score_started
+            print(f"  {scored}/{n_rows} rows ({scored / elapsed:,.0f} rows/s)", end="\r")
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "input": os.path.abspath(input_path),
+        "rows": n_rows,
+        "chunks": len(chunks),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(n_rows / elapsed, 1) if elapsed else None,
+        "outputs": {category: f"{category}.npy" for category in output_categories},
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nScored {n_rows} rows in {elapsed:.2f}s ({report['rows_per_second']:,.0f} rows/s) "
+          f"with {workers} workers")
+    print(f"Predictions saved to {output_dir}/")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a raw readings CSV with the serving model.")
+    parser.add_argument("input", help="CSV with date or date_range, time and consumed_power columns")
+    parser.add_argument("output_dir", help="Directory for per-category .npy predictions")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per chunk")
+    args = parser.parse_args()
+    batch_score(args.input, args.output_dir, args.model_dir, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
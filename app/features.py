@@ -0,0 +1,7 @@
+# The feature helpers are shared with the trainers, which must not import the serving
+# package; they live in trainer/features.py and are re-exported here for the app
+from trainer.features import (
+    final_feature_order, output_categories, DATE_FORMATS, MONTH_ABBR, DATE_RANGE_LABELS,
+    date_range_labels, seconds_of_day, detect_date_format, parse_dates, parse_times,
+    build_feature_frame, predictions_to_columns,
+)
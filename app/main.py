@@ -1,51 +1,54 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Query
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import List, Optional, Union
 import pandas as pd
 import numpy as np
-import dill as pickle
 import sys
-import trainer.time_feature_encoder as tfe
 from datetime import datetime
 import calendar
+import json
 import os
 import sys
+import traceback
 
 # Add trainer folder to path (for custom encoder)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from trainer.time_feature_encoder import TimeFeatureEncoder
+import app.metrics as metrics
+from app.artifacts import load_artifacts, load_monitoring_profile
+from trainer.prediction_surface import PredictionSurface
+from app.features import (
+    final_feature_order, date_range_labels, seconds_of_day,
+    build_feature_frame, predictions_to_columns, parse_times,
+)
+from app.streaming import (
+    DuplexStreamingResponse, iter_line_chunks, CsvChunkParser, NdjsonChunkParser,
+    score_chunk, predictions_to_ndjson,
+)
+from app.monitoring import ReadingsMonitor
+from storage.readings_store import ReadingsStore, STORE_ROOT, TIMESTAMP
+from storage.rollups import RollupEngine, LEVELS
 
-# Load model and encoders
-with open("model/random_forest_model.pkl", "rb") as f:
-    model = pickle.load(f)
-with open("model/encoder.pkl", "rb") as f:
-    encoder = pickle.load(f)
-original_main = sys.modules.get('__main__')
-sys.modules['__main__'] = tfe
-with open("model/time_encoder.pkl", "rb") as f:
-    time_encoder = pickle.load(f)
-if original_main is not None:
-    sys.modules['__main__'] = original_main
-else:
-    del sys.modules['__main__']
-
-# Final feature order
-final_feature_order = [
-    'date_range_apr_1', 'date_range_apr_2', 'date_range_apr_3',
-    'date_range_aug_1', 'date_range_aug_2', 'date_range_aug_3',
-    'date_range_dec_1', 'date_range_dec_2', 'date_range_dec_3',
-    'date_range_feb_1', 'date_range_feb_2', 'date_range_feb_3',
-    'date_range_jan_1', 'date_range_jan_2', 'date_range_jan_3',
-    'date_range_jul_1', 'date_range_jul_2', 'date_range_jul_3',
-    'date_range_jun_1', 'date_range_jun_2', 'date_range_jun_3',
-    'date_range_mar_1', 'date_range_mar_2', 'date_range_mar_3',
-    'date_range_may_1', 'date_range_may_2', 'date_range_may_3',
-    'date_range_nov_1', 'date_range_nov_2', 'date_range_nov_3',
-    'date_range_oct_1', 'date_range_oct_2', 'date_range_oct_3',
-    'date_range_sep_1', 'date_range_sep_2', 'date_range_sep_3',
-    'time', 'consumed_power',
-    'time_sin', 'time_cos', 'minute', 'second',
-    'minute_sin', 'minute_cos', 'second_sin', 'second_cos'
-]
+# Load model and encoders (MODEL_FORMAT=surface answers from a precompiled prediction surface)
+model, encoder, time_encoder = load_artifacts("model")
+
+# Sketches of the inputs the API sees, compared with the served version's training profile
+# (MONITOR_PROFILE overrides it)
+monitor = ReadingsMonitor(load_monitoring_profile("model"))
+
+def observe_readings(endpoint, observe):
+    """Feed the input monitor without letting a monitor failure fail the request it watches."""
+    try:
+        observe()
+    except Exception:
+        metrics.monitor_errors_total.inc(endpoint)
+        traceback.print_exc()
+
+# Stored readings served by /readings (READINGS_STORE overrides the location)
+readings_store = ReadingsStore(os.environ.get("READINGS_STORE", STORE_ROOT))
+# Precomputed per-house aggregates served by /rollups (built by `python storage/rollups.py refresh`)
+rollups = RollupEngine(readings_store)
 
 def get_date_range_label(date_obj):
     day = date_obj.day
@@ -64,34 +67,64 @@ class PredictionInput(BaseModel):
     date: str  # Format: DD:MM:YYYY
     time: str  # Format: HH:MM:SS
     consumed_power: float
+    house_id: Optional[str] = None  # groups readings in the input monitor
+
+class ForecastInput(BaseModel):
+    start_date: str  # Format: DD:MM:YYYY
+    start_time: str = "00:00:00"  # Format: HH:MM:SS
+    horizon_hours: float = 24
+    step_minutes: int = 30
+    consumed_power: Union[float, List[float]]  # scalar or one value per slot
+
+# Upper bound on slots scored by a single /forecast call
+MAX_FORECAST_SLOTS = 50000
 
 # Create FastAPI app
 app = FastAPI()
 
 @app.post("/predict")
 def predict(input_data: PredictionInput):
-    # --- Process Input ---
-    date_obj = datetime.strptime(input_data.date, "%d:%m:%Y")
-    date_range_label = get_date_range_label(date_obj)
+    with metrics.track("predict") as timer:
+        # --- Process Input ---
+        date_obj = datetime.strptime(input_data.date, "%d:%m:%Y")
+        date_range_label = get_date_range_label(date_obj)
+        timer.mark("strptime")
+
+        if isinstance(model, PredictionSurface):
+            # No feature frame: interpolate straight from the precompiled surface
+            seconds = time_encoder.convert_time_to_seconds(input_data.time)
+            timer.mark("encoder_transform")
+            prediction = model.lookup(date_range_label, seconds, input_data.consumed_power)
+            timer.mark("surface_lookup")
+        else:
+            encoded_date = encoder.transform([[date_range_label]])
+            time_features = time_encoder.transform(input_data.time)
+            timer.mark("encoder_transform")
 
-    encoded_date = encoder.transform([[date_range_label]])
-    encoded_date_df = pd.DataFrame(encoded_date, columns=encoder.get_feature_names_out(["date_range"]))
+            encoded_date_df = pd.DataFrame(encoded_date, columns=encoder.get_feature_names_out(["date_range"]))
+            X_test = encoded_date_df.copy()
+            X_test["consumed_power"] = input_data.consumed_power
 
-    time_features = time_encoder.transform(input_data.time)
-    X_test = encoded_date_df.copy()
-    X_test["consumed_power"] = input_data.consumed_power
+            for col in time_features:
+                X_test[col] = time_features[col]
+            timer.mark("dataframe")
 
-    for col in time_features:
-        X_test[col] = time_features[col]
+            for col in final_feature_order:
+                if col not in X_test.columns:
+                    X_test[col] = 0
 
-    for col in final_feature_order:
-        if col not in X_test.columns:
-            X_test[col] = 0
+            X_test = X_test[final_feature_order]
+            timer.mark("reorder")
 
-    X_test = X_test[final_feature_order]
+            # --- Predict ---
+            prediction = model.predict(X_test)[0]
+            timer.mark("model_predict")
+            seconds = time_features["time"]
 
-    # --- Predict ---
-    prediction = model.predict(X_test)[0]
+        observe_readings("/predict", lambda: monitor.observe(input_data.house_id or "unknown", seconds,
+                                                            input_data.consumed_power,
+                                                            f"{input_data.date} {input_data.time}"))
+        timer.mark("monitor")
 
     return {
         "white_goods": prediction[0],
@@ -102,3 +135,131 @@ def predict(input_data: PredictionInput):
         "utility_appliances": prediction[5],
     }
 
+@app.post("/forecast")
+def forecast(input_data: ForecastInput):
+    with metrics.track("forecast") as timer:
+        # --- Build slot grid ---
+        if input_data.step_minutes <= 0 or input_data.horizon_hours <= 0:
+            raise HTTPException(status_code=422, detail="horizon_hours and step_minutes must be positive")
+        n_slots = int(input_data.horizon_hours * 60 // input_data.step_minutes)
+        if n_slots == 0 or n_slots > MAX_FORECAST_SLOTS:
+            raise HTTPException(status_code=422, detail=f"horizon must cover between 1 and {MAX_FORECAST_SLOTS} slots")
+
+        try:
+            start = np.datetime64(datetime.strptime(f"{input_data.start_date} {input_data.start_time}",
+                                                    "%d:%m:%Y %H:%M:%S"), 's')
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        slots = start + np.arange(n_slots) * np.timedelta64(input_data.step_minutes, 'm')
+
+        consumed_power = np.asarray(input_data.consumed_power, dtype=float)
+        if consumed_power.ndim == 1 and len(consumed_power) != n_slots:
+            raise HTTPException(
+                status_code=422,
+                detail=f"consumed_power profile has {len(consumed_power)} values, expected {n_slots}",
+            )
+        timer.mark("slot_grid")
+
+        # --- Encode all slots and predict in one call ---
+        if isinstance(model, PredictionSurface):
+            predictions = model.predict_parts(model.label_indices(date_range_labels(slots)), seconds_of_day(slots),
+                                              consumed_power)
+            timer.mark("surface_lookup")
+        else:
+            X_test = build_feature_frame(date_range_labels(slots), seconds_of_day(slots), consumed_power, encoder, time_encoder)
+            timer.mark("encode")
+            predictions = model.predict(X_test)
+            timer.mark("model_predict")
+
+    return {
+        "timestamps": np.datetime_as_string(slots).tolist(),
+        **predictions_to_columns(predictions),
+    }
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, chunk_size: int = Query(1024, ge=1, le=100000)):
+    """Score a streamed CSV or NDJSON upload chunk by chunk, streaming NDJSON results back."""
+    content_type = request.headers.get("content-type", "")
+    parser = NdjsonChunkParser() if "json" in content_type else CsvChunkParser()
+
+    async def results():
+        first_row = 0
+        async for lines in iter_line_chunks(request.stream(), chunk_size):
+            columns, rows, errors = await run_in_threadpool(parser.parse, lines)
+            n_rows = len(rows) + len(errors)
+            predictions = np.empty((0, 0))
+            try:
+                if rows:
+                    predictions, columns, rows, bad_rows = await run_in_threadpool(
+                        score_chunk, columns, rows, model, encoder, time_encoder)
+                    errors = errors + bad_rows
+            except (ValueError, KeyError, IndexError) as e:
+                # The response has already started, so report the bad chunk inline and move on
+                yield (json.dumps({"error": str(e), "first_row": first_row, "rows": n_rows}) + "\n").encode("utf-8")
+                first_row += n_rows
+                continue
+            if n_rows:
+                yield predictions_to_ndjson(predictions, [first_row + row for row in rows],
+                                            [(first_row + row, message) for row, message in errors])
+            first_row += n_rows
+            if rows:
+                # The predictions are already out; a monitor failure must not turn them into an error
+                await run_in_threadpool(observe_readings, "/predict/stream", lambda: monitor.observe_many(
+                    columns.get("house_id", "unknown"), parse_times(columns["time"]), columns["consumed_power"]))
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.get("/readings")
+def readings(house_id: str, start: Optional[str] = None, end: Optional[str] = None,
+             columns: Optional[str] = Query(None, description="Comma-separated columns (default: all)")):
+    """Stored readings of one house with start <= timestamp < end."""
+    with metrics.track("readings") as timer:
+        if not readings_store.partitions(house_id):
+            raise HTTPException(status_code=404, detail=f"No readings for house {house_id}")
+        try:
+            result = readings_store.query(house_id, start, end, columns.split(",") if columns else None)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        timer.mark("query")
+
+        response = {"house_id": house_id, "rows": len(result[TIMESTAMP]),
+                    "timestamps": np.datetime_as_string(result.pop(TIMESTAMP)).tolist()}
+        for col, values in result.items():
+            # Columns an older file lacked are NaN, which JSON cannot carry
+            missing = np.isnan(values)
+            response[col] = np.where(missing, None, values).tolist() if missing.any() else values.tolist()
+        timer.mark("serialize")
+    return response
+
+@app.get("/rollups")
+def rollup_metrics(house_id: str, level: str = Query("monthly", description=f"One of {LEVELS}"),
+                   start: Optional[str] = None, end: Optional[str] = None,
+                   names: Optional[str] = Query(None, description="Comma-separated metrics, e.g. consumed_power.sum")):
+    """Daily, weekly or monthly sums, peaks and time-of-use sums of one house."""
+    with metrics.track("rollups") as timer:
+        if house_id not in rollups.manifest()["built_from"]:
+            raise HTTPException(status_code=404, detail=f"No rollups for house {house_id}")
+        try:
+            result = rollups.lookup(house_id, level, start, end, names.split(",") if names else None)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        timer.mark("lookup")
+
+        response = {"house_id": house_id, "level": level,
+                    "periods": np.datetime_as_string(result.pop("period")).tolist()}
+        for name, values in result.items():
+            # Categories a house has no readings for are NaN
+            missing = np.isnan(values)
+            response[name] = np.where(missing, None, values).tolist() if missing.any() else values.tolist()
+        timer.mark("serialize")
+    return response
+
+@app.get("/monitor")
+def monitor_state(house_id: Optional[str] = None):
+    """Input sketches, drift against the training profile and recent anomalous readings."""
+    try:
+        return monitor.state(house_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+metrics.instrument(app, endpoints=["/predict", "/forecast", "/predict/stream", "/readings", "/rollups", "/monitor"])
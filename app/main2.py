@@ -1,119 +1,70 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import pandas as pd
+from typing import List
 import numpy as np
-import dill as pickle
 import sys
-import re
 from datetime import datetime
-import calendar
 import os
 
 # Add trainer folder to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from trainer.time_feature_encoder import TimeFeatureEncoder
+import app.metrics as metrics
+from app.artifacts import load_artifacts
+from app.features import (
+    build_feature_frame, date_range_labels, parse_times, seconds_of_day, predictions_to_columns,
+)
+from app.nlp import (
+    MAX_BATCH_QUERIES, normalize_query, parse_query, parse_queries, build_record_features,
+    resolve_slot_grid,
+)
 
-# Patch dill to fix unpickling of TimeFeatureEncoder from __main__
-import dill._dill
-
-original_find_class = dill._dill.Unpickler.find_class
-
-def patched_find_class(self, module, name):
-    if module == "__main__" and name == "TimeFeatureEncoder":
-        module = "trainer.time_feature_encoder"
-    return original_find_class(self, module, name)
-
-dill._dill.Unpickler.find_class = patched_find_class
-
-# Load model and encoders
-with open("model/random_forest_model.pkl", "rb") as f:
-    model = pickle.load(f)
-with open("model/encoder.pkl", "rb") as f:
-    encoder = pickle.load(f)
-with open("model/time_encoder.pkl", "rb") as f:
-    time_encoder = pickle.load(f)
-
-
-final_feature_order = [  'date_range_apr_1', 'date_range_apr_2', 'date_range_apr_3',
-    'date_range_aug_1', 'date_range_aug_2', 'date_range_aug_3',
-    'date_range_dec_1', 'date_range_dec_2', 'date_range_dec_3',
-    'date_range_feb_1', 'date_range_feb_2', 'date_range_feb_3',
-    'date_range_jan_1', 'date_range_jan_2', 'date_range_jan_3',
-    'date_range_jul_1', 'date_range_jul_2', 'date_range_jul_3',
-    'date_range_jun_1', 'date_range_jun_2', 'date_range_jun_3',
-    'date_range_mar_1', 'date_range_mar_2', 'date_range_mar_3',
-    'date_range_may_1', 'date_range_may_2', 'date_range_may_3',
-    'date_range_nov_1', 'date_range_nov_2', 'date_range_nov_3',
-    'date_range_oct_1', 'date_range_oct_2', 'date_range_oct_3',
-    'date_range_sep_1', 'date_range_sep_2', 'date_range_sep_3',
-    'time', 'consumed_power',
-    'time_sin', 'time_cos', 'minute', 'second',
-    'minute_sin', 'minute_cos', 'second_sin', 'second_cos'] 
-
-def get_date_range_label(date_obj):
-    day = date_obj.day
-    month = date_obj.strftime('%b').lower()
-    days_in_month = calendar.monthrange(date_obj.year, date_obj.month)[1]
-    range_size = days_in_month // 3
-    if day <= range_size:
-        return f"{month}_1"
-    elif day <= range_size * 2:
-        return f"{month}_2"
-    else:
-        return f"{month}_3"
+# Load model and encoders (registry version selected by MODEL_VERSION)
+model, encoder, time_encoder = load_artifacts("model")
 
 
 class NLPPredictionInput(BaseModel):
     query: str
 
+class NLPBatchInput(BaseModel):
+    queries: List[str]
+
 app = FastAPI()
 
 def extract_info_from_query(query: str):
+    parsed = parse_query(normalize_query(query))
     now = datetime.now()
 
-    # Extract time
-    time_match = re.search(r'\b(\d{1,2}:\d{2}(?::\d{2})?)\b', query)
-    if time_match:
-        parts = time_match.group(1).split(':')
-        while len(parts) < 3:
-            parts.append('00')  # Add seconds or minutes if missing
-        time_str = ':'.join(parts)
-    else:
+    # Fall back to the current date and time when the query names none
+    if parsed.seconds is None:
         time_str = now.strftime("%H:%M:%S")
+    else:
+        time_str = "%02d:%02d:%02d" % (parsed.seconds // 3600, parsed.seconds // 60 % 60, parsed.seconds % 60)
+    if parsed.date is None:
+        date_str = now.strftime("%d:%m:%Y")
+    else:
+        date_str = datetime.strptime(parsed.date, "%Y-%m-%d").strftime("%d:%m:%Y")
 
-    # Extract date
-    date_match = re.search(r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})', query)
-    date_str = date_match.group(1).replace('-', ':').replace('/', ':') if date_match else now.strftime("%d:%m:%Y")
-
-    # Extract consumed power
-    power_match = re.search(r'(\d+(\.\d+)?)\s*(kW|kw|kilowatt|units|power)', query, re.IGNORECASE)
-    consumed_power = float(power_match.group(1)) if power_match else 1.0  # fallback
-
-    return date_str, time_str, consumed_power
+    return date_str, time_str, parsed.consumed_power
 
 
 @app.post("/nlp_predict")
 def nlp_predict(nlp_input: NLPPredictionInput):
-    # Parse natural language input
-    date_str, time_str, consumed_power = extract_info_from_query(nlp_input.query)
-
-    date_obj = datetime.strptime(date_str, "%d:%m:%Y")
-    date_range_label = get_date_range_label(date_obj)
+    with metrics.track("nlp_predict") as timer:
+        # Parse natural language input
+        date_str, time_str, consumed_power = extract_info_from_query(nlp_input.query)
+        timer.mark("extract_query")
 
-    encoded_date = encoder.transform([[date_range_label]])
-    encoded_date_df = pd.DataFrame(encoded_date, columns=encoder.get_feature_names_out(["date_range"]))
+        date_obj = datetime.strptime(date_str, "%d:%m:%Y")
+        timer.mark("strptime")
 
-    time_features = time_encoder.transform(time_str)
-    X_test = encoded_date_df.copy()
-    X_test["consumed_power"] = consumed_power
-    for col in time_features:
-        X_test[col] = time_features[col]
-    for col in final_feature_order:
-        if col not in X_test.columns:
-            X_test[col] = 0
-    X_test = X_test[final_feature_order]
+        # Same feature path as /nlp_predict/batch and /nlp_forecast
+        X_test = build_feature_frame(date_range_labels([np.datetime64(date_obj, 's')]), parse_times([time_str]),
+                                     consumed_power, encoder, time_encoder)
+        timer.mark("encode")
 
-    prediction = model.predict(X_test)[0]
+        prediction = model.predict(X_test)[0]
+        timer.mark("model_predict")
 
     return {
         "white_goods": prediction[0],
@@ -123,3 +74,66 @@ def nlp_predict(nlp_input: NLPPredictionInput):
         "ev_charges": prediction[4],
         "utility_appliances": prediction[5],
     }
+
+@app.post("/nlp_predict/batch")
+def nlp_predict_batch(batch_input: NLPBatchInput):
+    with metrics.track("nlp_predict_batch") as timer:
+        if len(batch_input.queries) > MAX_BATCH_QUERIES:
+            raise HTTPException(status_code=422, detail=f"at most {MAX_BATCH_QUERIES} queries per batch")
+
+        # Parse through the shared cache; identical queries collapse to one record
+        records, rows, errors = parse_queries(batch_input.queries)
+        timer.mark("extract_query")
+
+        # --- Encode the unique records and predict in one call ---
+        if records:
+            X_test = build_record_features(records, encoder, time_encoder)
+            timer.mark("encode")
+            predictions = predictions_to_columns(model.predict(X_test))
+            timer.mark("model_predict")
+
+        results = []
+        for position, row in enumerate(rows):
+            if row is None:
+                results.append({"error": errors[position]})
+            else:
+                results.append({category: values[row] for category, values in predictions.items()})
+        timer.mark("response")
+
+    cache = parse_query.cache_info()
+    return {
+        "results": results,
+        "unique_records": len(records),
+        "parse_cache": {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize},
+    }
+
+@app.post("/nlp_forecast")
+def nlp_forecast(nlp_input: NLPPredictionInput):
+    with metrics.track("nlp_forecast") as timer:
+        # Resolve "tomorrow evening", "next week", "from X to Y", ... into a slot grid
+        try:
+            grid = resolve_slot_grid(nlp_input.query)
+            consumed_power = parse_query(normalize_query(nlp_input.query)).consumed_power
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        slots = grid.slots()
+        timer.mark("extract_query")
+
+        # --- Encode all slots and predict in one call ---
+        X_test = build_feature_frame(date_range_labels(slots), seconds_of_day(slots), consumed_power, encoder, time_encoder)
+        timer.mark("encode")
+        predictions = model.predict(X_test)
+        timer.mark("model_predict")
+
+    series = predictions_to_columns(predictions)
+    return {
+        "start": str(grid.start),
+        "end": str(grid.end),
+        "step_minutes": grid.step_minutes,
+        "consumed_power": consumed_power,
+        "totals": {category: float(np.sum(values)) for category, values in series.items()},
+        "timestamps": np.datetime_as_string(slots).tolist(),
+        **series,
+    }
+
+metrics.instrument(app, endpoints=["/nlp_predict", "/nlp_predict/batch", "/nlp_forecast"])
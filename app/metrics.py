@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from collections import Counter as _StackCounter
+
+from fastapi.responses import PlainTextResponse
+
+# Latency buckets in seconds, tuned for sub-millisecond to second-long requests
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Set by the middleware when a request arrives, read by track() for the parse stage
+_request_start = contextvars.ContextVar("request_start", default=None)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.type_name = "counter"
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in items]
+
+
+class Gauge(Counter):
+    def __init__(self, name, help_text, label_names=()):
+        super().__init__(name, help_text, label_names)
+        self.type_name = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.type_name = "histogram"
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.label_names + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+requests_total = registry.register(Counter(
+    "api_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status")))
+errors_total = registry.register(Counter(
+    "api_errors_total", "Requests that raised inside the handler.", ("endpoint",)))
+in_flight = registry.register(Gauge(
+    "api_requests_in_flight", "Requests currently being processed.", ("endpoint",)))
+request_seconds = registry.register(Histogram(
+    "api_request_duration_seconds", "End-to-end request latency.", ("endpoint",)))
+stage_seconds = registry.register(Histogram(
+    "api_stage_duration_seconds", "Latency of each hot-path stage inside a handler.", ("handler", "stage")))
+monitor_errors_total = registry.register(Counter(
+    "api_monitor_errors_total", "Readings the input monitor failed to record, by endpoint.", ("endpoint",)))
+
+
+class SlowRequestSampler:
+    """Background thread that samples the stacks of requests running longer than a threshold."""
+
+    def __init__(self, threshold_seconds, interval_seconds=0.005, max_stacks=500):
+        self.threshold_seconds = threshold_seconds
+        self.interval_seconds = interval_seconds
+        self.max_stacks = max_stacks
+        self.stacks = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def enter(self, handler):
+        with self._lock:
+            self._active[threading.get_ident()] = (handler, time.perf_counter())
+
+    def exit(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [(ident, handler) for ident, (handler, start) in self._active.items()
+                        if now - start >= self.threshold_seconds]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for ident, handler in slow:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._record(handler, frame)
+
+    def _record(self, handler, frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        stack = ";".join(reversed(parts))
+        with self._lock:
+            counter = self.stacks.setdefault(handler, _StackCounter())
+            if stack in counter or len(counter) < self.max_stacks:
+                counter[stack] += 1
+
+    def collapsed(self, limit=50):
+        """Most frequent sampled stacks per handler, in flamegraph collapsed format."""
+        # The sampler thread keeps recording while we format, so copy under the lock
+        with self._lock:
+            snapshot = {handler: counter.most_common(limit) for handler, counter in self.stacks.items()}
+        return {handler: [f"{stack} {count}" for stack, count in top] for handler, top in snapshot.items()}
+
+
+# Enable with PROFILE_SLOW_REQUESTS_MS=<threshold>; disabled by default
+slow_sampler = None
+
+
+class StageTimer:
+    """Lap timer that records the time since the previous mark as one stage."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.last = time.perf_counter()
+        start = _request_start.get()
+        if start is not None:
+            stage_seconds.observe(self.last - start, handler, "parse")
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        stage_seconds.observe(now - self.last, self.handler, stage)
+        self.last = now
+
+    def __enter__(self):
+        if slow_sampler is not None:
+            slow_sampler.enter(self.handler)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if slow_sampler is not None:
+            slow_sampler.exit()
+        if exc_type is not None:
+            errors_total.inc(self.handler)
+        return False
+
+
+def track(handler):
+    """Time the stages of one handler call: `with track("predict") as timer: ... timer.mark("stage")`."""
+    return StageTimer(handler)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting requests, in-flight requests and end-to-end latency."""
+
+    def __init__(self, app, endpoints=()):
+        self.app = app
+        self.endpoints = set(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope["path"] if scope["path"] in self.endpoints else "other"
+        start = time.perf_counter()
+        token = _request_start.set(start)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        in_flight.inc(endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec(endpoint)
+            request_seconds.observe(time.perf_counter() - start, endpoint)
+            requests_total.inc(endpoint, str(status[0]))
+            _request_start.reset(token)
+
+
+def _restart_slow_sampler():
+    # Threads do not survive fork; pre-forked workers need their own sampler
+    global slow_sampler
+    if slow_sampler is not None:
+        slow_sampler = SlowRequestSampler(slow_sampler.threshold_seconds,
+                                          slow_sampler.interval_seconds, slow_sampler.max_stacks)
+        slow_sampler.start()
+
+
+def instrument(app, endpoints):
+    """Add request metrics, the /metrics endpoint and the optional slow-request sampler to an app."""
+    global slow_sampler
+    app.add_middleware(MetricsMiddleware, endpoints=endpoints)
+
+    threshold_ms = os.environ.get("PROFILE_SLOW_REQUESTS_MS")
+    if threshold_ms and slow_sampler is None:
+        slow_sampler = SlowRequestSampler(float(threshold_ms) / 1000)
+        slow_sampler.start()
+        os.register_at_fork(after_in_child=_restart_slow_sampler)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return registry.render()
+
+    @app.get("/metrics/slow_profiles")
+    def slow_profiles():
+        if slow_sampler is None:
+            return {"enabled": False, "stacks": {}}
+        return {"enabled": True, "threshold_ms": slow_sampler.threshold_seconds * 1000,
+                "stacks": slow_sampler.collapsed()}
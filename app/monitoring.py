@@ -0,0 +1,399 @@
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from trainer.monitoring_profile import (N_SLOTS, POWER_BINS, PROFILE_FILE, SLOT_SECONDS,
+                                        build_profile_from_csv, load_profile, save_profile)
+
+# Profile of a model directory without a registry; registered versions carry their own
+PROFILE_PATH = os.path.join("model", PROFILE_FILE)
+
+# Decay per reading: histograms and the mean/variance forget with a horizon of about
+# 1/alpha readings, per-slot baselines with about 1/SLOT_ALPHA readings of that slot
+ALPHA = 1 / 2000
+SLOT_ALPHA = 1 / 50
+SLOT_WARMUP = 20          # readings of a slot before a house's own baseline replaces the training one
+Z_THRESHOLD = 4.0
+PSI_THRESHOLD = 0.2       # population stability index above which a distribution counts as drifted
+MIN_DRIFT_READINGS = 500
+MAX_HOUSES = 10000        # further houses share the OTHER series, so memory stays bounded
+MAX_RECENT_ANOMALIES = 100
+QUANTILES = (0.5, 0.9, 0.99)
+
+ALL = "*"
+OTHER = "other"
+
+_RESCALE_AT = 1e150
+
+
+def population_stability(live, reference, epsilon=1e-4):
+    """PSI between two binned distributions; about 0.1 is a small shift, above 0.2 a large one."""
+    live = np.asarray(live, dtype=np.float64)
+    total = live.sum()
+    if total <= 0:
+        return None
+    live = np.maximum(live / total, epsilon)
+    reference = np.maximum(np.asarray(reference, dtype=np.float64), epsilon)
+    return float(np.sum((live - reference) * np.log(live / reference)))
+
+
+class _Series:
+    """Sketches of one house (or of all readings): constant size whatever the reading count.
+
+    Histogram bins hold exponentially decayed counts. Instead of decaying every bin on
+    every reading, each new reading is added with a weight that grows by 1 / (1 - alpha)
+    and the bins are rescaled once the weight gets large, so a reading touches one bin.
+    """
+
+    __slots__ = ("readings", "anomalies", "mean", "square", "weight", "power_counts", "slot_counts",
+                 "slot_mean", "slot_square", "slot_readings")
+
+    def __init__(self, n_power_bins):
+        self.readings = 0
+        self.anomalies = 0
+        self.mean = 0.0
+        self.square = 0.0
+        self.weight = 1.0
+        self.power_counts = [0.0] * n_power_bins
+        self.slot_counts = [0.0] * N_SLOTS
+        self.slot_mean = [0.0] * N_SLOTS
+        self.slot_square = [0.0] * N_SLOTS
+        self.slot_readings = [0] * N_SLOTS
+
+    def rescale(self):
+        scale = 1.0 / self.weight
+        self.power_counts = [count * scale for count in self.power_counts]
+        self.slot_counts = [count * scale for count in self.slot_counts]
+        self.weight = 1.0
+
+
+class ReadingsMonitor:
+    """Streaming anomaly and drift monitor for the readings the API and the simulator see.
+
+    Every reading updates its house's sketches and those of all readings: an
+    exponentially weighted mean and variance of consumed_power, decayed histograms of
+    consumed_power (over the training profile's quantile bins) and of the time of day,
+    and an exponentially weighted mean and variance of consumed_power per half-hour
+    slot. A reading is anomalous when it is more than z_threshold standard deviations
+    from its slot baseline: the house's own once that slot has slot_warmup readings,
+    the training profile's before. Drift is the population stability index of the
+    decayed histograms against the training profile, computed only when state() is read.
+    """
+
+    def __init__(self, profile=None, alpha=ALPHA, slot_alpha=SLOT_ALPHA, slot_warmup=SLOT_WARMUP,
+                 z_threshold=Z_THRESHOLD, psi_threshold=PSI_THRESHOLD, max_houses=MAX_HOUSES):
+        self.profile = profile
+        self.alpha = alpha
+        self.growth = 1.0 / (1.0 - alpha)
+        self.slot_alpha = slot_alpha
+        self.slot_warmup = slot_warmup
+        self.z_threshold = z_threshold
+        self.psi_threshold = psi_threshold
+        self.max_houses = max_houses
+        if profile is not None:
+            self.edges = list(profile["consumed_power"]["edges"])
+            self.baseline_mean = list(profile["slot_baseline"]["mean"])
+            self.baseline_std = list(profile["slot_baseline"]["std"])
+        else:
+            # Without a profile, bin on a fixed 0-10 kWh grid and score against the house baselines only
+            self.edges = np.linspace(0.5, 9.5, POWER_BINS - 1).tolist()
+            self.baseline_mean = self.baseline_std = None
+        self.series = {ALL: _Series(len(self.edges) + 1)}
+        self.recent_anomalies = deque(maxlen=MAX_RECENT_ANOMALIES)
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _series(self, house_id):
+        series = self.series.get(house_id)
+        if series is None:
+            if len(self.series) > self.max_houses:
+                house_id = OTHER
+                series = self.series.get(OTHER)
+            if series is None:
+                series = self.series[house_id] = _Series(len(self.edges) + 1)
+        return series
+
+    def _baseline(self, series, slot):
+        """(mean, std) the next reading of a slot is scored against, or None while nothing is known."""
+        if series.slot_readings[slot] >= self.slot_warmup:
+            mean = series.slot_mean[slot]
+            return mean, math.sqrt(max(series.slot_square[slot] - mean * mean, 0.0))
+        if self.baseline_mean is not None:
+            return self.baseline_mean[slot], self.baseline_std[slot]
+        return None
+
+    def _update(self, series, power_bin, slot, value):
+        alpha = self.alpha
+        if series.readings == 0:
+            series.mean, series.square = value, value * value
+        else:
+            series.mean += alpha * (value - series.mean)
+            series.square += alpha * (value * value - series.square)
+        series.readings += 1
+
+        weight = series.weight
+        series.power_counts[power_bin] += weight
+        series.slot_counts[slot] += weight
+        weight *= self.growth
+        series.weight = weight
+        if weight > _RESCALE_AT:
+            series.rescale()
+
+        if series.slot_readings[slot] == 0:
+            series.slot_mean[slot], series.slot_square[slot] = value, value * value
+        else:
+            series.slot_mean[slot] += self.slot_alpha * (value - series.slot_mean[slot])
+            series.slot_square[slot] += self.slot_alpha * (value * value - series.slot_square[slot])
+        series.slot_readings[slot] += 1
+
+    def observe(self, house_id, seconds, consumed_power, timestamp=None):
+        """Record one reading; returns the anomaly record when it is anomalous, else None."""
+        value = float(consumed_power)
+        slot = int(seconds) // SLOT_SECONDS % N_SLOTS
+        with self._lock:
+            series = self._series(str(house_id))
+            anomaly = None
+            if not value >= 0:  # negative or NaN
+                anomaly = {"reason": "invalid"}
+            else:
+                baseline = self._baseline(series, slot)
+                if baseline is not None:
+                    mean, std = baseline
+                    z = (value - mean) / std if std > 0 else (0.0 if value == mean else math.inf)
+                    if abs(z) > self.z_threshold:
+                        anomaly = {"reason": "slot_baseline", "expected": round(mean, 4), "z": round(z, 2)}
+                power_bin = bisect_right(self.edges, value)
+                self._update(series, power_bin, slot, value)
+                self._update(self.series[ALL], power_bin, slot, value)
+
+            if anomaly is not None:
+                series.anomalies += 1
+                self.series[ALL].anomalies += 1
+                anomaly.update(house_id=str(house_id), timestamp=timestamp, consumed_power=value)
+                self.recent_anomalies.append(anomaly)
+            return anomaly
+
+    def observe_many(self, house_ids, seconds, consumed_power, timestamps=None):
+        """Record a batch of readings in order; returns the number of anomalies.
+
+        Each house's readings are folded in with closed-form decay weights, so the cost
+        is a few numpy calls per house and slot rather than per reading. Readings of one
+        batch are scored against the slot baselines as they were when the batch arrived.
+        """
+        values = np.asarray(consumed_power, dtype=np.float64)
+        slots = np.asarray(seconds, dtype=np.int64) // SLOT_SECONDS % N_SLOTS
+        house_ids = np.asarray(house_ids).astype(str) if np.ndim(house_ids) else np.full(len(values), str(house_ids))
+        if len(values) == 0:
+            return 0
+        houses, codes = np.unique(house_ids, return_inverse=True)
+        invalid = ~(values >= 0)
+        power_bins = np.searchsorted(self.edges, np.where(invalid, 0.0, values), side="right")
+
+        anomalies = 0
+        with self._lock:
+            for code, house_id in enumerate(houses):
+                rows = np.flatnonzero(codes == code)
+                series = self._series(str(house_id))
+                flagged = invalid[rows].copy()
+                mean, std = self._batch_baseline(series)
+                if mean is not None:
+                    house_slots = slots[rows]
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        z = (values[rows] - mean[house_slots]) / std[house_slots]
+                    scored = ~flagged & ~np.isnan(mean[house_slots])
+                    flagged |= scored & (np.abs(np.nan_to_num(z, nan=0.0)) > self.z_threshold)
+                else:
+                    z = np.full(len(rows), np.nan)
+
+                kept = rows[~invalid[rows]]
+                for target in (series, self.series[ALL]):
+                    self._fold(target, power_bins[kept], slots[kept], values[kept])
+                count = int(flagged.sum())
+                series.anomalies += count
+                self.series[ALL].anomalies += count
+                anomalies += count
+                for index in np.flatnonzero(flagged)[-self.recent_anomalies.maxlen:]:
+                    row = rows[index]
+                    record = {"reason": "invalid"} if invalid[row] else {
+                        "reason": "slot_baseline", "expected": round(float(mean[slots[row]]), 4),
+                        "z": round(float(z[index]), 2)}
+                    record.update(house_id=str(house_id),
+                                  timestamp=None if timestamps is None else str(timestamps[row]),
+                                  consumed_power=float(values[row]))
+                    self.recent_anomalies.append(record)
+        return anomalies
+
+    def _batch_baseline(self, series):
+        """Per-slot (mean, std) arrays with the same precedence as _baseline; NaN where unknown."""
+        readings = np.asarray(series.slot_readings)
+        own_mean = np.asarray(series.slot_mean)
+        own_std = np.sqrt(np.maximum(np.asarray(series.slot_square) - own_mean ** 2, 0.0))
+        if self.baseline_mean is not None:
+            fallback_mean, fallback_std = np.asarray(self.baseline_mean), np.asarray(self.baseline_std)
+        elif not readings.any():
+            return None, None
+        else:
+            fallback_mean = fallback_std = np.full(N_SLOTS, np.nan)
+        warm = readings >= self.slot_warmup
+        return np.where(warm, own_mean, fallback_mean), np.where(warm, own_std, fallback_std)
+
+    def _fold(self, series, power_bins, slots, values):
+        n = len(values)
+        if n == 0:
+            return
+        decay = 1.0 - self.alpha
+        if series.readings == 0:
+            series.mean, series.square = float(values[0]), float(values[0]) ** 2
+            tail = values[1:]
+        else:
+            tail = values
+        if len(tail):
+            # Weight of the i-th of m readings in the running mean: alpha * decay^(m-1-i)
+            m = len(tail)
+            weights = self.alpha * decay ** np.arange(m - 1, -1, -1, dtype=np.float64)
+            carried = decay ** m
+            series.mean = carried * series.mean + float(weights @ tail)
+            series.square = carried * series.square + float(weights @ (tail * tail))
+        series.readings += n
+
+        # Histograms: bring the bins to weight 1, decay them by the whole batch, then add
+        # the batch with the weight each reading would have after the rest arrived
+        series.rescale()
+        recency = decay ** np.arange(n, 0, -1, dtype=np.float64)
+        carried = decay ** n
+        power_counts = carried * np.asarray(series.power_counts) + np.bincount(
+            power_bins, recency, minlength=len(series.power_counts))
+        slot_counts = carried * np.asarray(series.slot_counts) + np.bincount(slots, recency, minlength=N_SLOTS)
+        series.power_counts, series.slot_counts = power_counts.tolist(), slot_counts.tolist()
+
+        # Per-slot baselines, one closed-form update per slot present in the batch
+        slot_decay = 1.0 - self.slot_alpha
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        starts = np.flatnonzero(np.diff(sorted_slots, prepend=-1))
+        for first, last in zip(starts, np.append(starts[1:], n)):
+            slot = int(sorted_slots[first])
+            slot_values = values[order[first:last]]
+            if series.slot_readings[slot] == 0:
+                series.slot_mean[slot], series.slot_square[slot] = float(slot_values[0]), float(slot_values[0]) ** 2
+                slot_tail = slot_values[1:]
+            else:
+                slot_tail = slot_values
+            if len(slot_tail):
+                m = len(slot_tail)
+                weights = self.slot_alpha * slot_decay ** np.arange(m - 1, -1, -1, dtype=np.float64)
+                carried = slot_decay ** m
+                series.slot_mean[slot] = carried * series.slot_mean[slot] + float(weights @ slot_tail)
+                series.slot_square[slot] = carried * series.slot_square[slot] + float(weights @ (slot_tail ** 2))
+            series.slot_readings[slot] += len(slot_values)
+
+    def _quantiles(self, counts):
+        """Quantiles interpolated inside the decayed power histogram's bins."""
+        counts = np.asarray(counts)
+        total = counts.sum()
+        if total <= 0:
+            return None
+        low = self.profile["consumed_power"]["min"] if self.profile else 0.0
+        high = self.profile["consumed_power"]["max"] if self.profile else 10.0
+        bounds = np.concatenate([[min(low, self.edges[0])], self.edges, [max(high, self.edges[-1])]])
+        cumulative = np.concatenate([[0.0], np.cumsum(counts) / total])
+        return {f"p{round(q * 100)}": round(float(np.interp(q, cumulative, bounds)), 4) for q in QUANTILES}
+
+    def _summary(self, series, detail=False):
+        variance = max(series.square - series.mean ** 2, 0.0)
+        summary = {
+            "readings": series.readings,
+            "anomalies": series.anomalies,
+            "consumed_power": {"ewm_mean": round(series.mean, 4), "ewm_std": round(math.sqrt(variance), 4),
+                               "quantiles": self._quantiles(series.power_counts)},
+        }
+        if self.profile is not None:
+            psi = {
+                "consumed_power": population_stability(series.power_counts,
+                                                       self.profile["consumed_power"]["probabilities"]),
+                "time_of_day": population_stability(series.slot_counts, self.profile["time_of_day"]["probabilities"]),
+            }
+            summary["psi"] = {name: None if value is None else round(value, 4) for name, value in psi.items()}
+            summary["drift"] = sorted(name for name, value in psi.items()
+                                      if value is not None and value > self.psi_threshold
+                                      and series.readings >= MIN_DRIFT_READINGS)
+        if detail:
+            summary["slot_baseline"] = {
+                "readings": list(series.slot_readings),
+                "mean": [round(mean, 4) for mean in series.slot_mean],
+                "std": [round(math.sqrt(max(square - mean * mean, 0.0)), 4)
+                        for mean, square in zip(series.slot_mean, series.slot_square)],
+            }
+        return summary
+
+    def state(self, house_id=None):
+        """Current sketches as a JSON-serializable dict; one house in detail when house_id is given."""
+        with self._lock:
+            if house_id is not None:
+                series = self.series.get(str(house_id))
+                if series is None:
+                    raise KeyError(f"No readings seen for house {house_id}")
+                return {"house_id": str(house_id), **self._summary(series, detail=True)}
+            houses = {house: self._summary(series) for house, series in self.series.items() if house != ALL}
+            return {
+                "profile": None if self.profile is None else {"source": self.profile.get("source"),
+                                                              "readings": self.profile["readings"]},
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "all": self._summary(self.series[ALL]),
+                "drifting_houses": sorted(house for house, summary in houses.items() if summary.get("drift")),
+                "houses": houses,
+                "recent_anomalies": list(self.recent_anomalies),
+            }
+
+
+def replay(path, monitor, chunk_size=500000):
+    """Stream a raw simulator CSV through the monitor in file order; returns (rows, anomalies)."""
+    # Imported here so serving the API does not pull in the storage loader
+    from storage.raw_loader import detect_schema, iter_normalized_chunks
+    schema = detect_schema(path)
+    schema = dict(schema, columns={col: position for col, position in schema["columns"].items()
+                                   if col in ("house_id", "date", "time", "consumed_power")})
+    rows = anomalies = 0
+    for chunk in iter_normalized_chunks(path, schema, chunk_size):
+        timestamps = chunk["timestamp"]
+        seconds = (timestamps - timestamps.astype('datetime64[D]')).astype(np.int64)
+        anomalies += monitor.observe_many(chunk["house_id"], seconds, chunk["consumed_power"], timestamps)
+        rows += len(timestamps)
+    return rows, anomalies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the training profile the readings monitor compares "
+                                                 "against, or replay a simulator CSV through the monitor.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("profile", help="Profile the training data")
+    build.add_argument("data_path", help="Training CSV (or raw readings CSV)")
+    build.add_argument("--output", default=PROFILE_PATH)
+    run = commands.add_parser("replay", help="Feed a raw readings CSV through the monitor and print its state")
+    run.add_argument("data_path")
+    run.add_argument("--profile", default=PROFILE_PATH)
+    run.add_argument("--chunk-size", type=int, default=500000)
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        print(f"Profile written to {save_profile(build_profile_from_csv(args.data_path), args.output)}")
+        return
+    monitor = ReadingsMonitor(load_profile(args.profile))
+    started = time.perf_counter()
+    rows, anomalies = replay(args.data_path, monitor, args.chunk_size)
+    state = monitor.state()
+    print(f"{rows:,} readings, {anomalies:,} anomalies in {time.perf_counter() - started:.2f}s")
+    print(json.dumps({"all": state["all"], "drifting_houses": state["drifting_houses"]}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
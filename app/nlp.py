@@ -0,0 +1,250 @@
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from app.features import build_feature_frame, date_range_labels
+
+# Compiled once at import; the same patterns /nlp_predict has always used
+TIME_PATTERN = re.compile(r'\b(\d{1,2}:\d{2}(?::\d{2})?)\b')
+DATE_PATTERN = re.compile(r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})')
+POWER_PATTERN = re.compile(r'(\d+(\.\d+)?)\s*(kW|kw|kilowatt|units|power)', re.IGNORECASE)
+
+# Relative and ranged time expressions, matched against normalized queries
+_DATE = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+_TIME = r'\d{1,2}:\d{2}(?::\d{2})?'
+DATE_RANGE_PATTERN = re.compile(
+    rf'\b(?:from|between)\s+(?P<start_date>{_DATE})(?:\s+(?:at\s+)?(?P<start_time>{_TIME}))?'
+    rf'\s+(?:to|until|till|and|-)\s+(?P<end_date>{_DATE})(?:\s+(?:at\s+)?(?P<end_time>{_TIME}))?')
+TIME_RANGE_PATTERN = re.compile(
+    rf'\b(?:from|between)\s+(?P<start_time>{_TIME})\s+(?:to|until|till|and|-)\s+(?P<end_time>{_TIME})\b')
+PERIOD_PATTERN = re.compile(r'\b(this|next)\s+(week|weekend|month)\b')
+SPAN_PATTERN = re.compile(r'\bnext\s+(\d+)\s+(hour|day|week)s?\b')
+RELATIVE_DAY_PATTERN = re.compile(r'\b(day after tomorrow|yesterday|today|tonight|tomorrow)\b')
+WEEKDAY_PATTERN = re.compile(r'\b(next\s+)?(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b')
+PART_OF_DAY_PATTERN = re.compile(r'\b(morning|afternoon|evening|night|tonight)\b')
+STEP_PATTERN = re.compile(r'\b(?:every\s+(\d+)\s*(minute|min|hour)s?|(hourly))\b')
+
+RELATIVE_DAYS = {"yesterday": -1, "today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# Hours each part of the day covers; night runs into the next morning
+PARTS_OF_DAY = {"morning": (6, 12), "afternoon": (12, 18), "evening": (18, 22), "night": (22, 30), "tonight": (18, 30)}
+SPAN_UNITS = {"hour": np.timedelta64(1, 'h'), "day": np.timedelta64(1, 'D'), "week": np.timedelta64(7, 'D')}
+
+DEFAULT_STEP_MINUTES = 30
+DEFAULT_CONSUMED_POWER = 1.0
+
+# Distinct normalized queries whose parse is kept; least recently used are evicted first
+PARSE_CACHE_SIZE = int(os.environ.get("NLP_PARSE_CACHE_SIZE", 4096))
+
+# Upper bound on queries scored by a single /nlp_predict/batch call
+MAX_BATCH_QUERIES = 10000
+
+# Upper bound on slots a single /nlp_forecast query can expand to
+MAX_RANGE_SLOTS = 50000
+
+
+class ParsedQuery(NamedTuple):
+    date: Optional[str]  # YYYY-MM-DD, None when the query names no date
+    seconds: Optional[int]  # seconds since midnight, None when the query names no time
+    consumed_power: float
+
+
+class SlotGrid(NamedTuple):
+    start: np.datetime64
+    end: np.datetime64  # exclusive
+    step_minutes: int
+
+    def slots(self):
+        return np.arange(self.start, self.end, np.timedelta64(self.step_minutes, 'm'))
+
+
+def normalize_query(query):
+    """Lower-case and collapse whitespace; the patterns match normalized and raw queries alike."""
+    return " ".join(query.split()).lower()
+
+
+def time_to_seconds(time_str):
+    """Seconds since midnight for HH:MM or HH:MM:SS."""
+    parts = time_str.split(':')
+    while len(parts) < 3:
+        parts.append('00')  # Add seconds or minutes if missing
+    time_obj = datetime.strptime(':'.join(parts), "%H:%M:%S")
+    return time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
+
+
+def parse_day(date_str):
+    """datetime64[D] for DD/MM/YYYY or DD-MM-YYYY."""
+    date_obj = datetime.strptime(date_str.replace('-', ':').replace('/', ':'), "%d:%m:%Y")
+    return np.datetime64(date_obj.date(), 'D')
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_query(normalized):
+    """Date, time and consumed power mentioned in a normalized query.
+
+    Dates and times that are absent stay None so the cached result does not depend on
+    when it was parsed; callers fill them from the current time. Raises ValueError for
+    a date or time that does not exist (e.g. 31/02/2025 or 25:00).
+    """
+    time_match = TIME_PATTERN.search(normalized)
+    seconds = time_to_seconds(time_match.group(1)) if time_match else None
+
+    date_match = DATE_PATTERN.search(normalized)
+    date = str(parse_day(date_match.group(1))) if date_match else None
+
+    power_match = POWER_PATTERN.search(normalized)
+    consumed_power = float(power_match.group(1)) if power_match else DEFAULT_CONSUMED_POWER
+    return ParsedQuery(date, seconds, consumed_power)
+
+
+def parse_queries(queries, now=None):
+    """Parse a batch of queries into unique (date, seconds, consumed_power) records.
+
+    Returns (records, rows, errors): rows[i] is the index into records for queries[i],
+    or None when that query failed to parse, with the reason in errors[i]. Queries that
+    resolve to the same record, e.g. identical after normalization, share one row.
+    """
+    now = now or datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    now_seconds = now.hour * 3600 + now.minute * 60 + now.second
+
+    records, rows, errors = {}, [], {}
+    for position, query in enumerate(queries):
+        try:
+            parsed = parse_query(normalize_query(query))
+        except ValueError as e:
+            rows.append(None)
+            errors[position] = str(e)
+            continue
+        record = (parsed.date or today,
+                  now_seconds if parsed.seconds is None else parsed.seconds,
+                  parsed.consumed_power)
+        rows.append(records.setdefault(record, len(records)))
+    return list(records), rows, errors
+
+
+def build_record_features(records, encoder, time_encoder):
+    """Model input frame for parsed records, one row each."""
+    dates, seconds, consumed_power = zip(*records)
+    return build_feature_frame(date_range_labels(np.array(dates, dtype='datetime64[D]')),
+                               np.array(seconds, dtype=np.int64), np.array(consumed_power, dtype=float),
+                               encoder, time_encoder)
+
+
+def _weekday(day):
+    # 1970-01-01 was a Thursday
+    return int((day.astype('datetime64[D]').astype(np.int64) + 3) % 7)
+
+
+def _step_minutes(normalized):
+    match = STEP_PATTERN.search(normalized)
+    if match is None:
+        return DEFAULT_STEP_MINUTES
+    if match.group(3):
+        return 60
+    step = int(match.group(1)) * (60 if match.group(2) == "hour" else 1)
+    if step <= 0:
+        raise ValueError("step must be at least one minute")
+    return step
+
+
+def _grid(start, end, step_minutes):
+    start, end = np.datetime64(start, 's'), np.datetime64(end, 's')
+    if end <= start:
+        raise ValueError(f"time range ends ({end}) before it starts ({start})")
+    n_slots = -(-int((end - start) // np.timedelta64(1, 's')) // (step_minutes * 60))
+    if n_slots > MAX_RANGE_SLOTS:
+        raise ValueError(f"time range covers {n_slots} slots, at most {MAX_RANGE_SLOTS} are allowed")
+    return SlotGrid(start, end, step_minutes)
+
+
+def _base_day(normalized, today):
+    """The single day a query names: an explicit date, a relative day or a weekday; None if none."""
+    match = DATE_PATTERN.search(normalized)
+    if match:
+        return parse_day(match.group(1))
+    match = RELATIVE_DAY_PATTERN.search(normalized)
+    if match:
+        return today + RELATIVE_DAYS[match.group(1)]
+    match = WEEKDAY_PATTERN.search(normalized)
+    if match:
+        ahead = (WEEKDAYS.index(match.group(2)) - _weekday(today)) % 7
+        if match.group(1) and ahead == 0:
+            ahead = 7  # "next friday" on a Friday is a week away
+        return today + ahead
+    return None
+
+
+def resolve_slot_grid(query, now=None):
+    """The slot grid covering the time span a query talks about.
+
+    Understands, in this order of precedence: date ranges ("from 01/05/2025 to
+    07/05/2025", optionally with times), "this/next week|weekend|month", "next N
+    hours|days|weeks", and a single day (a date, today/tonight/tomorrow/yesterday/day
+    after tomorrow, or a weekday) narrowed by a time range ("from 18:00 to 22:00"), a
+    part of the day ("tomorrow evening") or a time. A day without a time covers the
+    whole day; a query naming no day and no span is the single slot at its time (or
+    now). Slots are 30 minutes unless the query says "hourly" or "every N minutes".
+    Raises ValueError for impossible dates and empty or oversized ranges.
+    """
+    now = now or datetime.now()
+    normalized = normalize_query(query)
+    step = _step_minutes(normalized)
+    today = np.datetime64(now.date(), 'D')
+    day = np.timedelta64(1, 'D')
+
+    match = DATE_RANGE_PATTERN.search(normalized)
+    if match:
+        start = parse_day(match.group("start_date")) + np.timedelta64(
+            time_to_seconds(match.group("start_time")) if match.group("start_time") else 0, 's')
+        end_day = parse_day(match.group("end_date"))
+        # An end date without a time includes that whole day
+        end = (end_day + np.timedelta64(time_to_seconds(match.group("end_time")), 's')
+               if match.group("end_time") else end_day + day)
+        return _grid(start, end, step)
+
+    match = PERIOD_PATTERN.search(normalized)
+    if match:
+        offset = 1 if match.group(1) == "next" else 0
+        if match.group(2) == "month":
+            month = today.astype('datetime64[M]') + offset
+            return _grid(month.astype('datetime64[D]'), (month + 1).astype('datetime64[D]'), step)
+        monday = today - _weekday(today) + 7 * offset
+        if match.group(2) == "weekend":
+            return _grid(monday + 5, monday + 7, step)
+        return _grid(monday, monday + 7, step)
+
+    now_seconds = now.hour * 3600 + now.minute * 60 + now.second
+    match = SPAN_PATTERN.search(normalized)
+    if match:
+        # Start at the slot now falls in
+        start = today + np.timedelta64(now_seconds - now_seconds % (step * 60), 's')
+        return _grid(start, start + int(match.group(1)) * SPAN_UNITS[match.group(2)], step)
+
+    base = _base_day(normalized, today)
+    match = TIME_RANGE_PATTERN.search(normalized)
+    if match:
+        start_seconds = time_to_seconds(match.group("start_time"))
+        end_seconds = time_to_seconds(match.group("end_time"))
+        if end_seconds <= start_seconds:
+            end_seconds += 24 * 3600  # "from 22:00 to 06:00" runs past midnight
+        first = base if base is not None else today
+        return _grid(first + np.timedelta64(start_seconds, 's'), first + np.timedelta64(end_seconds, 's'), step)
+
+    match = PART_OF_DAY_PATTERN.search(normalized)
+    if match:
+        first_hour, last_hour = PARTS_OF_DAY[match.group(1)]
+        first = base if base is not None else today
+        return _grid(first + np.timedelta64(first_hour, 'h'), first + np.timedelta64(last_hour, 'h'), step)
+
+    match = TIME_PATTERN.search(normalized)
+    if base is not None and match is None:
+        return _grid(base, base + day, step)
+    first = base if base is not None else today
+    seconds = time_to_seconds(match.group(1)) if match else now_seconds
+    start = first + np.timedelta64(seconds, 's')
+    return _grid(start, start + np.timedelta64(step, 'm'), step)
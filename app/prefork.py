@@ -0,0 +1,151 @@
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def load_app(target):
+    """Import "module:attribute" once in the master; the import loads the model."""
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app")
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def memory_usage(pid):
+    """Rss, Pss and private memory of a process in MB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return None
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields.get("Pss", 0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), 1),
+    }
+
+
+class PreforkServer:
+    """Load the app once, then fork workers that share its read-only model pages copy-on-write."""
+
+    def __init__(self, app, sock, workers, log_level="info"):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self):
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            self._run_child(forked)
+        self.children[pid] = time.time()
+        return pid
+
+    def _run_child(self, forked):
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            config = uvicorn.Config(self.app, log_level=self.log_level)
+            server = uvicorn.Server(config)
+            print(f"Worker {os.getpid()} ready in {(time.perf_counter() - forked) * 1000:.1f} ms")
+            server.run(sockets=[self.sock])
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def report_memory(self):
+        master = memory_usage(os.getpid())
+        print(f"Master {os.getpid()}: {master}")
+        for pid in self.children:
+            print(f"Worker {pid}: {memory_usage(pid)}")
+
+    def run(self, report_memory_after=None):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Move everything loaded so far out of the collector's reach, so the
+        # children's GC passes never write to (and un-share) the model's pages
+        gc.collect()
+        gc.freeze()
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        if report_memory_after:
+            time.sleep(report_memory_after)
+            self.report_memory()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.time() - started < 1:
+                # Avoid a tight crash loop when workers die during startup
+                time.sleep(1)
+            self.spawn()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an app with pre-forked workers sharing one loaded model.")
+    parser.add_argument("app", nargs="?", default="app.main:app", help="module:attribute of the FastAPI app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--report-memory", type=float, default=None, metavar="SECONDS",
+                        help="Print per-process Rss/Pss/private memory this long after startup")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    app = load_app(args.app)
+    print(f"Loaded {args.app} in {time.perf_counter() - started:.2f}s")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    print(f"Listening on http://{args.host}:{args.port} with {args.workers} workers")
+    PreforkServer(app, sock, args.workers, args.log_level).run(args.report_memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import csv
+import json
+import numpy as np
+
+from starlette.responses import StreamingResponse
+
+from app.features import (
+    date_range_labels, parse_dates, parse_times,
+    build_feature_frame, output_categories,
+)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves `receive` alone so the request body can still be read.
+
+    The stock response listens for disconnects on `receive` while streaming, which
+    would swallow upload chunks we have not read yet.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_line_chunks(byte_stream, chunk_size):
+    """Group an async byte stream into lists of at most chunk_size non-empty lines."""
+    pending = b""
+    lines = []
+    async for data in byte_stream:
+        pending += data
+        *complete, pending = pending.split(b"\n")
+        lines.extend(line for line in complete if line.strip())
+        while len(lines) >= chunk_size:
+            yield lines[:chunk_size]
+            lines = lines[chunk_size:]
+    if pending.strip():
+        lines.append(pending)
+    if lines:
+        yield lines
+
+
+class CsvChunkParser:
+    """Parse CSV lines into column lists; the first line seen is the header.
+
+    parse returns (columns, rows, errors): the columns of the well-formed rows, their
+    data-row offsets within the chunk, and (offset, message) for each malformed row.
+    """
+
+    def __init__(self):
+        self.columns = None
+
+    def parse(self, lines):
+        if self.columns is None:
+            header = next(csv.reader([lines[0].decode("utf-8", errors="replace").rstrip("\r")]))
+            lines = lines[1:]
+            # Raw files can repeat a header (e.g. `lighting`); keep the first occurrence
+            self.columns = {}
+            for i, name in enumerate(header):
+                self.columns.setdefault(name.strip(), i)
+        n_fields = max(self.columns.values()) + 1
+        parsed, rows, errors = [], [], []
+        for offset, line in enumerate(lines):
+            try:
+                row = next(csv.reader([line.decode("utf-8").rstrip("\r")]))
+            except (UnicodeDecodeError, csv.Error) as e:
+                errors.append((offset, str(e)))
+                continue
+            if len(row) < n_fields:
+                errors.append((offset, f"Expected {n_fields} fields, got {len(row)}"))
+                continue
+            parsed.append(row)
+            rows.append(offset)
+        return {name: [row[i] for row in parsed] for name, i in self.columns.items()}, rows, errors
+
+
+class NdjsonChunkParser:
+    """Parse one JSON object per line into column lists, returning (columns, rows, errors) like CsvChunkParser."""
+
+    def parse(self, lines):
+        records, rows, errors = [], [], []
+        for offset, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                errors.append((offset, str(e)))
+                continue
+            if not isinstance(record, dict):
+                errors.append((offset, "Expected a JSON object"))
+                continue
+            records.append(record)
+            rows.append(offset)
+        # Records may carry different keys (e.g. date or date_range), so take every key seen
+        keys = dict.fromkeys(key for record in records for key in record)
+        return {key: [record.get(key) for record in records] for key in keys}, rows, errors
+
+
+def encode_columns(columns):
+    """Turn parsed columns into (date_range labels, seconds of day, consumed_power) arrays.
+
+    Rows without a date_range take their label from the date column.
+    """
+    for required in ("time", "consumed_power"):
+        if required not in columns:
+            raise ValueError(f"Missing column: {required}")
+    n_rows = len(columns["time"])
+    labels = columns.get("date_range")
+    labels = np.array([label or "" for label in labels] if labels is not None else [""] * n_rows, dtype=object)
+    missing = labels == ""
+    if missing.any():
+        if "date" not in columns:
+            raise ValueError("Missing column: date or date_range")
+        dates = [columns["date"][i] for i in np.flatnonzero(missing)]
+        labels[missing] = date_range_labels(parse_dates(dates))
+    return (labels.astype(str), parse_times(columns["time"]),
+            np.asarray(columns["consumed_power"], dtype=float))
+
+
+def score_columns(columns, model, encoder, time_encoder):
+    """Encode parsed columns and score them with a single model.predict call."""
+    labels, seconds, consumed_power = encode_columns(columns)
+    X = build_feature_frame(labels, seconds, consumed_power, encoder, time_encoder)
+    return model.predict(X)
+
+
+def score_chunk(columns, rows, model, encoder, time_encoder):
+    """Score a parsed chunk, setting aside the rows whose values cannot be encoded.
+
+    Returns (predictions, columns, rows, errors) for the rows that were scored. A missing
+    column still fails the whole chunk with ValueError.
+    """
+    try:
+        encoded = encode_columns(columns)
+    except (ValueError, TypeError):
+        # Slow path: encode row by row to find the offending rows, then score the rest in one call
+        good, parts, errors = [], [], []
+        for i, row in enumerate(rows):
+            try:
+                parts.append(encode_columns({name: values[i:i + 1] for name, values in columns.items()}))
+            except (ValueError, TypeError) as e:
+                if str(e).startswith("Missing column"):
+                    raise
+                errors.append((row, str(e)))
+                continue
+            good.append(i)
+        columns = {name: [values[i] for i in good] for name, values in columns.items()}
+        rows = [rows[i] for i in good]
+        if not rows:
+            return np.empty((0, len(output_categories))), columns, rows, errors
+        encoded = [np.concatenate(arrays) for arrays in zip(*parts)]
+    else:
+        errors = []
+    predictions = model.predict(build_feature_frame(*encoded, encoder, time_encoder))
+    return predictions, columns, rows, errors
+
+
+def predictions_to_ndjson(predictions, rows, errors=()):
+    """Serialize one JSON line per input row, in row order: predictions, or an error for a bad row."""
+    records = []
+    for row, values in zip(rows, predictions.tolist()):
+        record = {"row": row}
+        record.update(zip(output_categories, values))
+        records.append(record)
+    records.extend({"row": row, "error": message} for row, message in errors)
+    records.sort(key=lambda record: record["row"])
+    return ("\n".join(json.dumps(record) for record in records) + "\n").encode("utf-8")
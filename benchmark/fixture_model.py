@@ -0,0 +1,62 @@
+import os
+import sys
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from trainer.time_feature_encoder import TimeFeatureEncoder
+from app.features import final_feature_order, output_categories, MONTH_ABBR
+
+
+def build_fixture_model(model_dir, n_rows=5000, n_estimators=20, max_depth=10, seed=0):
+    """Train a small random forest on synthetic readings and save the artifacts the apps load."""
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"{month}_{part}" for month in MONTH_ABBR for part in (1, 2, 3)])
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    encoder.fit(labels.reshape(-1, 1))
+    time_encoder = TimeFeatureEncoder()
+
+    date_range = rng.choice(labels, n_rows)
+    time_seconds = rng.integers(0, 48, n_rows) * 1800
+    consumed_power = rng.gamma(2.0, 1.0, n_rows)
+
+    X = pd.DataFrame(encoder.transform(date_range.reshape(-1, 1)),
+                     columns=encoder.get_feature_names_out(["date_range"]))
+    X["consumed_power"] = consumed_power
+    for col, values in time_encoder.add_cyclical_features(time_seconds).items():
+        X[col] = values
+    X = X[final_feature_order]
+
+    # Category shares that move with the time of day, so the trees have structure to learn
+    hour = time_seconds / 3600
+    shares = np.stack([
+        0.20 + 0.05 * np.sin(hour / 24 * 2 * np.pi),
+        0.10 + 0.05 * (hour > 18),
+        0.35 + 0.10 * np.cos(hour / 24 * 2 * np.pi),
+        0.10 * ((hour > 18) | (hour < 6)),
+        0.10 * (hour < 5),
+        0.15 * np.ones(n_rows),
+    ], axis=1)
+    y = pd.DataFrame(shares * consumed_power[:, None], columns=output_categories)
+
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=seed)
+    model.fit(X, y)
+
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, "random_forest_model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(model_dir, "encoder.pkl"), "wb") as f:
+        pickle.dump(encoder, f)
+    with open(os.path.join(model_dir, "time_encoder.pkl"), "wb") as f:
+        pickle.dump(time_encoder, f)
+    return model_dir
+
+
+if __name__ == "__main__":
+    path = build_fixture_model(sys.argv[1] if len(sys.argv) > 1 else "model")
+    print(f"Fixture model saved to {path}/")
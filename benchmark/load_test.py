@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from benchmark.fixture_model import build_fixture_model
+
+# Payload kinds each app serves
+APP_KINDS = {
+    "main": ["single", "forecast", "stream"],
+    "main2": ["nlp", "nlp_batch", "nlp_forecast"],
+}
+
+DEFAULT_MIX = {"single": 0.7, "forecast": 0.1, "stream": 0.1, "nlp": 1.0, "nlp_batch": 0.0, "nlp_forecast": 0.0}
+
+NLP_TEMPLATES = [
+    "What will my usage look like on {date} at {time} with {power} kW?",
+    "predict {date} {time} {power} units",
+    "How much will the AC use at {time} on {date} if I draw {power} kilowatt",
+    "breakdown for {date} at {time}",
+    "{power} kW at {time}",
+]
+
+NLP_RANGE_TEMPLATES = [
+    "How much will I use tomorrow evening at {power} kW?",
+    "forecast next week with {power} kW hourly",
+    "usage from {date} to {end_date} at {power} units",
+    "what about this weekend, {power} kilowatt",
+    "next 6 hours {power} kW",
+]
+
+
+class PayloadFactory:
+    """Seeded generator of realistic request payloads for each kind."""
+
+    def __init__(self, seed=0, stream_rows=200, nlp_batch_size=32):
+        self.rng = random.Random(seed)
+        self.stream_rows = stream_rows
+        self.nlp_batch_size = nlp_batch_size
+
+    def _moment(self):
+        day = datetime(2024, 1, 1) + timedelta(days=self.rng.randrange(730))
+        return day, f"{self.rng.randrange(24):02d}:{self.rng.choice([0, 30]):02d}:00"
+
+    def _power(self):
+        return round(self.rng.gammavariate(2.0, 1.0), 3)
+
+    def single(self):
+        day, time_str = self._moment()
+        return "POST", "/predict", {"json": {
+            "date": day.strftime("%d:%m:%Y"), "time": time_str, "consumed_power": self._power()}}
+
+    def forecast(self):
+        day, _ = self._moment()
+        return "POST", "/forecast", {"json": {
+            "start_date": day.strftime("%d:%m:%Y"), "horizon_hours": 24, "consumed_power": self._power()}}
+
+    def stream(self):
+        lines = ["date,time,consumed_power"]
+        for _ in range(self.stream_rows):
+            day, time_str = self._moment()
+            lines.append(f"{day.strftime('%Y-%m-%d')},{time_str},{self._power()}")
+        return "POST", "/predict/stream", {
+            "content": "\n".join(lines) + "\n", "headers": {"content-type": "text/csv"}}
+
+    def nlp(self):
+        day, time_str = self._moment()
+        query = self.rng.choice(NLP_TEMPLATES).format(
+            date=day.strftime("%d/%m/%Y"), time=time_str[:5], power=self._power())
+        return "POST", "/nlp_predict", {"json": {"query": query}}
+
+    def nlp_forecast(self):
+        day, _ = self._moment()
+        query = self.rng.choice(NLP_RANGE_TEMPLATES).format(
+            date=day.strftime("%d/%m/%Y"), end_date=(day + timedelta(days=self.rng.randrange(1, 7))).strftime("%d/%m/%Y"),
+            power=self._power())
+        return "POST", "/nlp_forecast", {"json": {"query": query}}
+
+    def nlp_batch(self):
+        # Chat front-ends send bursts where most queries repeat a few phrasings
+        distinct = [self.nlp()[2]["json"]["query"] for _ in range(4)]
+        queries = [self.rng.choice(distinct) for _ in range(self.nlp_batch_size)]
+        return "POST", "/nlp_predict/batch", {"json": {"queries": queries}}
+
+    def make(self, kind):
+        return getattr(self, kind)()
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3),
+            "mean_ms": round(values.mean(), 3), "max_ms": round(values.max(), 3)}
+
+
+async def drive(client, kinds, weights, concurrency, n_requests, duration, factory):
+    """Closed-loop load: `concurrency` workers send requests until the budget is spent."""
+    latencies = {kind: [] for kind in kinds}
+    errors = {kind: 0 for kind in kinds}
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal sent
+        while True:
+            if n_requests and sent >= n_requests:
+                return
+            if deadline and time.perf_counter() >= deadline:
+                return
+            sent += 1
+            kind = factory.rng.choices(kinds, weights)[0]
+            method, path, kwargs = factory.make(kind)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[kind].append(time.perf_counter() - start)
+            if not ok:
+                errors[kind] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    result = {
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+        **percentiles(all_latencies),
+        "by_kind": {},
+    }
+    for kind in kinds:
+        if latencies[kind]:
+            result["by_kind"][kind] = {"requests": len(latencies[kind]), "errors": errors[kind],
+                                       **percentiles(latencies[kind])}
+    return result
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(app_name, workdir, workers=1):
+    """Run the app on a local uvicorn and wait until it accepts connections."""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"app.{app_name}:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60s")
+
+
+def load_in_process(app_name, workdir):
+    """Import the app with `workdir` as cwd, since the apps load model/ relative to it."""
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        module = importlib.import_module(f"app.{app_name}")
+    finally:
+        os.chdir(previous)
+    return module.app
+
+
+async def run_app(app_name, args, workdir):
+    kinds = [kind for kind in APP_KINDS[app_name] if args.mix.get(kind, 0) > 0]
+    weights = [args.mix[kind] for kind in kinds]
+    process = None
+    if args.mode == "uvicorn":
+        process, base_url = start_uvicorn(app_name, workdir, args.workers)
+        transport = None
+    else:
+        base_url = "http://benchmark"
+        transport = httpx.ASGITransport(app=load_in_process(app_name, workdir))
+
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+            factory = PayloadFactory(seed=args.seed)
+            await drive(client, kinds, weights, 1, args.warmup, None, factory)
+            for concurrency in args.concurrency:
+                factory = PayloadFactory(seed=args.seed)
+                result = await drive(client, kinds, weights, concurrency, args.requests, args.duration, factory)
+                results[str(concurrency)] = result
+                print(f"  {app_name} c={concurrency}: {result['throughput_rps']} req/s, "
+                      f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+                      f"errors {result['errors']}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Return regressions where p95 rose or throughput fell by more than `threshold`."""
+    regressions = []
+    for app_name, by_concurrency in current["results"].items():
+        for concurrency, result in by_concurrency.items():
+            base = baseline.get("results", {}).get(app_name, {}).get(concurrency)
+            if not base:
+                continue
+            if base.get("p95_ms") and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(f"{app_name} c={concurrency}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+            if base.get("throughput_rps") and result["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{app_name} c={concurrency}: throughput "
+                                   f"{base['throughput_rps']} -> {result['throughput_rps']} req/s")
+    return regressions
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, weight = part.split("=")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the FastAPI apps against a fixture model.")
+    parser.add_argument("--app", choices=["main", "main2", "both"], default="both")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per level instead of --requests")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Payload weights, e.g. single=0.7,forecast=0.1,stream=0.1,nlp=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-dir", default=None, help="Existing model/ directory instead of the fixture")
+    parser.add_argument("--output", default="benchmark/results/latest.json")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+    if args.duration:
+        args.requests = None
+
+    apps = ["main", "main2"] if args.app == "both" else [args.app]
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.model_dir:
+            os.symlink(os.path.abspath(args.model_dir), os.path.join(workdir, "model"))
+        else:
+            print("Building fixture model...")
+            build_fixture_model(os.path.join(workdir, "model"))
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "mode": args.mode,
+                "workers": args.workers,
+                "mix": args.mix,
+                "requests": args.requests,
+                "duration": args.duration,
+            },
+            "results": {},
+        }
+        for app_name in apps:
+            print(f"Benchmarking app/{app_name}.py ({args.mode})")
+            report["results"][app_name] = asyncio.run(run_app(app_name, args, workdir))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions against {args.baseline} (commit {baseline['meta'].get('commit')}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
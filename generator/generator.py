@@ -1,11 +1,22 @@
+import argparse
 import json
 import csv
 import random
 import os
+import sys
 import glob
 import calendar
 from datetime import datetime, timedelta
 
+import numpy as np
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from storage.readings_store import ReadingsStore, timestamps_from
+from storage.rollups import RollupEngine
+from storage.schema import METER_COLUMNS, device_column
+from storage.validation import summary_lines, validate_file
+
 # Device wattages
 DEVICE_WATTAGE = {
     'fridge': 150, 'washing_machine': 500, 'microwave': 1100, 'dishwasher': 1200,
@@ -209,19 +220,35 @@ def simulate_house(house):
         print(f"Error in simulate_house: {str(e)}")
         return []
 
-def main(config_dir, output_csv):
+def readings_chunk(rows):
+    """One house's generated rows as a store chunk in the canonical schema."""
+    chunk = {
+        "house_id": np.array([row["house_id"] for row in rows]).astype(str),
+        "timestamp": timestamps_from([row["date"] for row in rows], [row["time"] for row in rows]),
+    }
+    for col in ORDERED_CATEGORIES + METER_COLUMNS:
+        chunk[col] = np.array([row[col] for row in rows], dtype=np.float64)
+    # The `lighting` device and category share a row key; the category only holds that device
+    for dev in ORDERED_DEVICES:
+        chunk[device_column(dev)] = np.array([row[dev] for row in rows], dtype=np.float64)
+    return chunk
+
+def main(config_dir, output_csv, store_root=None, validate=False):
     try:
         house_files = glob.glob(os.path.join(config_dir, "house*.json"))
         if not house_files:
             print(f"No house*.json files found in '{config_dir}'")
             return
         all_rows = []
+        house_rows = []
         for file in house_files:
             print(f"Processing: {file}")
             config = load_house_config(file)
             config["config_path"] = file
             rows = simulate_house(config)
             all_rows.extend(rows)
+            if rows:
+                house_rows.append(rows)
 
         if not all_rows:
             print("No data generated. Check configurations.")
@@ -239,10 +266,25 @@ def main(config_dir, output_csv):
             writer.writeheader()
             writer.writerows(all_rows)
         print(f"\nOutput saved to: {output_csv}")
+
+        if validate:
+            for line in summary_lines(validate_file(output_csv)):
+                print(line)
+
+        if store_root:
+            store = ReadingsStore(store_root)
+            loaded = store.bulk_load(readings_chunk(rows) for rows in house_rows)
+            print(f"Loaded {loaded} rows into the readings store at {store_root}")
+            RollupEngine(store).refresh()
     except Exception as e:
         print(f"Error in main: {str(e)}")
 
 if __name__ == "__main__":
-    config_folder = "configuration"
-    output_file = "data/raw_data_20250508_20_25.csv"
-    main(config_folder, output_file)
+    parser = argparse.ArgumentParser(description="Simulate readings for every house*.json configuration.")
+    parser.add_argument("--config", default="configuration")
+    parser.add_argument("--output", default="data/raw_data_20250508_20_25.csv")
+    parser.add_argument("--store", default=None, help="Also bulk-load the readings into this store (e.g. data/store)")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check meter continuity, category sums and gaps of the written CSV")
+    args = parser.parse_args()
+    main(args.config, args.output, args.store, args.validate)
@@ -11,8 +11,12 @@ def prepare_training_data(file_path, columns_to_use, output_path):
     try:
         # Load data
         print("Loading data...")
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, dtype={'house_id': str})
         
+        # Keep house_id so the per-house series (LSTM windows, time-series CV) can be rebuilt later
+        if 'house_id' in df.columns and 'house_id' not in columns_to_use:
+            columns_to_use = ['house_id'] + list(columns_to_use)
+
         # Check for missing columns
         missing = [col for col in columns_to_use if col not in df.columns]
         if missing:
@@ -0,0 +1,207 @@
+import argparse
+import csv
+import glob
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.features import detect_date_format
+from storage.readings_store import ReadingsStore, STORE_ROOT, timestamps_from
+from storage.rollups import RollupEngine
+from storage.schema import (CANONICAL_SCHEMA_VERSION, CATEGORY_COLUMNS, DEVICE_NAMES, METER_COLUMNS,
+                            VALUE_COLUMNS, device_column)
+
+SAMPLE_ROWS = 200
+
+# Raw columns that are read as text rather than numbers
+SOURCE_KEY_COLUMNS = ["house_id", "date", "time"]
+
+
+def _canonical_name(name, mapped):
+    """Canonical column for a raw header name, given the canonical columns mapped so far."""
+    if name in SOURCE_KEY_COLUMNS or name in CATEGORY_COLUMNS or name in METER_COLUMNS:
+        if name not in mapped:
+            return name
+    # A repeated category name is the device of the same name (the raw files list
+    # `lighting` once among the categories and again among the devices)
+    if name in DEVICE_NAMES and device_column(name) not in mapped:
+        return device_column(name)
+    return None
+
+
+def detect_schema(path, sample_rows=SAMPLE_ROWS):
+    """Map a raw CSV's header onto the canonical schema and detect its date format.
+
+    Returns a JSON-serializable description: the raw position of every canonical
+    column, the date format, columns derived on load, canonical columns the file
+    does not have (stored as NaN) and raw columns that are dropped.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        sample = list(itertools.islice(reader, sample_rows))
+    if not sample:
+        raise ValueError(f"{path} has a header but no rows")
+
+    columns, dropped = {}, []
+    for position, name in enumerate(header):
+        canonical = _canonical_name(name, columns)
+        if canonical is None:
+            dropped.append(name)
+        else:
+            columns[canonical] = position
+    missing_keys = [col for col in SOURCE_KEY_COLUMNS if col not in columns]
+    if missing_keys:
+        raise ValueError(f"{path} has no {missing_keys} column(s)")
+
+    derived = []
+    # Older generator versions did not write consumed_power; it is the sum of the categories
+    if "consumed_power" not in columns and any(col in columns for col in CATEGORY_COLUMNS):
+        derived.append("consumed_power")
+
+    return {
+        "schema_version": CANONICAL_SCHEMA_VERSION,
+        "header": header,
+        "columns": columns,
+        "date_format": detect_date_format(sample[0][columns["date"]]),
+        "derived": derived,
+        "missing": [col for col in VALUE_COLUMNS if col not in columns and col not in derived],
+        "dropped": dropped,
+    }
+
+
+def iter_normalized_chunks(path, schema, chunk_size=500000):
+    """Chunks of a raw CSV in the canonical schema, ready for ReadingsStore.bulk_load.
+
+    Columns are read by position, so repeated header names never get mangled, with
+    explicit dtypes, and dates are parsed with the detected format in one vectorized call.
+    """
+    columns = schema["columns"]
+    value_columns = [col for col in columns if col not in SOURCE_KEY_COLUMNS]
+    dtype = {columns[col]: str for col in SOURCE_KEY_COLUMNS}
+    dtype.update({columns[col]: np.float64 for col in value_columns})
+    reader = pd.read_csv(path, header=None, skiprows=1, usecols=list(columns.values()), dtype=dtype,
+                         chunksize=chunk_size, keep_default_na=False, na_values=[""])
+    for chunk in reader:
+        normalized = {
+            "house_id": chunk[columns["house_id"]].to_numpy(),
+            "timestamp": timestamps_from(chunk[columns["date"]], chunk[columns["time"]], schema["date_format"]),
+        }
+        for col in value_columns:
+            normalized[col] = chunk[columns[col]].to_numpy()
+        if "consumed_power" in schema["derived"]:
+            categories = [normalized[col] for col in CATEGORY_COLUMNS if col in normalized]
+            normalized["consumed_power"] = np.round(np.sum(categories, axis=0), 4)
+        yield normalized
+
+
+def source_stamp(path):
+    """Identity of a file version, to skip files that are already loaded."""
+    stat = os.stat(path)
+    return {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _parse_file(task):
+    path, chunk_size = task
+    started = time.perf_counter()
+    schema = detect_schema(path)
+    chunks = list(iter_normalized_chunks(path, schema, chunk_size))
+    return path, schema, chunks, time.perf_counter() - started
+
+
+def _load_parsed(store, path, schema, chunks, parse_seconds):
+    started = time.perf_counter()
+    rows = store.bulk_load(chunks, source={
+        "path": os.path.abspath(path), **source_stamp(path), "schema": schema,
+        "rows": int(sum(len(chunk["timestamp"]) for chunk in chunks))})
+    load_seconds = time.perf_counter() - started
+    print(f"  {os.path.basename(path)}: {rows:,} rows, dates {schema['date_format']}, "
+          f"derived {schema['derived'] or '-'}, dropped {schema['dropped'] or '-'} "
+          f"(parse {parse_seconds:.2f}s, load {load_seconds:.2f}s)")
+    return rows
+
+
+def convert_files(paths, store_root=STORE_ROOT, workers=1, chunk_size=500000, force=False):
+    """Load raw CSVs into the store in the given order; returns the rows loaded.
+
+    Files already loaded with the same size and modification time are skipped unless
+    force is set. With workers > 1 files are parsed in a process pool while the parent
+    writes them to the store in order, so a later file still replaces overlapping
+    readings of an earlier one.
+    """
+    store = ReadingsStore(store_root)
+    sources = store.manifest().get("sources", {})
+    todo = []
+    for path in paths:
+        loaded = sources.get(os.path.abspath(path))
+        if not force and loaded is not None and all(loaded.get(key) == value
+                                                      for key, value in source_stamp(path).items()):
+            print(f"  {os.path.basename(path)}: unchanged, skipped")
+            continue
+        todo.append(path)
+
+    total = 0
+    if workers <= 1:
+        for path in todo:
+            total += _load_parsed(store, *_parse_file((path, chunk_size)))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded, ordered window of files in flight
+        pending = deque()
+        remaining = iter(todo)
+        for path in itertools.islice(remaining, workers * 2):
+            pending.append(executor.submit(_parse_file, (path, chunk_size)))
+        while pending:
+            result = pending.popleft().result()
+            path = next(remaining, None)
+            if path is not None:
+                pending.append(executor.submit(_parse_file, (path, chunk_size)))
+            total += _load_parsed(store, *result)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect the schema of raw reading CSVs and load them into the store.")
+    parser.add_argument("paths", nargs="+", help="CSV files or directories of CSVs")
+    parser.add_argument("--store", default=STORE_ROOT)
+    parser.add_argument("--workers", type=int, default=1, help="Parse files in this many processes")
+    parser.add_argument("--chunk-size", type=int, default=500000)
+    parser.add_argument("--force", action="store_true", help="Reload files that are already in the store")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the detected schemas")
+    parser.add_argument("--no-rollups", action="store_true", help="Do not refresh the rollups after loading")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths.extend(sorted(glob.glob(os.path.join(path, "*.csv"))) if os.path.isdir(path) else [path])
+
+    if args.dry_run:
+        for path in paths:
+            schema = detect_schema(path)
+            print(f"{path}: dates {schema['date_format']}, {len(schema['columns'])} columns, "
+                  f"derived {schema['derived']}, missing {schema['missing']}, dropped {schema['dropped']}")
+        return
+
+    started = time.perf_counter()
+    rows = convert_files(paths, args.store, args.workers, args.chunk_size, args.force)
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {rows:,} rows from {len(paths)} file(s) in {elapsed:.2f}s into {args.store}")
+    if rows and not args.no_rollups:
+        started = time.perf_counter()
+        stale = RollupEngine(args.store).refresh()
+        print(f"Refreshed rollups of {sum(len(months) for months in stale.values())} partition(s) "
+              f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.schema import CANONICAL_SCHEMA_VERSION, KEY_COLUMNS
+
+STORE_ROOT = "data/store"
+STORE_FORMAT_VERSION = 1
+TIMESTAMP = "timestamp"
+
+
+def timestamps_from(dates, times, date_format="%Y-%m-%d"):
+    """datetime64[s] timestamps from date and HH:MM:SS strings, parsed with one known format.
+
+    Readings repeat a few hundred dates and 48 times of day, so only the distinct
+    strings are parsed and the results are gathered back by code.
+    """
+    date_codes, unique_dates = pd.factorize(pd.Series(dates, dtype=str), use_na_sentinel=False)
+    time_codes, unique_times = pd.factorize(pd.Series(times, dtype=str), use_na_sentinel=False)
+    days = pd.to_datetime(pd.Series(unique_dates), format=date_format).to_numpy(dtype='datetime64[s]')
+    seconds = pd.to_timedelta(pd.Series(unique_times)).to_numpy(dtype='timedelta64[s]')
+    return days[date_codes] + seconds[time_codes]
+
+
+def _as_columns(chunk):
+    """Dict of arrays with house_id as str, timestamp as datetime64[s] and float64 values."""
+    if isinstance(chunk, pd.DataFrame):
+        chunk = {col: chunk[col].to_numpy() for col in chunk.columns}
+    missing = [col for col in KEY_COLUMNS if col not in chunk]
+    if missing:
+        raise ValueError(f"Chunk is missing key columns: {missing}")
+    columns = {"house_id": np.asarray(chunk["house_id"]).astype(str),
+               TIMESTAMP: np.asarray(chunk[TIMESTAMP], dtype='datetime64[s]')}
+    for col, values in chunk.items():
+        if col not in columns:
+            columns[col] = np.asarray(values, dtype=np.float64)
+    return columns
+
+
+def _to_datetime64(value):
+    if value is None:
+        return None
+    try:
+        return np.datetime64(value, 's')
+    except ValueError:
+        raise ValueError(f"Invalid timestamp {value!r}; use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+
+
+class ReadingsStore:
+    """Meter readings partitioned by house and month into memory-mapped column files.
+
+    Layout: <root>/<house_id>/<YYYY-MM>/<column>.npy, one file per column, rows
+    sorted by timestamp, so a time-range lookup is a binary search on timestamp.npy
+    and a slice of the requested columns. manifest.json lists every partition with
+    its row count and time bounds and is replaced atomically after each load.
+    """
+
+    def __init__(self, root=STORE_ROOT, cache_size=512):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.cache_size = cache_size
+        self._manifest = None
+        self._manifest_mtime = None
+        # Open memory maps by (house, month, column), least recently used evicted first
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Reading -------------------------------------------------------------
+
+    def manifest(self):
+        """The current manifest, re-read when another process has loaded new data."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._manifest is None or mtime != self._manifest_mtime:
+            if mtime is None:
+                manifest = {"format_version": STORE_FORMAT_VERSION, "schema_version": CANONICAL_SCHEMA_VERSION,
+                            "columns": [], "partitions": {}, "sources": {}}
+            else:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            with self._lock:
+                self._manifest, self._manifest_mtime = manifest, mtime
+                self._arrays.clear()
+        return self._manifest
+
+    def houses(self):
+        return sorted(self.manifest()["partitions"], key=lambda house: (len(house), house))
+
+    def columns(self):
+        return list(self.manifest()["columns"])
+
+    def partitions(self, house_id):
+        """{month: {"rows", "start", "end"}} for one house."""
+        return self.manifest()["partitions"].get(str(house_id), {})
+
+    def _array(self, house, month, column):
+        key = (house, month, column)
+        with self._lock:
+            if key in self._arrays:
+                self._arrays.move_to_end(key)
+                return self._arrays[key]
+        path = os.path.join(self.root, house, month, f"{column}.npy")
+        array = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        with self._lock:
+            self._arrays[key] = array
+            if len(self._arrays) > self.cache_size:
+                self._arrays.popitem(last=False)
+        return array
+
+    def query(self, house_id, start=None, end=None, columns=None):
+        """One house's readings with start <= timestamp < end, as a dict of arrays.
+
+        start and end are anything np.datetime64 accepts ("2025-03", "2025-03-01T12:00");
+        None leaves that side open. columns defaults to every stored column; a column a
+        partition lacks (older generator output) reads as NaN.
+        """
+        house = str(house_id)
+        manifest = self.manifest()
+        columns = manifest["columns"] if columns is None else list(columns)
+        unknown = [col for col in columns if col not in manifest["columns"]]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}")
+        start, end = _to_datetime64(start), _to_datetime64(end)
+
+        pieces = {col: [] for col in [TIMESTAMP] + columns}
+        for month, meta in sorted(manifest["partitions"].get(house, {}).items()):
+            if (end is not None and np.datetime64(meta["start"]) >= end) or \
+                    (start is not None and np.datetime64(meta["end"]) < start):
+                continue
+            timestamps = self._array(house, month, TIMESTAMP)
+            first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+            last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+            if last <= first:
+                continue
+            pieces[TIMESTAMP].append(timestamps[first:last])
+            for col in columns:
+                values = self._array(house, month, col)
+                pieces[col].append(values[first:last] if values is not None else np.full(last - first, np.nan))
+
+        result = {}
+        for col, parts in pieces.items():
+            if not parts:
+                result[col] = np.empty(0, dtype='datetime64[s]' if col == TIMESTAMP else np.float64)
+            else:
+                result[col] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return result
+
+    def query_frame(self, house_id, start=None, end=None, columns=None):
+        result = self.query(house_id, start, end, columns)
+        return pd.DataFrame(result).set_index(TIMESTAMP)
+
+    # --- Writing -------------------------------------------------------------
+
+    def bulk_load(self, chunks, flush_rows=2_000_000, source=None):
+        """Load an iterable of chunks (DataFrames or dicts of arrays) and return the row count.
+
+        Each chunk needs house_id and timestamp columns; every other column is stored as
+        float64. Rows are buffered per (house, month) partition and merged with what is
+        already stored; a timestamp loaded again replaces the earlier reading. source, a
+        dict with at least a "path", is recorded in the manifest's sources.
+        """
+        manifest = self.manifest()
+        pending = defaultdict(list)
+        buffered = loaded = 0
+        for chunk in chunks:
+            columns = _as_columns(chunk)
+            n_rows = len(columns[TIMESTAMP])
+            if n_rows == 0:
+                continue
+            houses, house_codes = np.unique(columns["house_id"], return_inverse=True)
+            months = columns[TIMESTAMP].astype('datetime64[M]')
+            key = house_codes.astype(np.int64) * 100000 + months.astype(np.int64)
+            if np.any(key[1:] < key[:-1]):
+                # One gather per column, after which every partition is a contiguous slice
+                order = np.argsort(key, kind="stable")
+                key, months = key[order], months[order]
+                columns = {col: values[order] for col, values in columns.items()}
+            house_codes = key // 100000
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(key)) + 1])
+            for first, last in zip(starts, np.append(starts[1:], n_rows)):
+                partition = (str(houses[house_codes[first]]), str(months[first]))
+                pending[partition].append({col: values[first:last] for col, values in columns.items()
+                                           if col != "house_id"})
+            buffered += n_rows
+            loaded += n_rows
+            if buffered >= flush_rows:
+                self._flush(pending, manifest)
+                pending.clear()
+                buffered = 0
+        self._flush(pending, manifest)
+        if source is not None:
+            manifest.setdefault("sources", {})[source["path"]] = source
+            self._write_manifest(manifest)
+        return loaded
+
+    def _flush(self, pending, manifest):
+        if not pending:
+            return
+        # Every flush gets a new generation, so derived data (rollups) can tell which
+        # partitions changed since it was built
+        manifest["generation"] = manifest.get("generation", 0) + 1
+        for (house, month), parts in pending.items():
+            meta = self._write_partition(house, month, parts)
+            meta["generation"] = manifest["generation"]
+            manifest["partitions"].setdefault(house, {})[month] = meta
+            for col in [col for part in parts for col in part]:
+                if col != TIMESTAMP and col not in manifest["columns"]:
+                    manifest["columns"].append(col)
+        self._write_manifest(manifest)
+
+    def _write_partition(self, house, month, parts):
+        directory = os.path.join(self.root, house, month)
+        if os.path.isdir(directory):
+            existing = {name[:-len(".npy")]: np.load(os.path.join(directory, name))
+                        for name in os.listdir(directory) if name.endswith(".npy")}
+            parts = [existing] + parts
+
+        names = [TIMESTAMP] + sorted({col for part in parts for col in part if col != TIMESTAMP})
+        merged = {}
+        for col in names:
+            merged[col] = np.concatenate([part[col] if col in part else np.full(len(part[TIMESTAMP]), np.nan)
+                                          for part in parts])
+        timestamps = merged[TIMESTAMP]
+        if len(parts) > 1 or np.any(timestamps[1:] <= timestamps[:-1]):
+            # Stable sort keeps load order among equal timestamps, so keeping the last wins
+            order = np.argsort(timestamps, kind="stable")
+            sorted_timestamps = timestamps[order]
+            keep = np.append(sorted_timestamps[1:] != sorted_timestamps[:-1], True)
+            order = order[keep]
+            merged = {col: values[order] for col, values in merged.items()}
+
+        os.makedirs(os.path.join(self.root, house), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".staging-{month}-", dir=os.path.join(self.root, house))
+        for col, values in merged.items():
+            np.save(os.path.join(staging, f"{col}.npy"), values)
+        # Swap the partition in; readers holding the old memory maps keep their files
+        retired = None
+        if os.path.isdir(directory):
+            retired = tempfile.mkdtemp(prefix=f".retired-{month}-", dir=os.path.join(self.root, house))
+            os.rename(directory, os.path.join(retired, month))
+        os.rename(staging, directory)
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
+        with self._lock:
+            for key in [key for key in self._arrays if key[:2] == (house, month)]:
+                del self._arrays[key]
+
+        timestamps = merged[TIMESTAMP]
+        return {"rows": int(len(timestamps)), "start": str(timestamps[0]), "end": str(timestamps[-1])}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=self.root, suffix=".json", delete=False) as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(f.name, self.manifest_path)
+        self._manifest = manifest
+        self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print one house's stored readings in a time range "
+                                                 "(load raw CSVs with storage/raw_loader.py).")
+    parser.add_argument("house_id")
+    parser.add_argument("--root", default=STORE_ROOT)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--columns", default=None, help="Comma-separated columns (default: all)")
+    args = parser.parse_args()
+
+    store = ReadingsStore(args.root)
+    columns = args.columns.split(",") if args.columns else None
+    print(store.query_frame(args.house_id, args.start, args.end, columns).to_string())
+
+
+if __name__ == "__main__":
+    main()
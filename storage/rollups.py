@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.readings_store import ReadingsStore, STORE_ROOT, TIMESTAMP
+from storage.schema import CATEGORY_COLUMNS
+
+LEVELS = ["daily", "weekly", "monthly"]
+
+# Time-of-use buckets as [start hour, end hour) ranges
+TIME_OF_USE = {
+    "tou_off_peak": [(0, 7), (22, 24)],
+    "tou_standard": [(7, 17)],
+    "tou_peak": [(17, 22)],
+}
+STATISTICS = ["sum", "peak"] + list(TIME_OF_USE)
+ROLLUP_COLUMNS = CATEGORY_COLUMNS + ["consumed_power"]
+
+_HOUR_BUCKET = np.zeros(24, dtype=np.int64)
+for _bucket, (_name, _ranges) in enumerate(TIME_OF_USE.items()):
+    for _first, _last in _ranges:
+        _HOUR_BUCKET[_first:_last] = _bucket
+
+
+def metric_names(columns):
+    """Flat metric names, "rows" first, then "<column>.<statistic>" per column."""
+    return ["rows"] + [f"{col}.{stat}" for col in columns for stat in STATISTICS]
+
+
+def _aggregate(period_codes, n_periods, timestamps, values_by_column):
+    """One row of metrics per period code from raw readings sorted by timestamp."""
+    hours = ((timestamps - timestamps.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(np.int64)
+    bucket_codes = period_codes * len(TIME_OF_USE) + _HOUR_BUCKET[hours]
+    # Periods are contiguous in sorted readings, so peaks are one reduceat per column
+    starts = np.flatnonzero(np.diff(period_codes, prepend=-1))
+    present = period_codes[starts]
+
+    table = np.full((n_periods, 1 + len(values_by_column) * len(STATISTICS)), np.nan)
+    table[:, 0] = np.bincount(period_codes, minlength=n_periods)
+    for index, values in enumerate(values_by_column):
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        counts = np.bincount(period_codes, valid, minlength=n_periods)
+        sums = np.bincount(period_codes, filled, minlength=n_periods)
+        tou = np.bincount(bucket_codes, filled, minlength=n_periods * len(TIME_OF_USE)).reshape(n_periods, -1)
+        peaks = np.full(n_periods, -np.inf)
+        peaks[present] = np.maximum.reduceat(np.where(valid, values, -np.inf), starts)
+
+        first = 1 + index * len(STATISTICS)
+        block = np.column_stack([sums, peaks, tou])
+        block[counts == 0] = np.nan  # a column the readings lack stays NaN, not zero
+        table[:, first:first + len(STATISTICS)] = block
+    return table
+
+
+def _combine(table, coarser):
+    """Re-aggregate daily rows into weekly or monthly rows: sums add, peaks take the max."""
+    codes, starts = np.unique(coarser, return_index=True)
+    inverse = np.searchsorted(codes, coarser)
+    combined = np.full((len(codes), table.shape[1]), np.nan)
+    combined[:, 0] = np.bincount(inverse, table[:, 0], minlength=len(codes))
+    n_columns = (table.shape[1] - 1) // len(STATISTICS)
+    for index in range(n_columns):
+        first = 1 + index * len(STATISTICS)
+        block = table[:, first:first + len(STATISTICS)]
+        valid = ~np.isnan(block[:, 0])
+        counts = np.bincount(inverse, valid, minlength=len(codes))
+        for offset, stat in enumerate(STATISTICS):
+            values = block[:, offset]
+            if stat == "peak":
+                reduced = np.full(len(codes), -np.inf)
+                np.maximum.at(reduced, inverse, np.where(valid, values, -np.inf))
+            else:
+                reduced = np.bincount(inverse, np.where(valid, values, 0.0), minlength=len(codes))
+            reduced[counts == 0] = np.nan
+            combined[:, first + offset] = reduced
+    return codes, combined
+
+
+def _week_starts(days):
+    # 1970-01-01 was a Thursday; weeks start on Monday
+    return days - ((days.astype(np.int64) + 3) % 7)
+
+
+class RollupEngine:
+    """Daily, weekly and monthly per-house metrics kept beside a ReadingsStore.
+
+    Each metric row holds, for every category and consumed_power, the sum, the peak
+    reading and the sums in each TIME_OF_USE bucket. refresh() recomputes daily rows
+    only for store partitions (house, month) whose generation changed since the last
+    refresh, then rebuilds that house's weekly and monthly rows from its daily rows,
+    which are small. Lookups read the saved tables and never touch raw readings.
+
+    Layout: <store>/rollups/<house_id>/<level>.npy (periods x metrics) with
+    <level>_periods.npy, and rollups/manifest.json with the metric names and the
+    partition generations each house was built from.
+    """
+
+    def __init__(self, store, columns=ROLLUP_COLUMNS):
+        self.store = store if isinstance(store, ReadingsStore) else ReadingsStore(store)
+        self.root = os.path.join(self.store.root, "rollups")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.columns = list(columns)
+        self._manifest = None
+        self._manifest_mtime = None
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def manifest(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._manifest is None or mtime != self._manifest_mtime:
+            if mtime is None:
+                manifest = {"columns": self.columns, "metrics": metric_names(self.columns),
+                            "time_of_use": TIME_OF_USE, "built_from": {}}
+            else:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            with self._lock:
+                self._manifest, self._manifest_mtime = manifest, mtime
+                self._tables.clear()
+        return self._manifest
+
+    # --- Building ------------------------------------------------------------
+
+    def refresh(self):
+        """Bring the rollups up to date with the store; returns {house: months recomputed}."""
+        manifest = self.manifest()
+        if manifest["columns"] != self.columns:
+            # Built for other columns: start over
+            manifest = {"columns": self.columns, "metrics": metric_names(self.columns),
+                        "time_of_use": TIME_OF_USE, "built_from": {}}
+        stale = {}
+        for house in self.store.houses():
+            seen = manifest["built_from"].get(house, {})
+            months = [month for month, meta in self.store.partitions(house).items() if seen.get(month) != meta]
+            if months:
+                stale[house] = sorted(months)
+        stored = set(self.store.columns())
+        columns = [col for col in self.columns if col in stored]
+
+        for house, months in stale.items():
+            periods, table = self._load_table(house, "daily") if house in manifest["built_from"] else (None, None)
+            if periods is not None:
+                keep = ~np.isin(periods.astype('datetime64[M]').astype(str), months)
+                periods, table = periods[keep], table[keep]
+            else:
+                periods, table = np.empty(0, dtype='datetime64[D]'), np.empty((0, len(manifest["metrics"])))
+
+            new_periods, new_rows = [periods], [table]
+            for month in months:
+                month_periods, month_table = self._daily_for_month(house, month, columns)
+                new_periods.append(month_periods)
+                new_rows.append(month_table)
+            periods = np.concatenate(new_periods)
+            table = np.concatenate(new_rows)
+            order = np.argsort(periods, kind="stable")
+            self._save_house(house, periods[order], table[order])
+            manifest["built_from"][house] = dict(self.store.partitions(house))
+
+        if stale or not os.path.exists(self.manifest_path):
+            self._write_manifest(manifest)
+        return stale
+
+    def _daily_for_month(self, house, month, columns):
+        readings = self.store.query(house, month, np.datetime64(month, 'M') + 1, columns)
+        timestamps = readings[TIMESTAMP]
+        first_day = np.datetime64(month, 'M').astype('datetime64[D]')
+        days = timestamps.astype('datetime64[D]')
+        codes = (days - first_day).astype(np.int64)
+        n_days = int(((np.datetime64(month, 'M') + 1).astype('datetime64[D]') - first_day).astype(np.int64))
+        values = [readings[col] if col in readings else np.full(len(timestamps), np.nan) for col in self.columns]
+        table = _aggregate(codes, n_days, timestamps, values)
+        has_rows = table[:, 0] > 0
+        return (first_day + np.arange(n_days))[has_rows], table[has_rows]
+
+    def _save_house(self, house, daily_periods, daily_table):
+        staging = tempfile.mkdtemp(prefix=f".staging-{house}-", dir=self._ensure_root())
+        levels = {"daily": (daily_periods, daily_table),
+                  "weekly": _combine(daily_table, _week_starts(daily_periods)),
+                  "monthly": _combine(daily_table, daily_periods.astype('datetime64[M]'))}
+        for level, (periods, table) in levels.items():
+            np.save(os.path.join(staging, f"{level}_periods.npy"), periods)
+            np.save(os.path.join(staging, f"{level}.npy"), table)
+        directory = os.path.join(self.root, house)
+        retired = None
+        if os.path.isdir(directory):
+            retired = tempfile.mkdtemp(prefix=f".retired-{house}-", dir=self.root)
+            os.rename(directory, os.path.join(retired, house))
+        os.rename(staging, directory)
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
+        with self._lock:
+            for key in [key for key in self._tables if key[0] == house]:
+                del self._tables[key]
+
+    def _ensure_root(self):
+        os.makedirs(self.root, exist_ok=True)
+        return self.root
+
+    def _write_manifest(self, manifest):
+        with tempfile.NamedTemporaryFile("w", dir=self._ensure_root(), suffix=".json", delete=False) as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(f.name, self.manifest_path)
+        with self._lock:
+            self._manifest = manifest
+            self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    # --- Lookups -------------------------------------------------------------
+
+    def _load_table(self, house, level):
+        key = (str(house), level)
+        with self._lock:
+            if key in self._tables:
+                return self._tables[key]
+        directory = os.path.join(self.root, str(house))
+        if os.path.exists(os.path.join(directory, f"{level}.npy")):
+            table = (np.load(os.path.join(directory, f"{level}_periods.npy")),
+                     np.load(os.path.join(directory, f"{level}.npy"), mmap_mode="r"))
+        else:
+            table = (None, None)
+        with self._lock:
+            self._tables[key] = table
+        return table
+
+    def lookup(self, house_id, level="monthly", start=None, end=None, metrics=None):
+        """Rollup rows of one house with start <= period start < end, as a dict of arrays.
+
+        metrics are names such as "air_conditioners.sum" or "consumed_power.peak";
+        default all. Periods are datetime64 days (weeks start on Monday) or months.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level '{level}'; use one of {LEVELS}")
+        names = self.manifest()["metrics"]
+        metrics = names if metrics is None else list(metrics)
+        unknown = [metric for metric in metrics if metric not in names]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {unknown}")
+        periods, table = self._load_table(house_id, level)
+        if periods is None:
+            return {"period": np.empty(0, dtype='datetime64[D]'), **{metric: np.empty(0) for metric in metrics}}
+
+        unit = 'M' if level == "monthly" else 'D'
+        first = 0 if start is None else int(np.searchsorted(periods, np.datetime64(start, unit)))
+        last = len(periods) if end is None else int(np.searchsorted(periods, np.datetime64(end, unit)))
+        result = {"period": periods[first:last]}
+        for metric in metrics:
+            result[metric] = np.asarray(table[first:last, names.index(metric)])
+        return result
+
+    def get(self, house_id, level, period):
+        """Metrics of a single period ("2025-03" monthly, "2025-03-03" weekly/daily) as a dict."""
+        unit = 'M' if level == "monthly" else 'D'
+        period = np.datetime64(period, unit)
+        if level == "weekly":
+            period = _week_starts(period)
+        rows = self.lookup(house_id, level, period, period + 1)
+        if len(rows["period"]) == 0:
+            raise KeyError(f"No {level} rollup for house {house_id} at {period}")
+        return {metric: float(values[0]) for metric, values in rows.items() if metric != "period"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh or query the per-house rollups of a readings store.")
+    parser.add_argument("--store", default=STORE_ROOT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh", help="Recompute rollups for store partitions changed since the last refresh")
+    show = commands.add_parser("show", help="Print one house's rollups")
+    show.add_argument("house_id")
+    show.add_argument("--level", choices=LEVELS, default="monthly")
+    show.add_argument("--start", default=None)
+    show.add_argument("--end", default=None)
+    show.add_argument("--metrics", default=None, help="Comma-separated, e.g. air_conditioners.sum")
+    args = parser.parse_args()
+
+    engine = RollupEngine(args.store)
+    if args.command == "refresh":
+        started = time.perf_counter()
+        stale = engine.refresh()
+        partitions = sum(len(months) for months in stale.values())
+        print(f"Recomputed {partitions} partition(s) across {len(stale)} house(s) "
+              f"in {time.perf_counter() - started:.2f}s")
+    else:
+        import pandas as pd
+        rows = engine.lookup(args.house_id, args.level, args.start, args.end,
+                             args.metrics.split(",") if args.metrics else None)
+        print(pd.DataFrame(rows).set_index("period").to_string())
+
+
+if __name__ == "__main__":
+    main()
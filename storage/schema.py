@@ -0,0 +1,27 @@
+# Canonical reading schema shared by the generator, the raw CSV loader and the store.
+# Bump CANONICAL_SCHEMA_VERSION when a column is renamed or changes meaning.
+CANONICAL_SCHEMA_VERSION = 1
+
+KEY_COLUMNS = ["house_id", "timestamp"]
+
+CATEGORY_COLUMNS = [
+    "white_goods", "entertainment", "air_conditioners", "lighting", "ev_charges", "utility_appliances",
+]
+
+METER_COLUMNS = ["meter_reading", "consumed_power"]
+
+# Device names as the generator writes them; "lighting" is both a category and a device,
+# so device columns carry a prefix in the canonical schema
+DEVICE_NAMES = [
+    "fridge", "washing_machine", "microwave", "dishwasher",
+    "tv", "wifi", "laptop", "chargers", "lighting",
+    "fans", "ac", "water_heater", "mortar", "ev_car",
+]
+DEVICE_PREFIX = "device_"
+DEVICE_COLUMNS = [DEVICE_PREFIX + name for name in DEVICE_NAMES]
+
+VALUE_COLUMNS = CATEGORY_COLUMNS + METER_COLUMNS + DEVICE_COLUMNS
+
+
+def device_column(name):
+    return DEVICE_PREFIX + name
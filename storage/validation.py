@@ -0,0 +1,257 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.raw_loader import SOURCE_KEY_COLUMNS, detect_schema, iter_normalized_chunks
+from storage.readings_store import TIMESTAMP
+from storage.schema import CATEGORY_COLUMNS, METER_COLUMNS
+
+STEP_MINUTES = 30
+
+# Every value is written rounded to 4 decimals, so a reading can be off by 0.5e-4
+# per rounded term; the defaults allow for that and flag anything larger
+METER_TOLERANCE = 5e-4
+CATEGORY_TOLERANCE = 1e-3
+DRIFT_TOLERANCE = 1e-2
+
+CHECKS = ["gap", "duplicate", "out_of_order", "meter_continuity", "category_sum", "meter_drift"]
+MAX_EXAMPLES = 5
+
+_NO_TIMESTAMP = np.iinfo(np.int64).min
+
+
+class ReadingsValidator:
+    """Chunk-wise consistency checks of meter readings, grouped by house.
+
+    Per house, in file order:
+      * gap / duplicate / out_of_order: the step between consecutive timestamps is
+        more than, zero or less than step_minutes;
+      * meter_continuity: meter_reading - previous meter_reading != consumed_power;
+      * category_sum: the category columns do not add up to consumed_power;
+      * meter_drift: the running sum of continuity errors, i.e. how far the meter has
+        wandered from first reading + cumulative consumption.
+
+    Chunks are regrouped by house with one stable sort, every check is a diff or a
+    cumsum over the sorted arrays, and each house's last timestamp, meter reading and
+    drift carry over to the next chunk, so a file of any size is checked in one pass.
+    Continuity is not checked across a gap, since the missing slots consumed power too.
+    """
+
+    def __init__(self, step_minutes=STEP_MINUTES, meter_tolerance=METER_TOLERANCE,
+                 category_tolerance=CATEGORY_TOLERANCE, drift_tolerance=DRIFT_TOLERANCE,
+                 max_examples=MAX_EXAMPLES):
+        self.step = int(step_minutes) * 60
+        self.tolerances = {"meter_continuity": meter_tolerance, "category_sum": category_tolerance,
+                           "meter_drift": drift_tolerance}
+        self.max_examples = max_examples
+        self.labels = {}
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.first_timestamp = np.zeros(0, dtype=np.int64)
+        self.last_timestamp = np.zeros(0, dtype=np.int64)
+        self.last_meter = np.zeros(0)
+        self.drift = np.zeros(0)
+        self.max_drift = np.zeros(0)
+        self.missing_slots = np.zeros(0, dtype=np.int64)
+        self.counts = {check: np.zeros(0, dtype=np.int64) for check in CHECKS}
+        self.examples = {check: [] for check in CHECKS}
+
+    def _codes(self, house_ids):
+        uniques, inverse = np.unique(np.asarray(house_ids).astype(str), return_inverse=True)
+        mapping = np.array([self.labels.setdefault(label, len(self.labels)) for label in uniques], dtype=np.int64)
+        grow = len(self.labels) - len(self.rows)
+        if grow > 0:
+            self.rows = np.concatenate([self.rows, np.zeros(grow, dtype=np.int64)])
+            for name in ("first_timestamp", "last_timestamp"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.full(grow, _NO_TIMESTAMP)]))
+            self.last_meter = np.concatenate([self.last_meter, np.full(grow, np.nan)])
+            self.drift = np.concatenate([self.drift, np.zeros(grow)])
+            self.max_drift = np.concatenate([self.max_drift, np.zeros(grow)])
+            self.missing_slots = np.concatenate([self.missing_slots, np.zeros(grow, dtype=np.int64)])
+            for check in CHECKS:
+                self.counts[check] = np.concatenate([self.counts[check], np.zeros(grow, dtype=np.int64)])
+        return mapping[inverse]
+
+    @staticmethod
+    def _previous(values, starts, carried):
+        """values shifted down by one within each house, the carried value at each house's first row."""
+        previous = np.empty_like(values)
+        previous[1:] = values[:-1]
+        previous[starts] = carried
+        return previous
+
+    def update(self, chunk):
+        """Check one chunk of canonical columns (house_id, timestamp, meter and category values)."""
+        codes = self._codes(chunk["house_id"])
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        n_rows = len(codes)
+        if n_rows == 0:
+            return
+        timestamps = np.asarray(chunk[TIMESTAMP], dtype='datetime64[s]')[order].astype(np.int64)
+        consumed = np.asarray(chunk["consumed_power"], dtype=np.float64)[order]
+        meter = np.asarray(chunk["meter_reading"], dtype=np.float64)[order] if "meter_reading" in chunk \
+            else np.full(n_rows, np.nan)
+
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+        ends = np.append(starts[1:], n_rows) - 1
+        houses = codes[starts]
+        n_houses = len(self.labels)
+
+        # Timestamp sequence
+        previous_ts = self._previous(timestamps, starts, self.last_timestamp[houses])
+        has_previous = previous_ts != _NO_TIMESTAMP
+        step = timestamps - previous_ts
+        consecutive = has_previous & (step == self.step)
+        failures = {
+            "gap": has_previous & (step > self.step),
+            "duplicate": has_previous & (step == 0),
+            "out_of_order": has_previous & (step < 0),
+        }
+        gap_slots = np.where(failures["gap"], step // self.step - 1, 0)
+        self.missing_slots += np.bincount(codes, gap_slots, minlength=n_houses).astype(np.int64)
+
+        # Meter continuity and its running drift
+        previous_meter = self._previous(meter, starts, self.last_meter[houses])
+        error = (meter - previous_meter) - consumed
+        checked = consecutive & ~np.isnan(error)
+        failures["meter_continuity"] = checked & (np.abs(error) > self.tolerances["meter_continuity"])
+        error = np.where(checked, error, 0.0)
+        running = np.cumsum(error)
+        before_house = running[starts] - error[starts]
+        drift = running - np.repeat(before_house - self.drift[houses], ends - starts + 1)
+        failures["meter_drift"] = np.abs(drift) > self.tolerances["meter_drift"]
+
+        # Categories against the total
+        present = [col for col in CATEGORY_COLUMNS if col in chunk]
+        if present:
+            categories = np.column_stack([np.asarray(chunk[col], dtype=np.float64)[order] for col in present])
+            category_error = np.nansum(categories, axis=1) - consumed
+            failures["category_sum"] = np.abs(category_error) > self.tolerances["category_sum"]
+        else:
+            category_error = np.zeros(n_rows)
+            failures["category_sum"] = np.zeros(n_rows, dtype=bool)
+
+        details = {
+            "gap": lambda i: {"missing_slots": int(gap_slots[i])},
+            "duplicate": lambda i: {},
+            "out_of_order": lambda i: {"previous": _iso(previous_ts[i])},
+            "meter_continuity": lambda i: {"meter_step": round(float(meter[i] - previous_meter[i]), 6),
+                                           "consumed_power": float(consumed[i])},
+            "category_sum": lambda i: {"categories": round(float(category_error[i] + consumed[i]), 6),
+                                       "consumed_power": float(consumed[i])},
+            "meter_drift": lambda i: {"drift": round(float(drift[i]), 6)},
+        }
+        labels = list(self.labels)
+        for check, mask in failures.items():
+            self.counts[check] += np.bincount(codes, mask, minlength=n_houses).astype(np.int64)
+            room = self.max_examples - len(self.examples[check])
+            if room > 0:
+                for i in np.flatnonzero(mask)[:room]:
+                    self.examples[check].append({"house_id": labels[codes[i]], "timestamp": _iso(timestamps[i]),
+                                                 **details[check](i)})
+
+        # Carry each house's state into the next chunk
+        self.rows += np.bincount(codes, minlength=n_houses).astype(np.int64)
+        unset = self.first_timestamp[houses] == _NO_TIMESTAMP
+        self.first_timestamp[houses[unset]] = timestamps[starts[unset]]
+        self.last_timestamp[houses] = timestamps[ends]
+        self.last_meter[houses] = meter[ends]
+        self.drift[houses] = drift[ends]
+        np.maximum.at(self.max_drift, codes, np.abs(drift))
+
+    def report(self):
+        """A compact, JSON-serializable summary: counts per check and house plus a few examples."""
+        houses = {}
+        for label, code in sorted(self.labels.items(), key=lambda item: (len(item[0]), item[0])):
+            houses[label] = {
+                "rows": int(self.rows[code]),
+                "first": _iso(self.first_timestamp[code]),
+                "last": _iso(self.last_timestamp[code]),
+                "missing_slots": int(self.missing_slots[code]),
+                "max_meter_drift": round(float(self.max_drift[code]), 6),
+                "final_meter_drift": round(float(self.drift[code]), 6),
+                "violations": {check: int(self.counts[check][code]) for check in CHECKS if self.counts[check][code]},
+            }
+        violations = {check: int(self.counts[check].sum()) for check in CHECKS}
+        return {
+            "rows": int(self.rows.sum()),
+            "valid": not any(violations.values()),
+            "step_minutes": self.step // 60,
+            "tolerances": self.tolerances,
+            "violations": violations,
+            "houses": houses,
+            "examples": {check: examples for check, examples in self.examples.items() if examples},
+        }
+
+
+def _iso(seconds):
+    return str(np.datetime64(int(seconds), 's')) if seconds != _NO_TIMESTAMP else None
+
+
+def validate_file(path, validator=None, chunk_size=500000):
+    """Validate a raw readings CSV of any known layout; returns the validator's report.
+
+    Only the key, meter and category columns are parsed, so device columns cost nothing.
+    """
+    validator = validator or ReadingsValidator()
+    schema = detect_schema(path)
+    needed = SOURCE_KEY_COLUMNS + CATEGORY_COLUMNS + METER_COLUMNS
+    schema = dict(schema, columns={col: position for col, position in schema["columns"].items() if col in needed})
+    for chunk in iter_normalized_chunks(path, schema, chunk_size):
+        validator.update(chunk)
+    return validator.report()
+
+
+def summary_lines(report):
+    lines = [f"{report['rows']:,} rows in {len(report['houses'])} house(s): "
+             + ("valid" if report["valid"] else ", ".join(f"{count:,} {check}"
+                                                          for check, count in report["violations"].items() if count))]
+    for house, stats in report["houses"].items():
+        lines.append(f"  house {house}: {stats['rows']:,} rows {stats['first']} .. {stats['last']}, "
+                     f"{stats['missing_slots']} missing slot(s), max drift {stats['max_meter_drift']}"
+                     + (f", {stats['violations']}" if stats["violations"] else ""))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check meter continuity, category sums and timestamp gaps "
+                                                 "of raw reading CSVs.")
+    parser.add_argument("paths", nargs="+", help="CSV files or directories of CSVs")
+    parser.add_argument("--step-minutes", type=int, default=STEP_MINUTES)
+    parser.add_argument("--meter-tolerance", type=float, default=METER_TOLERANCE)
+    parser.add_argument("--category-tolerance", type=float, default=CATEGORY_TOLERANCE)
+    parser.add_argument("--drift-tolerance", type=float, default=DRIFT_TOLERANCE)
+    parser.add_argument("--chunk-size", type=int, default=500000)
+    parser.add_argument("--report", default=None, help="Also write the full reports as JSON to this path")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths.extend(sorted(glob.glob(os.path.join(path, "*.csv"))) if os.path.isdir(path) else [path])
+
+    reports = {}
+    for path in paths:
+        started = time.perf_counter()
+        validator = ReadingsValidator(args.step_minutes, args.meter_tolerance, args.category_tolerance,
+                                      args.drift_tolerance)
+        reports[path] = validate_file(path, validator, args.chunk_size)
+        print(f"{path} ({time.perf_counter() - started:.2f}s)")
+        for line in summary_lines(reports[path]):
+            print(f"  {line}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=1)
+    if not all(report["valid"] for report in reports.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import importlib
+import numpy as np
+import pandas as pd
+import sys
+import os
+from fastapi.testclient import TestClient
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.train_xgboost import feature_cols, output_cols
+
+def make_prepared_csv(path, n_rows=1500, seed=0):
+    """A prepared training CSV whose targets are a fixed share of consumed_power."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({"date_range_jan_1": rng.integers(0, 2, n_rows).astype(float)})
+    for col in feature_cols + ["minute", "second"]:
+        data[col] = rng.normal(size=n_rows)
+    for col in output_cols:
+        data[col] = 0.2 * data["consumed_power"] + rng.normal(scale=0.01, size=n_rows)
+    data.to_csv(path, index=False)
+
+def make_readings(house_ids, start="2025-03-01", slots=96, seed=0, missing=None):
+    """Half-hourly readings in the store's columns, one block of rows per house.
+
+    air_conditioners and lighting add up to consumed_power and the meter accumulates
+    it, so the readings also validate cleanly. missing (a slice) blanks those slots
+    of air_conditioners in every house.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.datetime64(start, 's') + np.arange(slots) * np.timedelta64(30, 'm')
+    chunk = {"house_id": [], "timestamp": [], "air_conditioners": [], "lighting": [],
+             "consumed_power": [], "meter_reading": []}
+    for house_id in house_ids:
+        air_conditioners = np.round(rng.uniform(0, 2, slots), 4)
+        lighting = np.round(rng.uniform(0, 0.1, slots), 4)
+        consumed = np.round(air_conditioners + lighting, 4)
+        if missing is not None:
+            air_conditioners[missing] = np.nan
+        chunk["house_id"].append(np.full(slots, str(house_id)))
+        chunk["timestamp"].append(timestamps)
+        chunk["air_conditioners"].append(air_conditioners)
+        chunk["lighting"].append(lighting)
+        chunk["consumed_power"].append(consumed)
+        chunk["meter_reading"].append(np.round(100 + np.cumsum(consumed), 4))
+    return {col: np.concatenate(parts) for col, parts in chunk.items()}
+
+def app_client(workdir, module="app.main", **env):
+    """TestClient for a freshly imported app module that loads model/ and the rest from workdir.
+
+    The apps resolve their artifacts relative to the cwd at import time, so the import
+    runs inside workdir; env variables (e.g. MODEL_FORMAT) are set only while it loads.
+    """
+    previous = os.getcwd()
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    os.chdir(workdir)
+    try:
+        sys.modules.pop(module, None)
+        return TestClient(importlib.import_module(module).app)
+    finally:
+        os.chdir(previous)
+        for name, value in saved.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
@@ -1,5 +1,4 @@
 import pandas as pd
-import pickle
 from datetime import datetime
 import calendar
 import numpy as np
@@ -9,14 +8,10 @@ import sys
 # Add trainer to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from trainer.time_feature_encoder import TimeFeatureEncoder
+from app.artifacts import load_artifacts
 
-# Load model and encoders
-with open("model/random_forest_model.pkl", "rb") as f:
-    model = pickle.load(f)
-with open("model/encoder.pkl", "rb") as f:
-    encoder = pickle.load(f)
-with open("model/time_encoder.pkl", "rb") as f:
-    time_encoder = pickle.load(f)
+# Load model and encoders (latest registry version, or legacy pickles)
+model, encoder, time_encoder = load_artifacts("model")
 
 # --- Function to convert date to date_range label ---
 def get_date_range_label(date_obj):
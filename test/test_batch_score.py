@@ -0,0 +1,70 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifacts import load_artifacts
+from app.batch_score import batch_score, index_chunks
+from app.features import output_categories
+from app.streaming import score_columns
+from benchmark.fixture_model import build_fixture_model
+
+def write_readings(path, n_rows, seed=0, trailing_newline=True):
+    """Raw-style CSV with a repeated `lighting` header and a column batch_score must skip."""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(1, 29, n_rows)
+    months = rng.integers(1, 13, n_rows)
+    seconds = rng.integers(0, 48, n_rows) * 1800
+    columns = {
+        "date": [f"{day:02d}:{month:02d}:2025" for day, month in zip(days, months)],
+        "time": [f"{s // 3600:02d}:{s % 3600 // 60:02d}:00" for s in seconds],
+        "consumed_power": np.round(rng.uniform(0, 5, n_rows), 3).astype(str).tolist(),
+    }
+    lines = ["house_id,date,time,lighting,consumed_power,lighting"]
+    lines += [f"7,{date},{time},0.1,{power},0.2"
+              for date, time, power in zip(columns["date"], columns["time"], columns["consumed_power"])]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + ("\n" if trailing_newline else ""))
+    return columns
+
+def test_index_chunks_splits_on_line_boundaries():
+    """Chunks start on line boundaries whether or not the file ends with a newline."""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "readings.csv")
+        for trailing_newline in (True, False):
+            write_readings(path, 23, trailing_newline=trailing_newline)
+            header, chunks, n_rows = index_chunks(path, chunk_size=5, block_size=64)
+            assert header.startswith(b"house_id,") and n_rows == 23
+            assert [first_row for _, _, first_row in chunks] == [0, 5, 10, 15, 20]
+            with open(path, "rb") as f:
+                data = f.read()
+            assert all(data[start - 1:start] == b"\n" for start, _, _ in chunks)
+            assert chunks[-1][1] == len(data)
+
+def test_batch_score_matches_score_columns():
+    """Parallel chunked scoring writes what one score_columns call over the whole file returns."""
+    with tempfile.TemporaryDirectory() as workdir:
+        model_dir = build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        path = os.path.join(workdir, "readings.csv")
+        columns = write_readings(path, 103)
+
+        report = batch_score(path, os.path.join(workdir, "scores"), model_dir, workers=2, chunk_size=10)
+        assert report["rows"] == 103 and report["chunks"] == 11
+
+        expected = score_columns(columns, *load_artifacts(model_dir))
+        for i, category in enumerate(output_categories):
+            np.testing.assert_allclose(np.load(os.path.join(workdir, "scores", f"{category}.npy")), expected[:, i])
+
+def main():
+    try:
+        test_index_chunks_splits_on_line_boundaries()
+        test_batch_score_matches_score_columns()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import sys
+import os
+import tempfile
+from sklearn.ensemble import RandomForestRegressor
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.compact_forest import CompactForest, export_sklearn_forest, export_xgboost
+
+def make_data(n_rows=2000, seed=0):
+    """Synthetic multi-output regression data with a few missing values."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 8))
+    y = np.stack([X[:, 0] * 2 + X[:, 1], np.sin(X[:, 2]), X[:, 3] > 0], axis=1).astype(float)
+    # Every eleventh row misses a feature, so the exports' missing-value routing is exercised
+    X[::11, 4] = np.nan
+    return X, y
+
+def test_random_forest_matches_sklearn():
+    """Compact export of a random forest predicts the same values as sklearn."""
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, y)
+    compact = export_sklearn_forest(model)
+
+    with tempfile.TemporaryDirectory() as path:
+        compact.save(path)
+        loaded = CompactForest.load(path)
+        difference = np.abs(loaded.predict(X) - model.predict(X)).max()
+
+    print(f"\nRandom forest max abs difference: {difference:.2e}")
+    assert difference < 1e-5
+
+def test_xgboost_matches_booster():
+    """Compact export of an XGBoost regressor matches for both multi-output strategies."""
+    xgb = pytest.importorskip("xgboost")
+
+    X, y = make_data()
+    for strategy in ["one_output_per_tree", "multi_output_tree"]:
+        model = xgb.XGBRegressor(n_estimators=20, max_depth=4, tree_method="hist", multi_strategy=strategy)
+        model.fit(X, y)
+        difference = np.abs(export_xgboost(model).predict(X) - model.predict(X)).max()
+        print(f"\nXGBoost ({strategy}) max abs difference: {difference:.2e}")
+        assert difference < 1e-4
+
+def main():
+    try:
+        test_random_forest_matches_sklearn()
+        test_xgboost_matches_booster()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import numpy as np
+import sys
+import os
+import tempfile
+from sklearn.ensemble import RandomForestRegressor
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifacts import load_artifacts, load_monitoring_profile
+from app.features import build_feature_frame
+from benchmark.fixture_model import build_fixture_model
+from trainer.distill import (DATE_RANGE_LABELS, DISTILLED_NAME, PiecewiseLinearStudent, compare, fit_boosted,
+                             fit_piecewise, power_knots, register_student)
+from trainer.model_registry import ModelRegistry
+from trainer.monitoring_profile import build_profile
+
+def test_bilinear_basis_reproduces_knot_values():
+    """At knots a student returns the knot's coefficients; between them it interpolates, wrapping at midnight."""
+    student = PiecewiseLinearStudent(1800, power_knots(4.0, 5), n_outputs=1)
+    student.coef[2, :, :, 0] = np.arange(48)[:, None] * 10 + np.arange(5)[None, :]
+    knots = student.power_knots
+    np.testing.assert_allclose(student.predict_parts([2, 2], [3 * 1800, 3 * 1800], knots[[1, 4]])[:, 0], [31, 34])
+    # Halfway in time and in power
+    np.testing.assert_allclose(student.predict_parts([2], [3 * 1800 + 900], [(knots[1] + knots[2]) / 2])[0, 0], 36.5)
+    # 23:45 blends the last slot with midnight; power above the last knot is clamped
+    np.testing.assert_allclose(student.predict_parts([2], [86400 - 900], [100.0])[0, 0], (474 + 4) / 2)
+
+def test_distilled_students_track_the_teacher():
+    """Both students stay close to the forest on fresh synthetic points and the report says by how much."""
+    with tempfile.TemporaryDirectory() as workdir:
+        teacher = load_artifacts(build_fixture_model(os.path.join(workdir, "model"), n_estimators=5))
+        student = fit_piecewise(teacher, n_power_knots=17, power_max=8.0, off_grid_samples=20000)
+        report = compare(teacher, student, power_max=8.0, n_samples=2000)
+        assert report["fidelity"]["r2"] > 0.9
+        assert report["student_bytes"] < report["teacher_bytes"]
+        assert set(report) >= {"predict_1_ms", "predict_48_ms", "predict_10000_ms"}
+
+        boosted = fit_boosted(teacher, power_max=8.0, samples=5000, n_estimators=20)
+        assert compare(teacher, boosted, power_max=8.0, n_samples=2000)["fidelity"]["r2"] > 0.8
+
+def test_registered_student_is_served_by_name():
+    """A registered student leaves the teacher as random_forest; MODEL_NAME selects it, in either format."""
+    with tempfile.TemporaryDirectory() as workdir:
+        model_dir = build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        teacher = load_artifacts(model_dir)
+        model, encoder, time_encoder = teacher
+        registry = ModelRegistry(os.path.join(model_dir, "registry"))
+        registry.register("random_forest", model, {"encoder": encoder, "time_encoder": time_encoder},
+                          feature_columns=[], target_columns=[],
+                          profile=build_profile([1.0, 2.0, 3.0], [0, 1800, 3600]))
+        student = fit_piecewise(teacher, n_power_knots=9, power_max=8.0, off_grid_samples=2000)
+        report = dict(compare(teacher, student, power_max=8.0, n_samples=500), student="piecewise")
+        version = register_student(model_dir, student, teacher, report)
+
+        assert registry.load(DISTILLED_NAME, version).manifest["metrics"]["teacher"] == "random_forest"
+        assert isinstance(load_artifacts(model_dir)[0], RandomForestRegressor)
+        X = build_feature_frame(DATE_RANGE_LABELS[[0, 20]], [0, 43200], [1.0, 2.5], encoder, time_encoder)
+        for model_format in ("pickle", "compact"):
+            served, _, _ = load_artifacts(model_dir, model_format=model_format, model_name=DISTILLED_NAME)
+            assert isinstance(served, PiecewiseLinearStudent)
+            np.testing.assert_allclose(served.predict(X), student.predict(X))
+            assert served.predict(X.to_numpy()).shape == (2, 6)
+
+        os.environ["MODEL_NAME"] = DISTILLED_NAME
+        try:
+            assert isinstance(load_artifacts(model_dir)[0], PiecewiseLinearStudent)
+            # The student is monitored against its teacher's training profile
+            assert load_monitoring_profile(model_dir)["readings"] == 3
+        finally:
+            del os.environ["MODEL_NAME"]
+        try:
+            load_artifacts(model_dir, model_name="missing")
+            raise AssertionError("an unknown model name must not fall back to the legacy files")
+        except FileNotFoundError:
+            pass
+
+def main():
+    try:
+        test_bilinear_basis_reproduces_knot_values()
+        test_distilled_students_track_the_teacher()
+        test_registered_student_is_served_by_name()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.fixture_model import build_fixture_model
+from helpers import app_client
+
+def test_forecast_matches_single_predictions():
+    """/forecast returns one slot per step, each equal to /predict at that slot."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir)
+
+        # The horizon crosses midnight into the next date_range
+        response = client.post("/forecast", json={"start_date": "10:03:2025", "start_time": "23:00:00",
+                                                  "horizon_hours": 2, "consumed_power": [1.0, 2.0, 3.0, 4.0]})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["timestamps"] == ["2025-03-10T23:00:00", "2025-03-10T23:30:00",
+                                      "2025-03-11T00:00:00", "2025-03-11T00:30:00"]
+        single = client.post("/predict", json={"date": "11:03:2025", "time": "00:30:00", "consumed_power": 4.0}).json()
+        np.testing.assert_allclose([body[category][3] for category in single], list(single.values()))
+
+def test_forecast_rejects_bad_input():
+    """Impossible dates and mismatched profiles are 422s, not 500s."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir)
+
+        response = client.post("/forecast", json={"start_date": "31:02:2025", "consumed_power": 1.0})
+        assert response.status_code == 422
+        assert client.post("/forecast", json={"start_date": "01:03:2025", "start_time": "25:00:00",
+                                              "consumed_power": 1.0}).status_code == 422
+        assert client.post("/forecast", json={"start_date": "01:03:2025", "horizon_hours": 1,
+                                              "consumed_power": [1.0]}).status_code == 422
+
+def main():
+    try:
+        test_forecast_matches_single_predictions()
+        test_forecast_rejects_bad_input()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import json
+import sys
+import os
+import tempfile
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.hyperparameter_search import HyperparameterSearch
+from helpers import make_prepared_csv
+
+def test_successive_halving_and_resume():
+    """Rungs shrink by eta, the leaderboard ranks full-budget trials and a rerun resumes."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "prepared.csv")
+        make_prepared_csv(data_path, n_rows=600)
+        search_dir = os.path.join(workdir, "search")
+        kwargs = dict(data_path=data_path, cache_root=os.path.join(workdir, "cache"), workers=1)
+
+        search = HyperparameterSearch("random_forest", search_dir, **kwargs)
+        table = search.run(n_configs=9)
+        rungs = [record["rung"] for record in search.completed.values()]
+        assert [rungs.count(rung) for rung in range(3)] == [9, 3, 1]
+        assert table.loc[0, "budget"] == 1.0
+        assert {"fit_seconds", "peak_rss_mb"} <= set(table.columns)
+
+        with open(os.path.join(search_dir, "trials.jsonl")) as f:
+            lines = f.readlines()
+        # Drop the final trial and leave a torn line, as if the search was killed mid-write
+        with open(os.path.join(search_dir, "trials.jsonl"), "w") as f:
+            f.writelines(lines[:-1])
+            f.write(lines[-1][:10])
+
+        resumed = HyperparameterSearch("random_forest", search_dir, **kwargs)
+        assert len(resumed.completed) == 12
+        resumed.run(n_configs=9)
+        assert len(resumed.completed) == 13
+        assert len(HyperparameterSearch("random_forest", search_dir, **kwargs).completed) == 13
+        with open(os.path.join(search_dir, "best.json")) as f:
+            assert json.load(f)["budget"] == 1.0
+
+        # Random forest trials see the random forest trainer's features, minute and second included
+        [cache_key] = os.listdir(os.path.join(workdir, "cache"))
+        with open(os.path.join(workdir, "cache", cache_key, "meta.json")) as f:
+            assert {"minute", "second"} <= set(json.load(f)["input_cols"])
+
+def main():
+    try:
+        test_successive_halving_and_resume()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
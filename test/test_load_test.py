@@ -0,0 +1,59 @@
+import asyncio
+import httpx
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.fixture_model import build_fixture_model
+from benchmark.load_test import APP_KINDS, PayloadFactory, compare, drive, parse_mix
+from helpers import app_client
+
+def test_payloads_are_seeded():
+    """The same seed replays the same request sequence."""
+    first, second = PayloadFactory(seed=3), PayloadFactory(seed=3)
+    for kind in APP_KINDS["main"] + APP_KINDS["main2"]:
+        assert first.make(kind) == second.make(kind)
+    assert parse_mix("single=0.5, stream=2") == {"single": 0.5, "stream": 2.0}
+
+def test_drive_serves_every_kind_without_errors():
+    """A closed-loop run against the in-process app answers every payload kind successfully."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        for app_name in ("main", "main2"):
+            app = app_client(workdir, f"app.{app_name}").app
+            kinds = APP_KINDS[app_name]
+
+            async def run():
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(base_url="http://benchmark", transport=transport) as client:
+                    factory = PayloadFactory(seed=0, stream_rows=20, nlp_batch_size=4)
+                    return await drive(client, kinds, [1] * len(kinds), 4, 30, None, factory)
+
+            result = asyncio.run(run())
+            assert result["requests"] == 30 and result["errors"] == 0, result
+            assert set(result["by_kind"]) == set(kinds)
+            assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+
+def test_compare_flags_regressions():
+    """Only p95 rises and throughput drops past the threshold count as regressions."""
+    baseline = {"results": {"main": {"8": {"p95_ms": 10.0, "throughput_rps": 100.0}}}}
+    within = {"results": {"main": {"8": {"p95_ms": 10.5, "throughput_rps": 95.0}, "32": {"p95_ms": 50.0}}}}
+    assert compare(within, baseline, 0.10) == []
+    worse = {"results": {"main": {"8": {"p95_ms": 12.0, "throughput_rps": 80.0}}}}
+    assert compare(worse, baseline, 0.10) == ["main c=8: p95 10.0 -> 12.0 ms",
+                                              "main c=8: throughput 100.0 -> 80.0 req/s"]
+
+def main():
+    try:
+        test_payloads_are_seeded()
+        test_drive_serves_every_kind_without_errors()
+        test_compare_flags_regressions()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from generator.prepare_training_data import prepare_training_data
+from trainer.lstm_windows import (gather_targets, gather_windows, iter_window_batches, load_series,
+                                  prepare_series, split_windows, window_starts)
+from trainer.train_all import target_columns, time_columns
+
+def make_series_csv(path, rows_per_house=(50, 7, 80)):
+    frames = []
+    offset = 0
+    for house_id, n_rows in enumerate(rows_per_house, start=1):
+        row = np.arange(offset, offset + n_rows, dtype=float)
+        frames.append(pd.DataFrame({"house_id": house_id, "time": row, "consumed_power": row * 2,
+                                    "lighting": row * 3}))
+        offset += n_rows
+    pd.concat(frames).to_csv(path, index=False)
+
+def test_windows_stay_inside_houses():
+    """Windows never cross a house boundary and match direct slicing of the data."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "series.csv")
+        make_series_csv(data_path)
+        series_dir = prepare_series(data_path, ["time", "consumed_power"], ["lighting"],
+                                    cache_root=os.path.join(workdir, "cache"), chunk_size=20)
+        X, y, segments = load_series(series_dir)
+        assert list(segments) == [0, 50, 57, 137]
+
+        starts, segment_ids = window_starts(segments, window_length=10, stride=3)
+        # House 2 is shorter than one window and contributes none
+        assert set(segment_ids) == {0, 2}
+        assert np.all(starts + 10 <= segments[segment_ids + 1])
+
+        windows = gather_windows(X, starts[:4], 10)
+        assert np.array_equal(windows[1], X[starts[1]:starts[1] + 10])
+        assert np.array_equal(gather_targets(y, starts[:4], 10)[:, 0], (starts[:4] + 9) * 3)
+
+        train, validation = split_windows(starts, segment_ids, segments, 10)
+        train_rows = {row for start in train for row in range(start, start + 10)}
+        validation_rows = {row for start in validation for row in range(start, start + 10)}
+        assert train_rows.isdisjoint(validation_rows)
+
+        batches = list(iter_window_batches(X, starts, 10, batch_size=8, y=y))
+        assert sum(len(windows) for windows, _ in batches) == len(starts)
+        assert max(len(windows) for windows, _ in batches) == 8
+
+def test_prepared_training_data_keeps_houses():
+    """A raw generator CSV run through prepare_training_data still windows per house."""
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_path = os.path.join(workdir, "raw.csv")
+        frames = []
+        for house_id, n_rows in [("4", 30), ("unknown", 20)]:
+            slots = np.arange(n_rows)
+            frame = pd.DataFrame({"house_id": house_id, "date": "2024-01-01", "date_range": "jan_1",
+                                  "time": [f"{slot // 2 % 24:02d}:{slot % 2 * 30:02d}:00" for slot in slots],
+                                  "consumed_power": slots / 10})
+            for col in target_columns:
+                frame[col] = frame["consumed_power"] / 6
+            frames.append(frame)
+        pd.concat(frames).to_csv(raw_path, index=False)
+
+        # The trainers' column list does not mention house_id; it is carried through anyway
+        data_path = prepare_training_data(raw_path, ["date_range", "time", "consumed_power"] + target_columns,
+                                          os.path.join(workdir, "training.csv"))
+        header = pd.read_csv(data_path, nrows=0).columns
+        input_columns = [col for col in header if col.startswith("date_range_") or col in time_columns]
+        series_dir = prepare_series(data_path, input_columns, target_columns, cache_root=os.path.join(workdir, "cache"))
+        X, y, segments = load_series(series_dir)
+        assert list(segments) == [0, 30, 50]
+        starts, segment_ids = window_starts(segments, window_length=8)
+        assert np.all(starts + 8 <= segments[segment_ids + 1]) and set(segment_ids) == {0, 1}
+
+        # Without house_id the file would silently become one series
+        single_path = os.path.join(workdir, "single.csv")
+        pd.read_csv(data_path).drop(columns="house_id").to_csv(single_path, index=False)
+        try:
+            prepare_series(single_path, input_columns, target_columns, cache_root=os.path.join(workdir, "cache"))
+            raise AssertionError("a file without house_id must be rejected")
+        except ValueError:
+            pass
+
+def main():
+    try:
+        test_windows_stay_inside_houses()
+        test_prepared_training_data_keeps_houses()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
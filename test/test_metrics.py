@@ -0,0 +1,68 @@
+import sys
+import os
+import tempfile
+import time
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.metrics import SlowRequestSampler
+from benchmark.fixture_model import build_fixture_model
+from helpers import app_client
+
+def scrape(client):
+    """Parse /metrics into {sample name with labels: value}, checking the exposition layout."""
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            assert line.split()[1] in ("HELP", "TYPE")
+            continue
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+def test_metrics_exposition_counts_requests():
+    """A /predict call shows up in the request counter, latency histogram and stage histogram."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir)
+
+        before = scrape(client)
+        response = client.post("/predict", json={"date": "01:03:2025", "time": "18:30:00", "consumed_power": 2.4})
+        assert response.status_code == 200
+        after = scrape(client)
+
+        requests = 'api_requests_total{endpoint="/predict",status="200"}'
+        assert after[requests] == before.get(requests, 0) + 1
+        count = 'api_request_duration_seconds_count{endpoint="/predict"}'
+        assert after[count] == before.get(count, 0) + 1
+        assert after['api_request_duration_seconds_bucket{endpoint="/predict",le="+Inf"}'] == after[count]
+        assert after['api_stage_duration_seconds_count{handler="predict",stage="model_predict"}'] >= 1
+        assert after['api_requests_in_flight{endpoint="/predict"}'] == 0
+
+def test_slow_request_sampler_collects_stacks():
+    """Stacks of a request over the threshold are sampled while collapsed() is being read."""
+    sampler = SlowRequestSampler(threshold_seconds=0, interval_seconds=0.001)
+    sampler.start()
+    sampler.enter("predict")
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        sampler.collapsed()
+    sampler.exit()
+
+    stacks = sampler.collapsed(limit=5)["predict"]
+    assert 0 < len(stacks) <= 5
+    assert all("test_metrics.py:test_slow_request_sampler_collects_stacks" in line for line in stacks)
+
+def main():
+    try:
+        test_metrics_exposition_counts_requests()
+        test_slow_request_sampler_collects_stacks()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
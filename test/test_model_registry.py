@@ -0,0 +1,64 @@
+import numpy as np
+import sys
+import os
+import tempfile
+from sklearn.ensemble import RandomForestRegressor
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline
+
+feature_columns = ['date_range_jan_1', 'date_range_jan_2', 'time', 'consumed_power']
+target_columns = ['white_goods', 'lighting']
+
+def make_model(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, len(feature_columns)))
+    y = rng.normal(size=(200, len(target_columns)))
+    return RandomForestRegressor(n_estimators=5, random_state=seed).fit(X, y), X
+
+def test_register_and_load_round_trip():
+    """A registered model loads back, pinned or latest, in both formats."""
+    model, X = make_model()
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        version = registry.register("random_forest", model, build_pipeline(feature_columns),
+                                    feature_columns, target_columns, metrics={"r2": 0.5})
+
+        latest = registry.load("random_forest")
+        pinned = registry.load("random_forest", version[:6], model_format="compact")
+        assert latest.version == pinned.version == version
+        assert latest.feature_columns == feature_columns
+        assert np.allclose(latest.model.predict(X), model.predict(X))
+        assert np.abs(pinned.model.predict(X) - model.predict(X)).max() < 1e-5
+        assert list(latest.encoder.categories_[0]) == ['jan_1', 'jan_2']
+
+def test_versions_are_immutable_and_deduplicated():
+    """Same content gives the same version; new content never overwrites old versions."""
+    first, _ = make_model(0)
+    second, _ = make_model(1)
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        pipeline = build_pipeline(feature_columns)
+        v1 = registry.register("random_forest", first, pipeline, feature_columns, target_columns)
+        assert registry.register("random_forest", first, pipeline, feature_columns, target_columns) == v1
+        v2 = registry.register("random_forest", second, pipeline, feature_columns, target_columns)
+
+        assert v1 != v2
+        assert {m["version"] for m in registry.versions("random_forest")} == {v1, v2}
+        assert registry.resolve("random_forest") == v2
+        assert registry.load("random_forest", v1).version == v1
+        model_file = os.path.join(root, "random_forest", v1, "model.joblib")
+        assert os.stat(model_file).st_mode & 0o222 == 0
+
+def main():
+    try:
+        test_register_and_load_round_trip()
+        test_versions_are_immutable_and_deduplicated()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
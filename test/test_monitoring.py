@@ -0,0 +1,144 @@
+import json
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifacts import load_artifacts
+from app.monitoring import ALL, ReadingsMonitor
+from benchmark.fixture_model import build_fixture_model
+from trainer.model_registry import ModelRegistry
+from trainer.monitoring_profile import build_profile
+from helpers import app_client
+
+def training_readings(n=20000, seed=0):
+    """Half-hourly slots with consumption that rises in the evening."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 48, n) * 1800
+    evening = (seconds >= 17 * 3600) & (seconds < 22 * 3600)
+    return seconds, rng.normal(1.0 + evening, 0.1)
+
+def test_profile_and_slot_anomalies():
+    """A reading far from its slot's training baseline is flagged; ordinary ones are not."""
+    seconds, power = training_readings()
+    profile = build_profile(power, seconds)
+    assert abs(profile["slot_baseline"]["mean"][36] - 2.0) < 0.02 and abs(profile["slot_baseline"]["mean"][10] - 1.0) < 0.02
+    assert abs(sum(profile["consumed_power"]["probabilities"]) - 1) < 1e-9
+
+    monitor = ReadingsMonitor(profile)
+    assert monitor.observe("1", 18 * 3600, 2.05) is None
+    # 2.0 is normal at 18:00 but an anomaly at 05:00
+    anomaly = monitor.observe("1", 5 * 3600, 2.0, "2025-03-01 05:00:00")
+    assert anomaly["reason"] == "slot_baseline" and anomaly["z"] > 4 and anomaly["timestamp"] == "2025-03-01 05:00:00"
+    assert monitor.observe("1", 5 * 3600, float("nan"))["reason"] == "invalid"
+    state = monitor.state()
+    assert state["houses"]["1"]["anomalies"] == 2 and state["all"]["readings"] == 2
+    assert len(state["recent_anomalies"]) == 2
+
+def test_drift_against_training_profile():
+    """Live readings from the training distribution do not drift; doubled consumption does."""
+    seconds, power = training_readings()
+    monitor = ReadingsMonitor(build_profile(power, seconds))
+    live_seconds, live_power = training_readings(n=5000, seed=1)
+    for second, value in zip(live_seconds[:3000].tolist(), live_power[:3000].tolist()):
+        monitor.observe("steady", second, value)
+    monitor.observe_many(np.full(5000, "shifted"), live_seconds, live_power * 2)
+
+    state = monitor.state()
+    assert state["houses"]["steady"]["drift"] == [] and state["houses"]["steady"]["psi"]["consumed_power"] < 0.05
+    assert state["houses"]["shifted"]["drift"] == ["consumed_power"]
+    assert state["drifting_houses"] == ["shifted"]
+    quantiles = state["houses"]["steady"]["consumed_power"]["quantiles"]
+    for name, q in [("p50", 0.5), ("p90", 0.9)]:
+        assert abs(quantiles[name] - np.quantile(live_power[:3000], q)) < 0.05
+
+def test_batches_match_single_readings():
+    """observe_many folds a batch into the same sketches as one observe per reading."""
+    seconds, power = training_readings(n=3000)
+    profile = build_profile(power, seconds)
+    single, batched = ReadingsMonitor(profile), ReadingsMonitor(profile)
+    for second, value in zip(seconds.tolist(), power.tolist()):
+        single.observe("1", second, value)
+    for first in range(0, 3000, 700):
+        batched.observe_many(np.full(len(power[first:first + 700]), "1"), seconds[first:first + 700], power[first:first + 700])
+
+    for a, b in [(single.series["1"], batched.series["1"]), (single.series[ALL], batched.series[ALL])]:
+        assert a.readings == b.readings == 3000
+        np.testing.assert_allclose([a.mean, a.square], [b.mean, b.square], rtol=1e-9)
+        np.testing.assert_allclose(np.asarray(a.power_counts) / sum(a.power_counts),
+                                   np.asarray(b.power_counts) / sum(b.power_counts), atol=1e-9)
+        np.testing.assert_allclose(a.slot_mean, b.slot_mean, rtol=1e-9)
+        assert a.slot_readings == b.slot_readings
+
+def test_memory_is_bounded_by_max_houses():
+    monitor = ReadingsMonitor(max_houses=3)
+    for house in range(10):
+        monitor.observe(house, 0, 1.0)
+    assert sorted(monitor.series) == [ALL, "0", "1", "2", "other"]
+    assert monitor.series["other"].readings == 7
+
+def test_monitor_endpoint():
+    """/predict feeds the monitor, compared with the served version's profile, and /monitor reports it."""
+    with tempfile.TemporaryDirectory() as workdir:
+        model_dir = build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        model, encoder, time_encoder = load_artifacts(model_dir)
+        seconds, power = training_readings()
+        ModelRegistry(os.path.join(model_dir, "registry")).register(
+            "random_forest", model, {"encoder": encoder, "time_encoder": time_encoder},
+            feature_columns=[], target_columns=[], profile=build_profile(power, seconds))
+        client = app_client(workdir)
+
+        for value in (1.0, 1.1, 9.0):
+            response = client.post("/predict", json={"date": "01:03:2025", "time": "05:00:00",
+                                                     "consumed_power": value, "house_id": "7"})
+            assert response.status_code == 200
+        client.post("/predict/stream", content="date,time,consumed_power\n01:03:2025,18:00:00,2.0\n",
+                    headers={"content-type": "text/csv"})
+
+        state = client.get("/monitor").json()
+        assert state["profile"]["readings"] == 20000
+        assert state["houses"]["7"]["readings"] == 3 and state["houses"]["unknown"]["readings"] == 1
+        assert [record["consumed_power"] for record in state["recent_anomalies"]] == [9.0]
+        detail = client.get("/monitor", params={"house_id": "7"}).json()
+        assert detail["slot_baseline"]["readings"][10] == 3
+        assert client.get("/monitor", params={"house_id": "nope"}).status_code == 404
+        json.dumps(state)
+
+def test_monitor_failures_do_not_fail_requests():
+    """A monitor that raises is counted, and the predictions it was watching still go out."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir)
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("monitor is down")
+        monitor = sys.modules["app.main"].monitor
+        monitor.observe = monitor.observe_many = broken
+
+        assert client.post("/predict", json={"date": "01:03:2025", "time": "05:00:00",
+                                             "consumed_power": 1.0}).status_code == 200
+        response = client.post("/predict/stream", content="date,time,consumed_power\n01:03:2025,18:00:00,2.0\n",
+                               headers={"content-type": "text/csv"})
+        record = json.loads(response.text)
+        assert record["row"] == 0 and "error" not in record
+        exposition = client.get("/metrics").text
+        assert 'api_monitor_errors_total{endpoint="/predict"}' in exposition
+        assert 'api_monitor_errors_total{endpoint="/predict/stream"}' in exposition
+
+def main():
+    try:
+        test_profile_and_slot_anomalies()
+        test_drift_against_training_profile()
+        test_batches_match_single_readings()
+        test_memory_is_bounded_by_max_houses()
+        test_monitor_endpoint()
+        test_monitor_failures_do_not_fail_requests()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
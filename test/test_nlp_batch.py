@@ -0,0 +1,64 @@
+import numpy as np
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.fixture_model import build_fixture_model
+from app.nlp import parse_queries
+from helpers import app_client
+
+QUERIES = [
+    "What will my usage look like on 12/03/2025 at 18:30 with 2.5 kW?",
+    "what will my usage   look like on 12/03/2025 at 18:30 with 2.5 KW?",
+    "predict 05-11-2024 07:15:30 4 units",
+    "breakdown for 31/02/2025 at 10:00",
+    "3 kilowatt",
+]
+
+def test_parse_queries_dedupes_and_reports_errors():
+    """Queries equal after normalization share a record; bad dates are reported per query."""
+    now = datetime(2025, 6, 1, 9, 45, 0)
+    records, rows, errors = parse_queries(QUERIES, now=now)
+    assert rows[0] == rows[1]
+    assert rows[3] is None and 3 in errors
+    assert records[rows[0]] == ("2025-03-12", 18 * 3600 + 30 * 60, 2.5)
+    assert records[rows[2]] == ("2024-11-05", 7 * 3600 + 15 * 60 + 30, 4.0)
+    # No date or time in the query: both come from `now`
+    assert records[rows[4]] == ("2025-06-01", 9 * 3600 + 45 * 60, 3.0)
+    assert len(records) == 3
+
+def test_batch_matches_single_query_endpoint():
+    """/nlp_predict/batch returns what /nlp_predict returns for each query, in order."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir, "app.main2")
+        response = client.post("/nlp_predict/batch", json={"queries": QUERIES})
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["results"]) == len(QUERIES)
+        assert body["unique_records"] == 3
+        assert "error" in body["results"][3]
+
+        for query, result in zip(QUERIES, body["results"]):
+            if "error" in result or "kilowatt" in query:
+                continue  # the fallback time differs between the two calls
+            single = client.post("/nlp_predict", json={"query": query}).json()
+            for category, value in single.items():
+                np.testing.assert_allclose(result[category], value)
+
+        assert client.post("/nlp_predict/batch", json={"queries": []}).json()["results"] == []
+
+def main():
+    try:
+        test_parse_queries_dedupes_and_reports_errors()
+        test_batch_matches_single_query_endpoint()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import numpy as np
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.nlp import resolve_slot_grid
+from benchmark.fixture_model import build_fixture_model
+from helpers import app_client
+
+# A Wednesday afternoon
+NOW = datetime(2025, 6, 4, 14, 47, 12)
+
+def span(query):
+    grid = resolve_slot_grid(query, now=NOW)
+    return str(grid.start), str(grid.end), grid.step_minutes, len(grid.slots())
+
+def test_relative_and_ranged_expressions():
+    """Relative days, periods, spans and explicit ranges resolve to the expected slot grids."""
+    assert span("tomorrow evening") == ("2025-06-05T18:00:00", "2025-06-05T22:00:00", 30, 8)
+    assert span("next week at 3 kW") == ("2025-06-09T00:00:00", "2025-06-16T00:00:00", 30, 336)
+    assert span("from 01/05/2025 to 07/05/2025 hourly") == ("2025-05-01T00:00:00", "2025-05-08T00:00:00", 60, 168)
+    assert span("between 01-05-2025 08:00 and 01-05-2025 12:00") == (
+        "2025-05-01T08:00:00", "2025-05-01T12:00:00", 30, 8)
+    assert span("this weekend") == ("2025-06-07T00:00:00", "2025-06-09T00:00:00", 30, 96)
+    assert span("next month every 2 hours") == ("2025-07-01T00:00:00", "2025-08-01T00:00:00", 120, 372)
+    assert span("next 6 hours") == ("2025-06-04T14:30:00", "2025-06-04T20:30:00", 30, 12)
+    assert span("next wednesday")[:2] == ("2025-06-11T00:00:00", "2025-06-12T00:00:00")
+    assert span("from 22:00 to 06:00 on 12/03/2025")[:2] == ("2025-03-12T22:00:00", "2025-03-13T06:00:00")
+    # One slot when the query names a single moment, or none at all
+    assert span("12/03/2025 at 18:30") == ("2025-03-12T18:30:00", "2025-03-12T19:00:00", 30, 1)
+    assert span("5 kW")[3] == 1
+
+    for query in ["from 07/05/2025 to 01/05/2025", "31/02/2025", "next 5000 weeks"]:
+        try:
+            resolve_slot_grid(query, now=NOW)
+        except ValueError:
+            continue
+        raise AssertionError(f"{query!r} should not resolve")
+
+def test_nlp_forecast_endpoint():
+    """Per-slot series match /nlp_predict for the same moment; totals are their sums."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir, "app.main2")
+        body = client.post("/nlp_forecast", json={"query": "from 12/03/2025 18:00 to 12/03/2025 20:00 at 2.5 kW"}).json()
+        assert body["timestamps"] == ["2025-03-12T18:00:00", "2025-03-12T18:30:00",
+                                      "2025-03-12T19:00:00", "2025-03-12T19:30:00"]
+        assert body["consumed_power"] == 2.5
+        for category, total in body["totals"].items():
+            np.testing.assert_allclose(total, sum(body[category]))
+
+        single = client.post("/nlp_predict", json={"query": "12/03/2025 at 19:30 with 2.5 kW"}).json()
+        for category, value in single.items():
+            np.testing.assert_allclose(body[category][3], value)
+
+        assert client.post("/nlp_forecast", json={"query": "from 07/05/2025 to 01/05/2025"}).status_code == 422
+
+def main():
+    try:
+        test_relative_and_ranged_expressions()
+        test_nlp_forecast_endpoint()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
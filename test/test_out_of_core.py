@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.streaming_evaluation import GroupedRegressionMetrics
+from trainer.train_out_of_core import iter_chunks, train
+from trainer.train_all import target_columns, time_columns
+
+def test_streaming_metrics_match_sklearn():
+    """Chunked MSE/MAE/R² equal the sklearn values over the whole array."""
+    rng = np.random.default_rng(1)
+    y_true = rng.normal(size=(1000, 3))
+    y_pred = y_true + rng.normal(scale=0.5, size=y_true.shape)
+    metrics = GroupedRegressionMetrics(3)
+    for start in range(0, len(y_true), 137):
+        metrics.update(y_true[start:start + 137], y_pred[start:start + 137])
+
+    result = metrics.result()
+    assert np.isclose(result["mse"], mean_squared_error(y_true, y_pred))
+    assert np.isclose(result["mae"], mean_absolute_error(y_true, y_pred))
+    assert np.isclose(result["r2"], r2_score(y_true, y_pred))
+
+def test_chunked_training_and_split():
+    """Train/test chunks partition the file and the SGD model learns a linear target."""
+    rng = np.random.default_rng(0)
+    n_rows = 3000
+    data = pd.DataFrame({"date_range_jan_1": rng.integers(0, 2, n_rows).astype(float)})
+    for col in time_columns:
+        data[col] = rng.normal(size=n_rows)
+    for col in target_columns:
+        data[col] = 0.3 * data["consumed_power"] + 0.1
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "prepared.csv")
+        data.to_csv(data_path, index=False)
+        columns = ["date_range_jan_1"] + time_columns
+        train_rows = sum(len(X) for X, _ in iter_chunks(data_path, columns, 400, "train"))
+        test_rows = sum(len(X) for X, _ in iter_chunks(data_path, columns, 400, "test"))
+        assert train_rows + test_rows == n_rows
+
+        _, metrics = train("sgd", data_path, chunk_size=400, epochs=3,
+                           registry_root=os.path.join(workdir, "registry"))
+        assert metrics["rows"] == test_rows
+        assert metrics["r2"] > 0.95
+
+def main():
+    try:
+        test_streaming_metrics_match_sklearn()
+        test_chunked_training_and_split()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifacts import load_artifacts
+from app.features import DATE_RANGE_LABELS, build_feature_frame
+from benchmark.fixture_model import build_fixture_model
+from trainer.model_registry import ModelRegistry
+from trainer.prediction_surface import PredictionSurface, compile_surface, measure_error
+from helpers import app_client
+
+def test_lookup_interpolates_between_grid_points():
+    """Grid points come back exactly; between them values blend, wrapping at midnight and clamping power."""
+    surface = PredictionSurface.empty(1800, 5, 4.0, n_outputs=1)
+    surface.values[2, :, :, 0] = np.arange(48)[:, None] * 10 + np.arange(5)[None, :]
+    assert surface.lookup("jan_3", 3 * 1800, 1.0)[0] == 31
+    assert surface.lookup("jan_3", 3 * 1800 + 900, 1.5)[0] == 36.5
+    # 23:45 blends the last slot with midnight; power above power_max is clamped
+    assert surface.lookup("jan_3", 86400 - 900, 100.0)[0] == (474 + 4) / 2
+
+    labels = ["jan_3", "jan_3", "jan_3"]
+    seconds, power = [3 * 1800, 3 * 1800 + 900, 86400 - 900], [1.0, 1.5, 100.0]
+    np.testing.assert_allclose(surface.predict_parts(surface.label_indices(labels), seconds, power)[:, 0],
+                               [31, 36.5, 239])
+    try:
+        surface.label_indices(["jan_4"])
+        raise AssertionError("unknown labels must be rejected")
+    except ValueError:
+        pass
+
+def test_compiled_surface_reproduces_the_model():
+    """At grid points the surface is the model; elsewhere the measured bound covers the error."""
+    with tempfile.TemporaryDirectory() as workdir:
+        teacher = load_artifacts(build_fixture_model(os.path.join(workdir, "model"), n_estimators=5))
+        model, encoder, time_encoder = teacher
+        surface = compile_surface(teacher, step_minutes=60, power_points=33, power_max=8.0)
+        assert surface.values.shape == (36, 24, 33, 6)
+
+        labels, seconds, power = surface.grid()
+        picks = np.random.default_rng(0).integers(0, len(labels), 500)
+        X = build_feature_frame(DATE_RANGE_LABELS[labels[picks]], seconds[picks], power[picks], encoder, time_encoder)
+        np.testing.assert_allclose(surface.predict(X), model.predict(X), rtol=1e-6, atol=1e-6)
+
+        surface.error = measure_error(teacher, surface, n_samples=2000)
+        assert 0 < surface.error["mae"] <= surface.error["p99_abs_error"] <= surface.error["max_abs_error"]
+        assert set(surface.error["slot_times"]) == {"max_abs_error", "p99_abs_error", "mae"}
+
+        path = os.path.join(workdir, "surface")
+        surface.save(path)
+        previous = PredictionSurface.load(path)
+        surface.save(path)
+        # A reader of the replaced surface keeps its mapping; the swap leaves nothing behind
+        np.testing.assert_allclose(previous.predict(X), surface.predict(X))
+        assert sorted(os.listdir(workdir)) == ["model", "surface"]
+        loaded = PredictionSurface.load(path)
+        assert isinstance(np.load(os.path.join(path, "values.npy"), mmap_mode="r"), np.memmap)
+        assert loaded.error == surface.error
+        np.testing.assert_allclose(loaded.predict(X), surface.predict(X))
+
+def test_surface_serving_mode():
+    """MODEL_FORMAT=surface loads the surface compiled beside a registry version and /predict uses it."""
+    with tempfile.TemporaryDirectory() as workdir:
+        model_dir = build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        teacher = load_artifacts(model_dir)
+        model, encoder, time_encoder = teacher
+        registry = ModelRegistry(os.path.join(model_dir, "registry"))
+        version = registry.register("random_forest", model, {"encoder": encoder, "time_encoder": time_encoder},
+                                    feature_columns=[], target_columns=[])
+        surface = compile_surface(teacher, power_points=65, power_max=8.0)
+        surface.save(registry.surface_path("random_forest", version))
+        # The surface directory is not mistaken for a version
+        assert registry.resolve("random_forest", version[:4]) == version
+        client = app_client(workdir, MODEL_FORMAT="surface")
+
+        body = client.post("/predict", json={"date": "01:03:2025", "time": "18:30:00", "consumed_power": 2.4}).json()
+        expected = surface.lookup("mar_1", 18 * 3600 + 1800, 2.4)
+        np.testing.assert_allclose(list(body.values()), expected)
+        X = build_feature_frame(["mar_1"], [18 * 3600 + 1800], [2.4], encoder, time_encoder)
+        assert np.abs(model.predict(X)[0] - expected).max() < 0.5
+
+        forecast = client.post("/forecast", json={"start_date": "01:03:2025", "start_time": "18:30:00",
+                                                  "horizon_hours": 2, "consumed_power": 2.4}).json()
+        assert len(forecast["lighting"]) == 4
+        np.testing.assert_allclose(forecast["lighting"][0], expected[3])
+
+def main():
+    try:
+        test_lookup_interpolates_between_grid_points()
+        test_compiled_surface_reproduces_the_model()
+        test_surface_serving_mode()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import httpx
+import os
+import queue
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add the repository root to the Python path
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+
+from benchmark.fixture_model import build_fixture_model
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def expect(lines, pattern, timeout=60):
+    """Wait for an output line matching pattern and return the match."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            line = lines.get(timeout=max(deadline - time.time(), 0))
+        except queue.Empty:
+            break
+        match = re.search(pattern, line)
+        if match:
+            return match
+    raise AssertionError(f"no output matching {pattern!r} within {timeout}s")
+
+def test_killed_worker_is_restarted():
+    """The master replaces a worker that dies, and the shared socket keeps serving."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        port = free_port()
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        master = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "app", "prefork.py"),
+                                   "--port", str(port), "--workers", "2", "--log-level", "warning"],
+                                  cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        lines = queue.Queue()
+        threading.Thread(target=lambda: [lines.put(line) for line in master.stdout], daemon=True).start()
+        try:
+            workers = {int(expect(lines, r"Worker (\d+) ready").group(1)) for _ in range(2)}
+            payload = {"date": "01:03:2025", "time": "18:30:00", "consumed_power": 2.4}
+            url = f"http://127.0.0.1:{port}/predict"
+            # Ready is printed just before uvicorn starts, so allow it a moment to accept
+            deadline = time.time() + 30
+            while True:
+                try:
+                    before = httpx.post(url, json=payload, timeout=10).json()
+                    break
+                except httpx.TransportError:
+                    if time.time() > deadline:
+                        raise
+                    time.sleep(0.2)
+
+            victim = workers.pop()
+            os.kill(victim, signal.SIGKILL)
+            expect(lines, rf"Worker {victim} exited with status -9, restarting")
+            replacement = int(expect(lines, r"Worker (\d+) ready").group(1))
+            assert replacement not in (victim, *workers)
+
+            for _ in range(10):
+                assert httpx.post(url, json=payload, timeout=10).json() == before
+        finally:
+            master.terminate()
+            master.wait(timeout=30)
+        assert master.returncode == 0
+
+def main():
+    try:
+        test_killed_worker_is_restarted()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import json
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import trainer.profiling as profiling
+from trainer.profiling import RunProfiler, best_time
+
+def busy_fit(seconds=0.2):
+    """Allocate and spin so the stage has measurable CPU time and memory."""
+    blocks = [np.ones(2_000_000) for _ in range(10)]
+    total = 0.0
+    end = os.times().elapsed + seconds
+    while os.times().elapsed < end:
+        total += sum(block[:1000].sum() for block in blocks)
+    return total
+
+def test_stages_report_and_sampled_profile():
+    """Stages record wall/CPU/peak RSS, and a sampled stage writes collapsed stacks."""
+    with tempfile.TemporaryDirectory() as workdir:
+        profiler = RunProfiler("test", sample_stages=["fit"], interval_seconds=0.005)
+        with profiler.stage("load"):
+            np.zeros(10)
+        with profiler.stage("fit"):
+            busy_fit()
+        artifact = os.path.join(workdir, "model.npy")
+        np.save(artifact, np.zeros(1000))
+        profiler.add_artifact(artifact, "model")
+
+        report_path = profiler.write(os.path.join(workdir, "run.json"))
+        with open(report_path) as f:
+            report = json.load(f)
+
+        load, fit = report["stages"]
+        assert [load["stage"], fit["stage"]] == ["load", "fit"]
+        assert fit["wall_seconds"] >= 0.2 and fit["cpu_seconds"] > 0.1
+        # Ten 16 MB blocks were alive during fit
+        assert fit["peak_rss_mb"] - fit["rss_before_mb"] > 100 or fit["peak_rss_scope"] == "process"
+        assert report["artifacts"]["model"]["bytes"] == os.path.getsize(artifact)
+        with open(os.path.join(workdir, "run.fit.collapsed")) as f:
+            assert "busy_fit" in f.read()
+
+def test_best_time_keeps_the_fastest_call():
+    """best_time runs the function `repeat` times and returns the quickest run."""
+    clock = [0.0]
+    durations = iter([0.5, 0.25, 0.75])
+    def call():
+        clock[0] += next(durations)
+    original = profiling.time.perf_counter
+    profiling.time.perf_counter = lambda: clock[0]
+    try:
+        assert best_time(call, repeat=3) == 0.25
+    finally:
+        profiling.time.perf_counter = original
+
+def main():
+    try:
+        test_stages_report_and_sampled_profile()
+        test_best_time_keeps_the_fastest_call()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
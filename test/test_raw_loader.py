@@ -0,0 +1,75 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.raw_loader import convert_files, detect_schema
+from storage.readings_store import ReadingsStore
+
+OLD_FORMAT = """house_id,date,time,white_goods,entertainment,air_conditioners,lighting,ev_charges,meter_reading
+1,2024-01-31,23:30:00,0.5,0.01,1.0,0.0,0.0,100.0
+1,2024-02-01,00:00:00,0.25,0.02,0.5,0.0,0.0,100.77
+2,2024-02-01,00:00:00,0.1,0.0,0.0,0.08,0.0,50.18
+"""
+
+# DD-MM-YYYY dates, a date_range column and `lighting` listed again among the devices
+DUPLICATE_LIGHTING = """house_id,date,date_range,time,white_goods,entertainment,air_conditioners,lighting,ev_charges,meter_reading,consumed_power,fridge,tv,lighting,ac
+1,01-02-2024,feb_1,00:00:00,0.3,0.02,0.5,0.04,0.0,100.86,0.86,0.3,0.02,0.04,0.5
+1,01-02-2024,feb_1,00:30:00,0.3,0.02,0.5,0.0,0.0,101.68,0.82,0.3,0.02,0.0,0.5
+"""
+
+def write(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+def test_detect_schema():
+    """Date formats, derived and missing columns and the repeated lighting header are detected."""
+    with tempfile.TemporaryDirectory() as workdir:
+        old = detect_schema(write(workdir, "a.csv", OLD_FORMAT))
+        assert old["date_format"] == "%Y-%m-%d"
+        assert old["derived"] == ["consumed_power"]
+        assert "utility_appliances" in old["missing"] and old["dropped"] == []
+
+        duplicate = detect_schema(write(workdir, "b.csv", DUPLICATE_LIGHTING))
+        assert duplicate["date_format"] == "%d-%m-%Y"
+        assert duplicate["columns"]["lighting"] == 7 and duplicate["columns"]["device_lighting"] == 13
+        assert duplicate["dropped"] == ["date_range"] and duplicate["derived"] == []
+
+def test_convert_files_serial_and_parallel():
+    """Both files load into the canonical schema; a later file wins on overlapping readings."""
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = [write(workdir, "a.csv", OLD_FORMAT), write(workdir, "b.csv", DUPLICATE_LIGHTING)]
+        serial, parallel = os.path.join(workdir, "serial"), os.path.join(workdir, "parallel")
+        assert convert_files(paths, serial, workers=1) == 5
+        assert convert_files(paths, parallel, workers=2) == 5
+
+        for root in (serial, parallel):
+            store = ReadingsStore(root)
+            assert store.houses() == ["1", "2"]
+            rows = store.query(1)
+            assert [str(ts) for ts in rows["timestamp"]] == [
+                "2024-01-31T23:30:00", "2024-02-01T00:00:00", "2024-02-01T00:30:00"]
+            # Derived for the old file, read from the file for the newer one
+            np.testing.assert_allclose(rows["consumed_power"], [1.51, 0.86, 0.82])
+            np.testing.assert_allclose(rows["device_lighting"][1:], [0.04, 0.0])
+            assert np.isnan(rows["device_lighting"][0])
+            assert set(store.manifest()["sources"]) == {os.path.abspath(path) for path in paths}
+
+        # Unchanged files are skipped on the next run
+        assert convert_files(paths, serial) == 0
+
+def main():
+    try:
+        test_detect_schema()
+        test_convert_files_serial_and_parallel()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
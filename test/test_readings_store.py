@@ -0,0 +1,80 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.fixture_model import build_fixture_model
+from storage.readings_store import ReadingsStore
+from helpers import app_client, make_readings
+
+def test_bulk_load_and_range_queries():
+    """Rows land in per-house monthly partitions and come back sorted for any range."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ReadingsStore(root)
+        chunk = make_readings([1, 2, 3], start="2025-02-27", slots=48 * 6)
+        order = np.random.default_rng(1).permutation(len(chunk["timestamp"]))
+        assert store.bulk_load([{col: values[order] for col, values in chunk.items()}]) == len(order)
+
+        assert store.houses() == ["1", "2", "3"]
+        assert sorted(store.partitions(3)) == ["2025-02", "2025-03"]
+        march = store.query(3, "2025-03-01", "2025-04-01", ["air_conditioners"])
+        assert len(march["timestamp"]) == 48 * 4
+        assert np.all(np.diff(march["timestamp"]) == np.timedelta64(30, 'm'))
+        expected = chunk["air_conditioners"][(chunk["house_id"] == "3") & (chunk["timestamp"] >= np.datetime64("2025-03-01"))]
+        np.testing.assert_array_equal(march["air_conditioners"], expected)
+
+        # A range crossing the partition boundary, and an empty one
+        across = store.query("3", "2025-02-28T23:00", "2025-03-01T01:00")
+        assert len(across["timestamp"]) == 4 and set(across) == set(chunk) - {"house_id"}
+        assert len(store.query(3, "2026-01-01", "2026-02-01")["timestamp"]) == 0
+
+def test_reload_replaces_and_new_columns_read_as_nan():
+    """Loading a timestamp again replaces it; columns older partitions lack read as NaN."""
+    with tempfile.TemporaryDirectory() as root:
+        ReadingsStore(root).bulk_load([make_readings([1], start="2025-02-27", slots=48)])
+        update = make_readings([1], start="2025-02-27T12:00", slots=48, seed=5)
+        update["fridge"] = np.ones(48)
+        # A second store instance stands in for another process loading data
+        ReadingsStore(root).bulk_load([update])
+
+        store = ReadingsStore(root)
+        rows = store.query(1)
+        assert len(rows["timestamp"]) == 72
+        np.testing.assert_array_equal(rows["consumed_power"][24:], update["consumed_power"])
+        assert np.isnan(rows["fridge"][:24]).all() and (rows["fridge"][24:] == 1).all()
+        try:
+            store.query(1, columns=["nope"])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("unknown columns should raise")
+
+def test_readings_endpoint():
+    """/readings serves a house's range, with 404 for unknown houses and 422 for bad ranges."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        store_root = os.path.join(workdir, "store")
+        ReadingsStore(store_root).bulk_load([make_readings([1, 2], start="2025-02-27", slots=48 * 6)])
+        client = app_client(workdir, READINGS_STORE=store_root)
+
+        body = client.get("/readings", params={"house_id": 2, "start": "2025-03-01T10:00", "end": "2025-03-01T11:00",
+                                               "columns": "consumed_power"}).json()
+        assert body["rows"] == 2 and body["timestamps"] == ["2025-03-01T10:00:00", "2025-03-01T10:30:00"]
+        assert set(body) == {"house_id", "rows", "timestamps", "consumed_power"}
+        assert client.get("/readings", params={"house_id": 9}).status_code == 404
+        assert client.get("/readings", params={"house_id": 1, "start": "March"}).status_code == 422
+
+def main():
+    try:
+        test_bulk_load_and_range_queries()
+        test_reload_replaces_and_new_columns_read_as_nan()
+        test_readings_endpoint()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.fixture_model import build_fixture_model
+from storage.readings_store import ReadingsStore
+from storage.rollups import RollupEngine
+from helpers import app_client, make_readings
+
+def make_chunk(house_ids):
+    """Readings over January to mid-March with a gap in air_conditioners."""
+    return make_readings(house_ids, start="2025-01-01", slots=48 * 70, missing=slice(100, 110))
+
+def test_rollups_match_pandas():
+    """Sums, peaks and time-of-use sums agree with a pandas groupby at every level."""
+    with tempfile.TemporaryDirectory() as root:
+        chunk = make_chunk([1])
+        ReadingsStore(root).bulk_load([chunk])
+        engine = RollupEngine(root)
+        assert engine.refresh() == {"1": ["2025-01", "2025-02", "2025-03"]}
+
+        frame = pd.DataFrame({"air_conditioners": chunk["air_conditioners"], "consumed_power": chunk["consumed_power"]},
+                             index=pd.DatetimeIndex(chunk["timestamp"]))
+        for level, period in [("daily", "D"), ("weekly", "W-SUN"), ("monthly", "M")]:
+            expected = frame.groupby(frame.index.to_period(period))
+            rows = engine.lookup(1, level)
+            assert len(rows["period"]) == expected.ngroups
+            np.testing.assert_allclose(rows["air_conditioners.sum"], expected["air_conditioners"].sum())
+            np.testing.assert_allclose(rows["air_conditioners.peak"], expected["air_conditioners"].max())
+            np.testing.assert_allclose(rows["consumed_power.peak"], expected["consumed_power"].max())
+            np.testing.assert_array_equal(rows["rows"], expected.size())
+
+        february = engine.get(1, "monthly", "2025-02")
+        hours = frame.index.hour
+        in_february = frame.index.month == 2
+        peak_hours = frame["consumed_power"][in_february & (hours >= 17) & (hours < 22)].sum()
+        np.testing.assert_allclose(february["consumed_power.tou_peak"], peak_hours)
+        np.testing.assert_allclose(february["consumed_power.tou_off_peak"] + february["consumed_power.tou_standard"]
+                                   + february["consumed_power.tou_peak"], february["consumed_power.sum"])
+        # Categories without readings are NaN rather than zero
+        assert np.isnan(february["ev_charges.sum"])
+
+def test_refresh_recomputes_only_touched_partitions():
+    """A load into one month of one house recomputes just that partition, and weeks crossing it."""
+    with tempfile.TemporaryDirectory() as root:
+        ReadingsStore(root).bulk_load([make_chunk([1, 2])])
+        engine = RollupEngine(root)
+        engine.refresh()
+        before = engine.lookup(1, "daily", "2025-01-01", "2025-02-01")["consumed_power.sum"].copy()
+        assert engine.refresh() == {}
+
+        ReadingsStore(root).bulk_load([{"house_id": ["2"], "timestamp": [np.datetime64("2025-02-24T18:00")],
+                                        "consumed_power": [100.0]}])
+        assert engine.refresh() == {"2": ["2025-02"]}
+        assert engine.get(2, "daily", "2025-02-24")["consumed_power.peak"] == 100.0
+        assert engine.get(2, "weekly", "2025-02-26")["consumed_power.peak"] == 100.0
+        assert engine.get(2, "monthly", "2025-02")["consumed_power.peak"] == 100.0
+        assert engine.get(1, "monthly", "2025-02")["consumed_power.peak"] < 5
+        np.testing.assert_array_equal(engine.lookup(1, "daily", "2025-01-01", "2025-02-01")["consumed_power.sum"], before)
+
+        # Another instance (another process) sees the refreshed rollups
+        assert RollupEngine(root).get(2, "daily", "2025-02-24")["consumed_power.peak"] == 100.0
+
+def test_rollups_endpoint():
+    """/rollups serves one house's periods, with 404 for unknown houses and 422 for bad levels."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        store_root = os.path.join(workdir, "store")
+        ReadingsStore(store_root).bulk_load([make_chunk([1, 2])])
+        RollupEngine(store_root).refresh()
+
+        client = app_client(workdir, READINGS_STORE=store_root)
+
+        body = client.get("/rollups", params={"house_id": 2, "level": "monthly", "start": "2025-02",
+                                              "names": "consumed_power.sum,ev_charges.peak"}).json()
+        assert body["periods"] == ["2025-02", "2025-03"]
+        assert set(body) == {"house_id", "level", "periods", "consumed_power.sum", "ev_charges.peak"}
+        assert body["ev_charges.peak"] == [None, None]
+        assert client.get("/rollups", params={"house_id": 9}).status_code == 404
+        assert client.get("/rollups", params={"house_id": 1, "level": "hourly"}).status_code == 422
+
+def main():
+    try:
+        test_rollups_match_pandas()
+        test_refresh_recomputes_only_touched_partitions()
+        test_rollups_endpoint()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
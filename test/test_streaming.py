@@ -0,0 +1,69 @@
+import json
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.streaming import CsvChunkParser, NdjsonChunkParser
+from benchmark.fixture_model import build_fixture_model
+from helpers import app_client
+
+def test_parsers_set_aside_malformed_rows():
+    """Short CSV rows and bad JSON lines are reported by offset; NDJSON keys come from every record."""
+    parser = CsvChunkParser()
+    columns, rows, errors = parser.parse([b"date,time,consumed_power", b"01:03:2025,18:00:00,2.0", b"bad,row"])
+    assert columns == {"date": ["01:03:2025"], "time": ["18:00:00"], "consumed_power": ["2.0"]}
+    assert rows == [0] and errors == [(1, "Expected 3 fields, got 2")]
+    # Later chunks have no header
+    assert parser.parse([b"02:03:2025,06:00:00,1.0"])[1] == [0]
+
+    lines = [b'{"date": "01:03:2025", "time": "18:00:00", "consumed_power": 2.0}', b"{oops",
+             b'{"date_range": "mar_1", "time": "18:00:00", "consumed_power": 2.0}']
+    columns, rows, errors = NdjsonChunkParser().parse(lines)
+    assert columns["date"] == ["01:03:2025", None] and columns["date_range"] == [None, "mar_1"]
+    assert rows == [0, 2] and [offset for offset, _ in errors] == [1]
+
+def test_stream_reports_bad_rows_inline():
+    """Bad rows get an error line under their own row number; the rest of the chunk is still scored."""
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture_model(os.path.join(workdir, "model"), n_estimators=5)
+        client = app_client(workdir)
+
+        body = "\n".join(["date,time,consumed_power", "01:03:2025,18:00:00,2.0", "bad,row",
+                          "01:03:2025,18:30:00,2.5", "31:02:2025,19:00:00,1.0", "01:03:2025,19:30:00,3.0"])
+        # Two rows per chunk, so the header shares the first chunk with data
+        response = client.post("/predict/stream", params={"chunk_size": 2}, content=body,
+                               headers={"content-type": "text/csv"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["row"] for record in records] == [0, 1, 2, 3, 4]
+        assert [record["row"] for record in records if "error" in record] == [1, 3]
+
+        single = client.post("/predict", json={"date": "01:03:2025", "time": "18:30:00", "consumed_power": 2.5}).json()
+        np.testing.assert_allclose([records[2][category] for category in single], list(single.values()))
+
+        # date and date_range records can share a chunk
+        lines = [json.dumps({"date": "01:03:2025", "time": "18:30:00", "consumed_power": 2.5}),
+                 json.dumps({"date_range": "mar_1", "time": "18:30:00", "consumed_power": 2.5})]
+        response = client.post("/predict/stream", content="\n".join(lines),
+                               headers={"content-type": "application/x-ndjson"})
+        first, second = [json.loads(line) for line in response.text.splitlines()]
+        assert first == {**second, "row": 0}
+
+        # A missing column still fails the chunk, counted in data rows
+        response = client.post("/predict/stream", content="date,consumed_power\n01:03:2025,2.0\n01:03:2025,2.5",
+                               headers={"content-type": "text/csv"})
+        assert json.loads(response.text) == {"error": "Missing column: time", "first_row": 0, "rows": 2}
+
+def main():
+    try:
+        test_parsers_set_aside_malformed_rows()
+        test_stream_reports_bad_rows_inline()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.streaming_evaluation import DensityHistogram, StreamingEvaluator
+
+def make_frame(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "house_id": rng.choice(["house_1", "house_2", "house_3"], rows),
+        "date_range": rng.choice(["Jan-Mar", "Apr-Jun"], rows),
+        "consumed_power": rng.uniform(0, 5000, rows),
+        "time": rng.integers(0, 86400, rows),
+    })
+    # Large offsets make naive sum-of-squares R² lose precision
+    frame["lighting"] = 1e6 + 0.1 * frame["consumed_power"] + rng.normal(0, 20, rows)
+    frame["ev_charges"] = 0.3 * frame["consumed_power"] + rng.normal(0, 50, rows)
+    return frame
+
+def test_chunked_metrics_match_full_evaluation():
+    """Chunked running sums give the same overall and per-group metrics as sklearn on all rows."""
+    frame = make_frame()
+    inputs, outputs = ["consumed_power", "time"], ["lighting", "ev_charges"]
+    model = LinearRegression().fit(frame[inputs], frame[outputs])
+    y_true, y_pred = frame[outputs].to_numpy(), model.predict(frame[inputs])
+
+    evaluator = StreamingEvaluator(model, inputs, outputs, bins=50)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "eval.csv")
+        frame.to_csv(path, index=False)
+        evaluator.evaluate_csv(path, chunk_size=700)
+        assert os.path.exists(evaluator.plot(os.path.join(workdir, "plot.png")))
+
+    assert evaluator.rows == len(frame)
+    overall = evaluator.per_target()
+    np.testing.assert_allclose(overall["mse"], mean_squared_error(y_true, y_pred, multioutput="raw_values"))
+    np.testing.assert_allclose(overall["mae"], mean_absolute_error(y_true, y_pred, multioutput="raw_values"))
+    np.testing.assert_allclose(overall["r2"], r2_score(y_true, y_pred, multioutput="raw_values"), rtol=1e-6)
+
+    per_house = evaluator.by_house.per_group()
+    assert list(per_house.index) == ["house_1", "house_2", "house_3"]
+    mask = (frame["house_id"] == "house_2").to_numpy()
+    assert per_house.loc["house_2", "rows"] == mask.sum()
+    np.testing.assert_allclose(per_house.loc["house_2", "r2"], r2_score(y_true[mask], y_pred[mask]), rtol=1e-6)
+    assert set(evaluator.by_date_range.per_group().index) == {"Jan-Mar", "Apr-Jun"}
+
+    for category in outputs:
+        assert evaluator.histograms[category].counts.sum() == len(frame)
+
+def test_histogram_range_grows_without_losing_counts():
+    """Out-of-range values widen the shared range; every point stays counted on the diagonal."""
+    histogram = DensityHistogram(bins=10)
+    small = np.linspace(0, 1, 100)
+    histogram.update(small, small)
+    large = np.linspace(-5, 20, 300)
+    histogram.update(large, large)
+    assert histogram.low <= -5 and histogram.high >= 20
+    assert histogram.counts.sum() == 400
+    assert np.trace(histogram.counts) == 400
+    assert histogram.counts.shape == (10, 10)
+
+def main():
+    try:
+        test_chunked_metrics_match_full_evaluation()
+        test_histogram_range_grows_without_losing_counts()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+from sklearn.linear_model import LinearRegression
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.time_series_cv import (StandardizeFeatures, TimeSeriesCV, cross_validate, load_time_ordered,
+                                    prepare_time_ordered, take_rows)
+from trainer.train_all import target_columns
+
+def make_houses_csv(path, rows_per_house=(240, 200, 240), seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for house_id, n_rows in enumerate(rows_per_house, start=1):
+        step = np.arange(n_rows, dtype=float)
+        frame = pd.DataFrame({"house_id": house_id, "time": step, "consumed_power": rng.gamma(2.0, 1.0, n_rows)})
+        for col in target_columns:
+            frame[col] = 0.2 * frame["consumed_power"]
+        frames.append(frame)
+    pd.concat(frames).to_csv(path, index=False)
+
+def test_folds_respect_time_and_are_views():
+    """Training rows precede the test block by the gap in every house, and folds are views."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "houses.csv")
+        make_houses_csv(data_path)
+        ordered_dir = prepare_time_ordered(data_path, ["time", "consumed_power"],
+                                           cache_root=os.path.join(workdir, "cache"))
+        arrays = load_time_ordered(ordered_dir)
+
+        for mode, kwargs in [("expanding", {}), ("sliding", {"max_train_size": 60}), ("blocked", {})]:
+            cv = TimeSeriesCV(n_splits=4, gap=10, mode=mode, **kwargs)
+            for fold in cv.split(arrays["steps"]):
+                # The "time" column holds each row's step within its house
+                test_steps = take_rows(arrays["X"], fold["test"])[:, 0]
+                train_steps = take_rows(arrays["X"], fold["train"])[:, 0]
+                assert len(np.unique(take_rows(np.load(os.path.join(ordered_dir, "house.npy")), fold["test"]))) >= 2
+                distance = np.abs(train_steps[:, None] - test_steps[None, :]).min()
+                assert distance > 10
+                if mode != "blocked":
+                    assert train_steps.max() < test_steps.min()
+                    assert isinstance(take_rows(arrays["X"], fold["train"]), np.memmap)
+
+def test_cross_validate_with_cached_fold_features():
+    """Folds evaluate in parallel and the second run reuses the cached fold features."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "houses.csv")
+        make_houses_csv(data_path)
+        cache_root = os.path.join(workdir, "cache")
+        cv = TimeSeriesCV(n_splits=3, gap=5)
+        kwargs = dict(data_path=data_path, cv=cv, featurizer=StandardizeFeatures(), workers=2,
+                      cache_root=cache_root, input_columns=["time", "consumed_power"])
+
+        first = cross_validate(LinearRegression(), **kwargs)
+        cached = [name for name in os.listdir(os.path.join(cache_root, "fold_features"))]
+        second = cross_validate(LinearRegression(), **kwargs)
+
+        assert len(first) == 3 and (first["r2"] > 0.99).all()
+        assert np.allclose(first["mse"], second["mse"])
+        assert os.listdir(os.path.join(cache_root, "fold_features")) == cached
+
+def test_files_without_houses_are_rejected():
+    """Without house_id the file order is house by house, so there is no time order to split on."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "houses.csv")
+        make_houses_csv(data_path)
+        pd.read_csv(data_path).drop(columns="house_id").to_csv(data_path, index=False)
+        try:
+            prepare_time_ordered(data_path, ["time", "consumed_power"], cache_root=os.path.join(workdir, "cache"))
+            raise AssertionError("a file without house_id must be rejected")
+        except ValueError as e:
+            assert "house_id" in str(e)
+
+def main():
+    try:
+        test_folds_respect_time_and_are_views()
+        test_cross_validate_with_cached_fold_features()
+        test_files_without_houses_are_rejected()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
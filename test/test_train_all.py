@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sklearn.model_selection import train_test_split
+from trainer.train_all import HOLDOUT, LSTM_HOLDOUT, allocate_cores, run, target_columns, time_columns
+from trainer.train_xgboost import build_training_cache, load_training_cache
+from trainer.model_registry import ModelRegistry
+
+def test_allocate_cores_respects_budget():
+    """Every family gets a core and the shares never exceed the budget."""
+    families = ["linear", "random_forest", "xgboost", "lstm"]
+    for budget in range(1, 17):
+        allocation, concurrency = allocate_cores(families, budget)
+        assert min(allocation.values()) >= 1
+        assert concurrency == min(budget, len(families))
+        if budget >= len(families):
+            assert sum(allocation.values()) == budget
+
+def test_run_trains_families_from_one_load():
+    """Linear, random forest and XGBoost are scored on the same rows and land in the registry."""
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    data = pd.DataFrame({"date_range_jan_1": rng.integers(0, 2, n_rows).astype(float)})
+    for col in time_columns:
+        data[col] = rng.normal(size=n_rows)
+    for col in target_columns:
+        data[col] = data["consumed_power"] * rng.random()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "prepared.csv")
+        data.to_csv(data_path, index=False)
+        registry_root = os.path.join(workdir, "registry")
+        cache_root = os.path.join(workdir, "cache")
+        table = run(["linear", "random_forest", "xgboost", "lstm"], data_path, cores=4, registry_root=registry_root,
+                    output_path=os.path.join(workdir, "metrics.csv"), xgboost_cache_root=cache_root,
+                    lstm_path=os.path.join(workdir, "lstm_model.keras"))
+
+        assert list(table.index) == ["linear", "random_forest", "xgboost", "lstm"]
+        assert table.loc["linear", "r2"] > 0.99
+        assert (table.loc[["linear", "random_forest", "xgboost"], "holdout"] == HOLDOUT).all()
+        for family in ["linear", "random_forest", "xgboost"]:
+            assert ModelRegistry(registry_root).resolve(family) == table.loc[family, "version"]
+            assert table.loc[family, "artifact"] == ModelRegistry(registry_root).version_path(
+                family, table.loc[family, "version"])
+        # The served family carries the monitoring profile of its training rows
+        assert ModelRegistry(registry_root).load("random_forest").profile["readings"] == int(len(data) * 0.8)
+        # No house_id: the LSTM cannot window houses and fails on its own, in its own table
+        assert table.loc["lstm", "holdout"] == LSTM_HOLDOUT and "house_id" in table.loc["lstm", "error"]
+
+        # The cached XGBoost hold-out is the same rows the other families are scored on
+        arrays, _ = load_training_cache(build_training_cache(data_path, cache_root))
+        _, test_rows = train_test_split(np.arange(n_rows), test_size=0.2, random_state=42)
+        np.testing.assert_allclose(arrays["y_val"], data[target_columns].to_numpy()[test_rows], rtol=1e-6)
+
+def main():
+    try:
+        test_allocate_cores_respects_budget()
+        test_run_trains_families_from_one_load()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import os
+import tempfile
+
+# Add the trainer directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.train_xgboost import build_training_cache, train
+from helpers import make_prepared_csv
+
+def test_cache_is_reused_and_early_stopping_trims():
+    """A second run reuses the cached matrices and the booster ends at the best round."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "prepared.csv")
+        make_prepared_csv(data_path)
+        cache_root = os.path.join(workdir, "cache")
+
+        cache_dir = build_training_cache(data_path, cache_root)
+        built_at = os.path.getmtime(os.path.join(cache_dir, "X_train.npy"))
+        _, metrics = train(data_path, params={"learning_rate": 0.3}, num_boost_round=300,
+                           early_stopping_rounds=5, cache_root=cache_root,
+                           registry_root=os.path.join(workdir, "registry"))
+
+        assert os.listdir(cache_root) == [os.path.basename(cache_dir)]
+        assert os.path.getmtime(os.path.join(cache_dir, "X_train.npy")) == built_at
+        assert metrics["best_iteration"] < 299
+        assert metrics["r2"] > 0.9
+        assert set(metrics["stage_seconds"]) == {"load", "prepare", "fit", "evaluate"}
+
+def main():
+    try:
+        test_cache_is_reused_and_early_stopping_trims()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import numpy as np
+import sys
+import os
+import tempfile
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.validation import ReadingsValidator, validate_file
+from helpers import make_readings
+
+def split(chunk, *bounds):
+    edges = [0, *bounds, len(chunk["timestamp"])]
+    return [{col: values[first:last] for col, values in chunk.items()} for first, last in zip(edges, edges[1:])]
+
+def test_clean_readings_are_valid_across_chunks():
+    """Interleaved houses split at arbitrary rows still validate, carrying state between chunks."""
+    chunk = make_readings([1, 2, 3])
+    order = np.argsort(np.tile(np.arange(96), 3), kind="stable")
+    interleaved = {col: values[order] for col, values in chunk.items()}
+    validator = ReadingsValidator()
+    for part in split(interleaved, 1, 100, 101, 250):
+        validator.update(part)
+    report = validator.report()
+    assert report["valid"] and report["rows"] == 288
+    assert report["houses"]["2"]["first"] == "2025-03-01T00:00:00" and report["houses"]["2"]["last"] == "2025-03-02T23:30:00"
+
+def test_violations_are_counted_per_house():
+    """Gaps, duplicates, a meter jump, a wrong category and accumulated drift are each reported."""
+    chunk = make_readings([1, 2])
+    house_1 = chunk["house_id"] == "1"
+    chunk["lighting"][5] += 0.5                      # house 1: categories no longer add up
+    chunk["meter_reading"][10:96] += 0.3             # house 1: one jump, then a constant offset
+    keep = np.ones(len(house_1), dtype=bool)
+    keep[96 + 40:96 + 43] = False                    # house 2: three missing slots
+    chunk = {col: values[keep] for col, values in chunk.items()}
+    chunk = {col: np.insert(values, 96 + 60, values[96 + 60]) for col, values in chunk.items()}  # house 2: repeated row
+
+    validator = ReadingsValidator()
+    for part in split(chunk, 50, 120):
+        validator.update(part)
+    report = validator.report()
+    assert not report["valid"]
+    assert report["houses"]["1"]["violations"] == {"meter_continuity": 1, "category_sum": 1, "meter_drift": 86}
+    assert report["houses"]["1"]["max_meter_drift"] == 0.3
+    assert report["houses"]["2"]["violations"] == {"gap": 1, "duplicate": 1}
+    assert report["houses"]["2"]["missing_slots"] == 3
+    assert report["examples"]["gap"] == [{"house_id": "2", "timestamp": "2025-03-01T21:30:00", "missing_slots": 3}]
+    assert report["examples"]["meter_continuity"][0]["timestamp"] == "2025-03-01T05:00:00"
+
+def test_validate_file():
+    """A raw CSV is read with its detected layout; only meter, category and key columns are used."""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "readings.csv")
+        with open(path, "w") as f:
+            f.write("house_id,date,time,white_goods,lighting,meter_reading,consumed_power,fridge\n"
+                    "1,01-03-2025,00:00:00,0.5,0.1,10.6,0.6,0.5\n"
+                    "1,01-03-2025,00:30:00,0.5,0.1,11.2,0.6,0.5\n"
+                    "1,01-03-2025,01:30:00,0.5,0.1,12.0,0.6,0.5\n")
+        report = validate_file(path)
+        assert report["rows"] == 3 and report["violations"]["gap"] == 1
+        # Continuity is not checked across the gap
+        assert report["violations"]["meter_continuity"] == 0
+
+def main():
+    try:
+        test_clean_readings_are_valid_across_chunks()
+        test_violations_are_counted_per_house()
+        test_validate_file()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import json
+import os
+import sys
+import time
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# Arrays written to disk; everything else lives in meta.json
+ARRAY_NAMES = ["roots", "feature", "threshold", "children", "missing_left",
+               "leaf_slot", "leaf_values", "tree_output", "base_score"]
+
+
+def _floor_float32(values):
+    """Largest float32 <= each value, so float32 `x <= t32` matches float64 `x <= t`."""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _index_dtype(max_value):
+    return np.int16 if max_value < np.iinfo(np.int16).max else np.int32
+
+
+class CompactForest:
+    """Tree ensemble flattened into contiguous arrays, with a vectorized batch predictor.
+
+    All trees share one node table. Internal nodes send a row to
+    children[node, 0] when `x <= threshold` (or when x is NaN and missing_left
+    is set) and to children[node, 1] otherwise. Traversal advances every
+    (row, tree) pair one level per step and drops pairs as they reach a leaf.
+    """
+
+    def __init__(self, roots, feature, threshold, children, missing_left, leaf_slot,
+                 leaf_values, tree_output, base_score, aggregate, feature_names=None):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.leaf_slot = leaf_slot
+        self.leaf_values = leaf_values
+        self.tree_output = tree_output
+        self.base_score = base_score
+        self.aggregate = aggregate
+        self.feature_names = feature_names
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_outputs(self):
+        return len(self.base_score)
+
+    @classmethod
+    def from_trees(cls, trees, n_outputs, aggregate, base_score=None, feature_names=None, value_dtype=np.float32):
+        """Build from per-tree dicts of children_left/right, feature, threshold,
+        missing_left, leaf_value (n_nodes, width) and output (-1 for all outputs)."""
+        offsets = np.cumsum([0] + [len(tree["children_left"]) for tree in trees])
+        n_nodes = offsets[-1]
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.full(n_nodes, np.inf, dtype=np.float32)
+        children = np.repeat(np.arange(n_nodes, dtype=np.int64)[:, None], 2, axis=1)
+        missing_left = np.zeros(n_nodes, dtype=bool)
+        leaf_slot = np.full(n_nodes, -1, dtype=np.int32)
+        leaf_values = []
+
+        for tree, offset in zip(trees, offsets):
+            children_left = np.asarray(tree["children_left"])
+            internal = children_left >= 0
+            nodes = offset + np.flatnonzero(internal)
+            feature[nodes] = np.asarray(tree["feature"])[internal]
+            threshold[nodes] = np.asarray(tree["threshold"], dtype=np.float32)[internal]
+            children[nodes, 0] = offset + children_left[internal]
+            children[nodes, 1] = offset + np.asarray(tree["children_right"])[internal]
+            missing_left[nodes] = np.asarray(tree["missing_left"], dtype=bool)[internal]
+
+            leaves = np.flatnonzero(~internal)
+            leaf_slot[offset + leaves] = sum(len(v) for v in leaf_values) + np.arange(len(leaves))
+            leaf_values.append(np.asarray(tree["leaf_value"])[leaves])
+
+        index_dtype = np.int32 if n_nodes < np.iinfo(np.int32).max else np.int64
+        return cls(
+            roots=offsets[:-1].astype(index_dtype),
+            feature=feature.astype(_index_dtype(feature.max(initial=0))),
+            threshold=threshold,
+            children=children.astype(index_dtype),
+            missing_left=missing_left,
+            leaf_slot=leaf_slot,
+            leaf_values=np.concatenate(leaf_values).astype(value_dtype),
+            tree_output=np.asarray([tree["output"] for tree in trees], dtype=np.int32),
+            base_score=np.zeros(n_outputs) if base_score is None else np.asarray(base_score, dtype=np.float64),
+            aggregate=aggregate,
+            feature_names=list(feature_names) if feature_names is not None else None,
+        )
+
+    # --- Prediction ---
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None and list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy()
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _predict_chunk(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        flat_children = self.children.ravel()
+        has_missing = np.isnan(flat_X).any()
+
+        # One entry per (row, tree) pair, row-major
+        node = np.tile(self.roots, n_rows).astype(np.intp)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        pending = np.flatnonzero(self.leaf_slot.take(node) < 0)
+        current, row_base = node[pending], row_base[pending]
+
+        while len(pending):
+            x = flat_X.take(row_base + self.feature.take(current))
+            go_right = x > self.threshold.take(current)
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.missing_left.take(current), go_right)
+            current = flat_children.take(current * 2 + go_right)
+
+            done = self.leaf_slot.take(current) >= 0
+            if done.any():
+                node[pending[done]] = current[done]
+                keep = ~done
+                pending, current, row_base = pending[keep], current[keep], row_base[keep]
+
+        values = self.leaf_values.take(self.leaf_slot.take(node), axis=0).reshape(n_rows, self.n_trees, -1)
+        if values.shape[2] == self.n_outputs:
+            result = values.sum(axis=1, dtype=np.float64)
+        else:
+            # One scalar-leaf tree per output (e.g. XGBoost one_output_per_tree)
+            result = np.zeros((n_rows, self.n_outputs))
+            for output in range(self.n_outputs):
+                result[:, output] = values[:, self.tree_output == output, 0].sum(axis=1, dtype=np.float64)
+
+        if self.aggregate == "mean":
+            result /= self.n_trees
+        return result + self.base_score
+
+    def predict(self, X, chunk_size=1024):
+        """Predict many rows at once; returns (n_rows, n_outputs) like the source model."""
+        X = self._as_array(X)
+        result = np.empty((len(X), self.n_outputs))
+        for start in range(0, len(X), chunk_size):
+            result[start:start + chunk_size] = self._predict_chunk(X[start:start + chunk_size])
+        return result
+
+    # --- Serialization ---
+
+    def save(self, path):
+        """Write one .npy per array plus meta.json; the arrays can be memory-mapped on load."""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        meta = {"format": "compact_forest", "version": 1,
+                "aggregate": self.aggregate, "feature_names": self.feature_names}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved forest; with mmap the arrays are shared page cache, not private copies."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != "compact_forest":
+            raise ValueError(f"{path} is not a compact forest")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in ARRAY_NAMES}
+        return cls(**arrays, aggregate=meta["aggregate"],
+                   feature_names=meta["feature_names"])
+
+
+def export_sklearn_forest(model, value_dtype=np.float32):
+    """Flatten a fitted sklearn forest (or single tree) regressor into a CompactForest."""
+    estimators = getattr(model, "estimators_", [model])
+    trees = []
+    for estimator in estimators:
+        tree = estimator.tree_
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        trees.append({
+            "children_left": tree.children_left,
+            "children_right": tree.children_right,
+            "feature": tree.feature,
+            "threshold": _floor_float32(tree.threshold),
+            "missing_left": missing_left,
+            "leaf_value": tree.value[:, :, 0],
+            "output": -1,
+        })
+    n_outputs = estimators[0].tree_.n_outputs
+    return CompactForest.from_trees(trees, n_outputs, aggregate="mean",
+                                    feature_names=getattr(model, "feature_names_in_", None),
+                                    value_dtype=value_dtype)
+
+
+def _parse_base_score(text, n_outputs):
+    values = [float(v) for v in str(text).strip("[]").split(",")]
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (n_outputs,)).copy()
+
+
+def export_xgboost(model, value_dtype=np.float32):
+    """Flatten a fitted XGBoost regressor (or Booster) with numerical splits into a CompactForest."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    dump = json.loads(bytes(booster.save_raw(raw_format="json")).decode("utf-8"))
+    learner = dump["learner"]
+    n_outputs = int(learner["learner_model_param"].get("num_target", 1))
+    gbtree = learner["gradient_booster"]
+    if gbtree.get("name") == "dart":
+        raise ValueError("DART boosters are not supported")
+    model_json = gbtree["model"]
+
+    trees = []
+    for tree, output in zip(model_json["trees"], model_json["tree_info"]):
+        children_left = np.asarray(tree["left_children"])
+        children_right = np.asarray(tree["right_children"])
+        leaf_width = int(tree["tree_param"].get("size_leaf_vector", "1")) or 1
+        if leaf_width > 1:
+            # Multi-output trees store a leaf vector per node in base_weights
+            leaf_value = np.asarray(tree["base_weights"], dtype=np.float64).reshape(-1, leaf_width)
+            output = -1
+        else:
+            # Scalar leaves keep their (learning-rate scaled) weight in split_conditions
+            leaf_value = np.asarray(tree["split_conditions"], dtype=np.float64)[:, None]
+        if any(tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported")
+
+        # XGBoost sends x left when x < condition; for float32 x that is x <= previous float32
+        condition = np.asarray(tree["split_conditions"], dtype=np.float32)
+        threshold = np.nextafter(condition, np.float32(-np.inf))
+        trees.append({
+            "children_left": children_left,
+            "children_right": children_right,
+            "feature": np.asarray(tree["split_indices"]),
+            "threshold": threshold,
+            "missing_left": np.asarray(tree["default_left"], dtype=bool),
+            "leaf_value": leaf_value,
+            "output": output,
+        })
+
+    if len({tree["leaf_value"].shape[1] for tree in trees}) > 1:
+        raise ValueError("Mixed scalar and vector leaves are not supported")
+
+    base_score = _parse_base_score(learner["learner_model_param"]["base_score"], n_outputs)
+    return CompactForest.from_trees(trees, n_outputs, aggregate="sum", base_score=base_score,
+                                    feature_names=booster.feature_names, value_dtype=value_dtype)
+
+
+def _saved_size(path):
+    names = [f"{name}.npy" for name in ARRAY_NAMES] + ["meta.json"]
+    return sum(os.path.getsize(os.path.join(path, name)) for name in names)
+
+
+def _sample_features(feature_names, n_rows, seed=0):
+    """Random rows shaped like the serving features: one-hot date_range, time features, consumed_power."""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from trainer.time_feature_encoder import TimeFeatureEncoder
+
+    rng = np.random.default_rng(seed)
+    date_columns = [name for name in feature_names if name.startswith("date_range_")]
+    values = np.zeros((n_rows, len(feature_names)))
+    if date_columns:
+        picks = rng.integers(0, len(date_columns), n_rows)
+        values[np.arange(n_rows), [feature_names.index(date_columns[i]) for i in picks]] = 1.0
+    X = pd.DataFrame(values, columns=feature_names)
+    for col, values in TimeFeatureEncoder().add_cyclical_features(rng.integers(0, 48, n_rows) * 1800).items():
+        if col in X.columns:
+            X[col] = values
+    if "consumed_power" in X.columns:
+        X["consumed_power"] = rng.gamma(2.0, 1.0, n_rows)
+    return X
+
+
+def compare_with_pickle(pickle_path, compact_path, batch_sizes=(1, 48, 10000)):
+    """Report file size, load time, best-of-5 batch latency and max prediction difference."""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from trainer.profiling import best_time
+
+    started = time.perf_counter()
+    with open(pickle_path, "rb") as f:
+        model = pickle.load(f)
+    pickle_load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compact = CompactForest.load(compact_path)
+    compact_load = time.perf_counter() - started
+
+    feature_names = compact.feature_names or [f"f{i}" for i in range(int(compact.feature.max()) + 1)]
+    X = _sample_features(list(feature_names), max(batch_sizes))
+    if not compact.feature_names:
+        X = X.to_numpy()
+
+    report = {
+        "pickle_mb": round(os.path.getsize(pickle_path) / 1e6, 2),
+        "compact_mb": round(_saved_size(compact_path) / 1e6, 2),
+        "pickle_load_s": round(pickle_load, 4),
+        "compact_load_s": round(compact_load, 4),
+    }
+    for n_rows in batch_sizes:
+        batch = X[:n_rows]
+        report[f"pickle_predict_{n_rows}_ms"] = round(best_time(lambda: model.predict(batch)) * 1000, 3)
+        report[f"compact_predict_{n_rows}_ms"] = round(best_time(lambda: compact.predict(batch)) * 1000, 3)
+
+    expected = np.asarray(model.predict(X)).reshape(len(X), -1)
+    report["max_abs_diff"] = float(np.max(np.abs(expected - compact.predict(X))))
+    return report
+
+
+def main(pickle_path="model/random_forest_model.pkl", compact_path="model/random_forest_compact"):
+    print(f"🔄 Loading {pickle_path}...")
+    with open(pickle_path, "rb") as f:
+        model = pickle.load(f)
+
+    if hasattr(model, "get_booster"):
+        compact = export_xgboost(model)
+    else:
+        compact = export_sklearn_forest(model)
+    compact.save(compact_path)
+    print(f"✅ Compact model ({compact.n_trees} trees, {len(compact.feature)} nodes) saved to {compact_path}/")
+
+    print("\n📊 Compact vs pickle:")
+    for key, value in compare_with_pickle(pickle_path, compact_path).items():
+        print(f"   - {key}: {value}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifacts import DEFAULT_MODEL_NAME, load_artifacts, load_monitoring_profile
+from trainer.features import DATE_RANGE_LABELS, build_feature_frame, final_feature_order, output_categories
+from trainer.model_registry import ModelRegistry
+from trainer.profiling import best_time
+
+DAY_SECONDS = 24 * 3600
+
+# Registry name of distilled students; the app serves one with MODEL_NAME=random_forest_distilled
+DISTILLED_NAME = "random_forest_distilled"
+
+TIME_STEP_MINUTES = 30
+POWER_KNOTS = 33
+POWER_MAX = 10.0
+OFF_GRID_SAMPLES = 200000
+EVAL_SAMPLES = 50000
+RIDGE = 1e-6
+
+
+def power_knots(power_max=POWER_MAX, n_knots=POWER_KNOTS):
+    """Knots on a square-root scale, closer together at the low readings that dominate."""
+    return power_max * np.linspace(0.0, 1.0, n_knots) ** 2
+
+
+class PiecewiseLinearStudent:
+    """Per date_range, a bilinear spline over time of day (periodic) and consumed_power.
+
+    A row's prediction blends the coefficient vectors of the four knots around its
+    (time, consumed_power) point for its date_range, so predicting costs a few array
+    gathers per batch instead of a walk down every tree. consumed_power is clamped to
+    the knot range, as a forest's output is flat beyond the readings it was trained on.
+    Takes the serving feature frame, so it is a drop-in replacement for the forest.
+    """
+
+    def __init__(self, step_seconds, power_knots, labels=DATE_RANGE_LABELS, n_outputs=len(output_categories)):
+        self.step_seconds = int(step_seconds)
+        self.power_knots = np.asarray(power_knots, dtype=np.float64)
+        self.labels = [str(label) for label in labels]
+        self.n_time_knots = DAY_SECONDS // self.step_seconds
+        self.coef = np.zeros((len(self.labels), self.n_time_knots, len(self.power_knots), n_outputs), dtype=np.float32)
+
+    def _basis(self, seconds, power):
+        """Flat knot indices (n_rows, 4) within one label's table and their bilinear weights."""
+        position = (np.asarray(seconds, dtype=np.float64) % DAY_SECONDS) / self.step_seconds
+        t0 = np.floor(position).astype(np.int64) % self.n_time_knots
+        t1 = (t0 + 1) % self.n_time_knots
+        wt = position - np.floor(position)
+
+        power = np.clip(np.asarray(power, dtype=np.float64), self.power_knots[0], self.power_knots[-1])
+        p0 = np.clip(np.searchsorted(self.power_knots, power, side="right") - 1, 0, len(self.power_knots) - 2)
+        wp = (power - self.power_knots[p0]) / (self.power_knots[p0 + 1] - self.power_knots[p0])
+
+        n_power = len(self.power_knots)
+        index = np.stack([t0 * n_power + p0, t0 * n_power + p0 + 1, t1 * n_power + p0, t1 * n_power + p0 + 1], axis=1)
+        weight = np.stack([(1 - wt) * (1 - wp), (1 - wt) * wp, wt * (1 - wp), wt * wp], axis=1)
+        return index, weight
+
+    def fit_label(self, label_index, seconds, power, targets, ridge=RIDGE):
+        """Least-squares coefficients of one date_range from teacher outputs."""
+        from scipy import sparse
+
+        index, weight = self._basis(seconds, power)
+        n_coef = self.n_time_knots * len(self.power_knots)
+        rows = np.repeat(np.arange(len(index)), 4)
+        design = sparse.csr_matrix((weight.ravel(), (rows, index.ravel())), shape=(len(index), n_coef))
+        gram = (design.T @ design).toarray() + ridge * np.eye(n_coef)
+        solution = np.linalg.solve(gram, design.T @ np.asarray(targets, dtype=np.float64))
+        self.coef[label_index] = solution.reshape(self.n_time_knots, len(self.power_knots), -1)
+
+    def predict_parts(self, label_index, seconds, power):
+        index, weight = self._basis(seconds, power)
+        table = self.coef.reshape(len(self.labels), -1, self.coef.shape[-1])
+        values = table[np.asarray(label_index)[:, None], index]
+        return np.einsum("rk,rko->ro", weight, values, dtype=np.float64)
+
+    def predict(self, X):
+        """Predict from the serving feature frame (one-hot date_range, time, consumed_power, ...)."""
+        names = list(X.columns) if isinstance(X, pd.DataFrame) else final_feature_order
+        positions = [names.index(f"date_range_{label}") for label in self.labels]
+        values = np.asarray(X, dtype=np.float64)
+        onehot = values[:, positions]
+        return self.predict_parts(onehot.argmax(axis=1), values[:, names.index("time")],
+                                  values[:, names.index("consumed_power")])
+
+
+def sample_space(n_rows, power_max, seed=0, on_grid=None):
+    """Synthetic (label index, seconds, consumed_power) points covering the input space.
+
+    on_grid=(step_seconds, knots) returns the full grid of knots for every label instead.
+    """
+    if on_grid is not None:
+        step_seconds, knots = on_grid
+        labels, seconds, power = np.meshgrid(np.arange(len(DATE_RANGE_LABELS)),
+                                             np.arange(0, DAY_SECONDS, step_seconds), knots, indexing="ij")
+        return labels.ravel(), seconds.ravel(), power.ravel()
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, len(DATE_RANGE_LABELS), n_rows)
+    # Half the points on the half-hour slots the readings use, half anywhere in the day
+    seconds = np.where(rng.random(n_rows) < 0.5, rng.integers(0, 48, n_rows) * 1800, rng.integers(0, DAY_SECONDS, n_rows))
+    power = power_max * rng.random(n_rows) ** 2
+    return labels, seconds, power
+
+
+def teacher_predict(model, encoder, time_encoder, labels, seconds, power, chunk_size=200000):
+    outputs = []
+    for start in range(0, len(labels), chunk_size):
+        part = slice(start, start + chunk_size)
+        X = build_feature_frame(DATE_RANGE_LABELS[labels[part]], seconds[part], power[part], encoder, time_encoder)
+        outputs.append(np.asarray(model.predict(X)).reshape(len(X), -1))
+    return np.concatenate(outputs)
+
+
+def fit_piecewise(teacher, step_minutes=TIME_STEP_MINUTES, n_power_knots=POWER_KNOTS, power_max=POWER_MAX,
+                  off_grid_samples=OFF_GRID_SAMPLES, seed=0):
+    """Distill the teacher into a PiecewiseLinearStudent from a knot grid plus off-grid samples."""
+    model, encoder, time_encoder = teacher
+    student = PiecewiseLinearStudent(step_minutes * 60, power_knots(power_max, n_power_knots))
+    grid = sample_space(0, power_max, on_grid=(student.step_seconds, student.power_knots))
+    extra = sample_space(off_grid_samples, power_max, seed=seed)
+    labels, seconds, power = (np.concatenate([a, b]) for a, b in zip(grid, extra))
+    targets = teacher_predict(model, encoder, time_encoder, labels, seconds, power)
+    for label_index in range(len(DATE_RANGE_LABELS)):
+        rows = labels == label_index
+        student.fit_label(label_index, seconds[rows], power[rows], targets[rows])
+    return student
+
+
+def fit_boosted(teacher, power_max=POWER_MAX, samples=OFF_GRID_SAMPLES, max_depth=6, n_estimators=200, seed=0):
+    """Distill the teacher into shallow multi-output XGBoost trees on synthetic samples."""
+    from xgboost import XGBRegressor
+
+    model, encoder, time_encoder = teacher
+    labels, seconds, power = sample_space(samples, power_max, seed=seed)
+    X = build_feature_frame(DATE_RANGE_LABELS[labels], seconds, power, encoder, time_encoder)
+    targets = teacher_predict(model, encoder, time_encoder, labels, seconds, power)
+    student = XGBRegressor(n_estimators=n_estimators, max_depth=max_depth, learning_rate=0.1, tree_method="hist",
+                           multi_strategy="multi_output_tree", random_state=seed, n_jobs=1)
+    student.fit(X, targets)
+    return student
+
+
+def _model_bytes(model):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "model.joblib")
+        joblib.dump(model, path)
+        return os.path.getsize(path)
+
+
+def compare(teacher, student, power_max=POWER_MAX, n_samples=EVAL_SAMPLES, data_path=None, seed=1):
+    """Accuracy given up against latency and size gained, as a JSON-serializable dict.
+
+    Fidelity is measured against the teacher on fresh synthetic points; with data_path
+    (a prepared training CSV) both models are also scored against the real targets.
+    """
+    model, encoder, time_encoder = teacher
+    labels, seconds, power = sample_space(n_samples, power_max, seed=seed)
+    X = build_feature_frame(DATE_RANGE_LABELS[labels], seconds, power, encoder, time_encoder)
+    expected = np.asarray(model.predict(X)).reshape(len(X), -1)
+    predicted = np.asarray(student.predict(X)).reshape(len(X), -1)
+    error = predicted - expected
+    report = {
+        "fidelity": {
+            "mae": float(np.abs(error).mean()),
+            "max_abs_error": float(np.abs(error).max()),
+            "r2": float(1 - (error ** 2).sum() / ((expected - expected.mean(axis=0)) ** 2).sum()),
+            "mae_per_target": dict(zip(output_categories, np.abs(error).mean(axis=0).round(6).tolist())),
+        },
+        "teacher_bytes": _model_bytes(model),
+        "student_bytes": _model_bytes(student),
+    }
+    for n_rows in (1, 48, 10000):
+        batch = X.iloc[:n_rows]
+        teacher_ms = best_time(lambda: model.predict(batch)) * 1000
+        student_ms = best_time(lambda: student.predict(batch)) * 1000
+        report[f"predict_{n_rows}_ms"] = {"teacher": round(teacher_ms, 3), "student": round(student_ms, 3),
+                                          "speedup": round(teacher_ms / student_ms, 1)}
+
+    if data_path is not None:
+        data = pd.read_csv(data_path)
+        features = data.reindex(columns=final_feature_order, fill_value=0)
+        truth = data[output_categories].to_numpy()
+        for name, candidate in (("teacher", model), ("student", student)):
+            residual = np.asarray(candidate.predict(features)).reshape(len(features), -1) - truth
+            report[f"{name}_data_mse"] = float((residual ** 2).mean())
+    return report
+
+
+def register_student(model_dir, student, teacher, report, teacher_name=None, data_path=None):
+    """Register a student as DISTILLED_NAME beside its teacher, with the teacher's pipeline and monitoring profile.
+
+    The teacher stays the latest version of its own name, so the app keeps serving it
+    until MODEL_NAME selects the student.
+    """
+    _, encoder, time_encoder = teacher
+    registry = ModelRegistry(os.path.join(model_dir, "registry"))
+    return registry.register(
+        DISTILLED_NAME, student, {"encoder": encoder, "time_encoder": time_encoder},
+        feature_columns=final_feature_order, target_columns=output_categories,
+        metrics={"distilled": report["student"], "teacher": teacher_name or DEFAULT_MODEL_NAME,
+                 "fidelity_mae": report["fidelity"]["mae"],
+                 "fidelity_max_abs_error": report["fidelity"]["max_abs_error"]},
+        data_path=data_path, profile=load_monitoring_profile(model_dir, teacher_name),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the served random forest into a small, fast student model.")
+    parser.add_argument("--model-dir", default="model", help="Teacher location, resolved like the app does")
+    parser.add_argument("--teacher", default=None,
+                        help="Registered model to distill (default: the one the app serves, i.e. MODEL_NAME or random_forest)")
+    parser.add_argument("--student", choices=["piecewise", "boosted"], default="piecewise")
+    parser.add_argument("--step-minutes", type=int, default=TIME_STEP_MINUTES, help="Time-of-day knot spacing")
+    parser.add_argument("--power-knots", type=int, default=POWER_KNOTS)
+    parser.add_argument("--power-max", type=float, default=None,
+                        help="Top of the consumed_power range (default: 99.9th percentile of --data, else 10)")
+    parser.add_argument("--samples", type=int, default=OFF_GRID_SAMPLES, help="Off-grid teacher samples")
+    parser.add_argument("--data", default=None, help="Prepared training CSV to also score both models on")
+    parser.add_argument("--register", action="store_true",
+                        help=f"Register the student as {DISTILLED_NAME}; serve it with MODEL_NAME={DISTILLED_NAME}")
+    parser.add_argument("--report", default=None, help="Write the comparison as JSON to this path")
+    args = parser.parse_args()
+
+    power_max = args.power_max
+    if power_max is None:
+        power_max = float(np.quantile(pd.read_csv(args.data, usecols=["consumed_power"])["consumed_power"], 0.999)) \
+            if args.data else POWER_MAX
+
+    teacher = load_artifacts(args.model_dir, model_name=args.teacher)
+    started = time.perf_counter()
+    if args.student == "piecewise":
+        student = fit_piecewise(teacher, args.step_minutes, args.power_knots, power_max, args.samples)
+    else:
+        student = fit_boosted(teacher, power_max, args.samples)
+    print(f"🎓 Fitted {args.student} student in {time.perf_counter() - started:.1f}s "
+          f"(consumed_power up to {power_max:.2f})")
+
+    report = compare(teacher, student, power_max, data_path=args.data)
+    report.update(student=args.student, power_max=power_max)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.register:
+        version = register_student(args.model_dir, student, teacher, report, args.teacher, args.data)
+        print(f"✅ Student registered as {DISTILLED_NAME}/{version}; "
+              f"serve it with MODEL_NAME={DISTILLED_NAME} (MODEL_VERSION={version} to pin it)")
+
+
+if __name__ == "__main__":
+    # Run from the importable module so registered students pickle as trainer.distill classes, not __main__ ones
+    from trainer.distill import main as module_main
+    module_main()
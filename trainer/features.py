@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Final feature order as used in training
+final_feature_order = [
+    'date_range_apr_1', 'date_range_apr_2', 'date_range_apr_3',
+    'date_range_aug_1', 'date_range_aug_2', 'date_range_aug_3',
+    'date_range_dec_1', 'date_range_dec_2', 'date_range_dec_3',
+    'date_range_feb_1', 'date_range_feb_2', 'date_range_feb_3',
+    'date_range_jan_1', 'date_range_jan_2', 'date_range_jan_3',
+    'date_range_jul_1', 'date_range_jul_2', 'date_range_jul_3',
+    'date_range_jun_1', 'date_range_jun_2', 'date_range_jun_3',
+    'date_range_mar_1', 'date_range_mar_2', 'date_range_mar_3',
+    'date_range_may_1', 'date_range_may_2', 'date_range_may_3',
+    'date_range_nov_1', 'date_range_nov_2', 'date_range_nov_3',
+    'date_range_oct_1', 'date_range_oct_2', 'date_range_oct_3',
+    'date_range_sep_1', 'date_range_sep_2', 'date_range_sep_3',
+    'time', 'consumed_power',
+    'time_sin', 'time_cos', 'minute', 'second',
+    'minute_sin', 'minute_cos', 'second_sin', 'second_cos'
+]
+
+output_categories = [
+    'white_goods', 'entertainment', 'air_conditioners',
+    'lighting', 'ev_charges', 'utility_appliances'
+]
+
+# Date formats seen in API payloads and in the generator's raw CSVs
+DATE_FORMATS = ["%d:%m:%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]
+
+MONTH_ABBR = np.array(['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                       'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])
+
+# Every date_range label, in the month order of MONTH_ABBR
+DATE_RANGE_LABELS = np.array([f"{month}_{part}" for month in MONTH_ABBR for part in (1, 2, 3)])
+
+
+def date_range_labels(timestamps):
+    """Vectorized get_date_range_label for an array of datetime64 values."""
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+    month_start = timestamps.astype('datetime64[M]')
+    day = (timestamps.astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(int) + 1
+    days_in_month = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(int)
+    range_size = days_in_month // 3
+    part = np.where(day <= range_size, '_1', np.where(day <= range_size * 2, '_2', '_3'))
+    month = MONTH_ABBR[month_start.astype(int) % 12]
+    return np.char.add(month, part)
+
+
+def seconds_of_day(timestamps):
+    """Seconds since midnight for an array of datetime64 values."""
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+    return (timestamps - timestamps.astype('datetime64[D]')).astype(np.int64)
+
+
+def detect_date_format(sample):
+    """Return the first DATE_FORMATS entry that parses the sample date string."""
+    for fmt in DATE_FORMATS:
+        try:
+            datetime.strptime(sample, fmt)
+            return fmt
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date format: {sample!r}")
+
+
+def parse_dates(values):
+    """Parse date strings with one detected format, vectorized, to datetime64[s]."""
+    values = np.asarray(values, dtype=str)
+    fmt = detect_date_format(values[0])
+    return pd.to_datetime(values, format=fmt).to_numpy(dtype='datetime64[s]')
+
+
+def parse_times(values):
+    """Parse HH:MM:SS strings to seconds since midnight, vectorized."""
+    return pd.to_timedelta(np.asarray(values, dtype=str)).total_seconds().to_numpy().astype(np.int64)
+
+
+def build_feature_frame(date_labels, time_seconds, consumed_power, encoder, time_encoder):
+    """Build the model input frame for many rows at once, in final_feature_order."""
+    date_labels = np.asarray(date_labels).reshape(-1, 1)
+    encoded_date = encoder.transform(date_labels)
+    X = pd.DataFrame(encoded_date, columns=encoder.get_feature_names_out(["date_range"]))
+    X["consumed_power"] = np.broadcast_to(np.asarray(consumed_power, dtype=float), (len(X),))
+
+    time_features = time_encoder.add_cyclical_features(np.asarray(time_seconds, dtype=np.int64))
+    for col in time_features:
+        X[col] = time_features[col]
+
+    return X.reindex(columns=final_feature_order, fill_value=0)
+
+
+def predictions_to_columns(predictions):
+    """Turn an (n_rows, n_categories) prediction array into per-category lists."""
+    predictions = np.asarray(predictions)
+    return {category: predictions[:, i].tolist() for i, category in enumerate(output_categories)}
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.profiling import peak_rss_mb, reset_peak_rss
+from trainer.train_all import time_columns
+from trainer.train_xgboost import (CACHE_ROOT, DATA_PATH, build_matrices, build_training_cache, feature_cols,
+                                   load_training_cache, train_model)
+
+# Each family's search space, the features its trainer uses (besides date_range) and the
+# resource successive halving hands out: boosting rounds for XGBoost, the fraction of
+# training rows for the random forest.
+# Lists are sampled uniformly; (low, high, "log") tuples log-uniformly, (low, high, "int") as integers.
+SEARCH_SPACES = {
+    "xgboost": {
+        "space": {
+            "max_depth": (3, 10, "int"),
+            "learning_rate": (0.02, 0.3, "log"),
+            "min_child_weight": (1, 20, "log"),
+            "subsample": [0.6, 0.8, 1.0],
+            "colsample_bytree": [0.6, 0.8, 1.0],
+            "max_bin": [64, 128, 256],
+        },
+        "features": feature_cols,
+        "resource": "num_boost_round",
+        "min_budget": 30,
+        "max_budget": 810,
+    },
+    "random_forest": {
+        "space": {
+            "n_estimators": [50, 100, 200],
+            "max_depth": [None, 8, 12, 16, 24],
+            "min_samples_leaf": [1, 2, 4, 8],
+            "max_features": [1.0, 0.5, "sqrt"],
+        },
+        # train_randomforest.py keeps minute and second, which XGBoost leaves out
+        "features": time_columns,
+        "resource": "data_fraction",
+        "min_budget": 1 / 9,
+        "max_budget": 1.0,
+    },
+}
+
+
+def sample_config(space, rng):
+    config = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            config[name] = spec[rng.integers(len(spec))]
+        elif spec[2] == "log":
+            config[name] = float(np.exp(rng.uniform(np.log(spec[0]), np.log(spec[1]))))
+        else:
+            config[name] = int(rng.integers(spec[0], spec[1] + 1))
+    return config
+
+
+def trial_id(family, config, budget):
+    payload = json.dumps({"family": family, "config": config, "budget": budget}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+# Per-worker state: the memory-mapped feature cache and quantised matrices by max_bin
+_worker = {}
+
+
+def _init_worker(cache_dir, threads_per_trial):
+    from threadpoolctl import threadpool_limits
+    _worker["arrays"], _worker["meta"] = load_training_cache(cache_dir)
+    _worker["matrices"] = {}
+    _worker["threads"] = threads_per_trial
+    _worker["limits"] = threadpool_limits(limits=threads_per_trial)
+
+
+def _score(y_true, y_pred):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    return {"rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+            "mae": float(mean_absolute_error(y_true, y_pred)),
+            "r2": float(r2_score(y_true, y_pred))}
+
+
+def _fit_xgboost(config, budget):
+    arrays, meta = _worker["arrays"], _worker["meta"]
+    max_bin = config.get("max_bin", 256)
+    if max_bin not in _worker["matrices"]:
+        _worker["matrices"][max_bin] = build_matrices(arrays, meta["input_cols"], max_bin)
+    dtrain, dval = _worker["matrices"][max_bin]
+    params = dict(config, nthread=_worker["threads"])
+    booster = train_model(dtrain, dval, params, num_boost_round=int(budget), early_stopping_rounds=20)
+    y_val = arrays["y_val"]
+    metrics = _score(y_val, booster.inplace_predict(arrays["X_val"]).reshape(y_val.shape))
+    metrics["best_iteration"] = int(booster.attr("best_iteration"))
+    return metrics
+
+
+def _fit_random_forest(config, budget):
+    from sklearn.ensemble import RandomForestRegressor
+    arrays = _worker["arrays"]
+    # The cached training split is already shuffled, so a prefix is a random subsample
+    rows = max(1, int(len(arrays["X_train"]) * budget))
+    model = RandomForestRegressor(random_state=42, n_jobs=_worker["threads"], **config)
+    model.fit(arrays["X_train"][:rows], arrays["y_train"][:rows])
+    return _score(arrays["y_val"], model.predict(arrays["X_val"]))
+
+
+FIT_FUNCTIONS = {"xgboost": _fit_xgboost, "random_forest": _fit_random_forest}
+
+
+def run_trial(task):
+    """Fit one configuration at one budget inside a worker; returns the trial record."""
+    family, config, budget, rung, bracket = task
+    resettable = reset_peak_rss()
+    start = time.perf_counter()
+    metrics = FIT_FUNCTIONS[family](config, budget)
+    return {"trial_id": trial_id(family, config, budget), "family": family, "bracket": bracket, "rung": rung,
+            "budget": budget, "config": config, **metrics,
+            "fit_seconds": round(time.perf_counter() - start, 3),
+            "peak_rss_mb": round(peak_rss_mb(resettable), 1)}
+
+
+class HyperparameterSearch:
+    """Successive halving / hyperband over a process pool, checkpointed to trials.jsonl.
+
+    Configurations are drawn from a seeded generator, so an interrupted search run
+    again with the same arguments recreates the same trials and skips the finished ones.
+    """
+
+    def __init__(self, family, search_dir, data_path=DATA_PATH, cache_root=CACHE_ROOT,
+                 workers=None, threads_per_trial=1, eta=3, seed=42):
+        self.family = family
+        self.spec = SEARCH_SPACES[family]
+        self.search_dir = search_dir
+        self.data_path = data_path
+        self.cache_root = cache_root
+        self.workers = workers or os.cpu_count()
+        self.threads_per_trial = threads_per_trial
+        self.eta = eta
+        self.rng = np.random.default_rng(seed)
+        self.checkpoint_path = os.path.join(search_dir, "trials.jsonl")
+        self.completed = self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        completed = {}
+        if not os.path.exists(self.checkpoint_path):
+            return completed
+        with open(self.checkpoint_path) as f:
+            lines = f.readlines()
+        if lines and not lines[-1].endswith("\n"):
+            # The search was killed mid-write; drop the torn record so appends start on a clean line
+            lines = lines[:-1]
+            with open(self.checkpoint_path, "w") as f:
+                f.writelines(lines)
+        for line in lines:
+            record = json.loads(line)
+            completed[record["trial_id"]] = record
+        return completed
+
+    def _checkpoint(self, record):
+        with open(self.checkpoint_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed[record["trial_id"]] = record
+
+    def budgets(self, brackets_from):
+        """Budgets of the rungs of a bracket that starts brackets_from halvings below the maximum."""
+        budgets = [self.spec["max_budget"] / self.eta ** k for k in range(brackets_from, -1, -1)]
+        if self.spec["resource"] == "num_boost_round":
+            budgets = [int(round(budget)) for budget in budgets]
+        else:
+            budgets = [round(budget, 4) for budget in budgets]
+        return budgets
+
+    def max_halvings(self):
+        ratio = self.spec["max_budget"] / self.spec["min_budget"]
+        return int(math.floor(math.log(ratio, self.eta) + 1e-9))
+
+    def _run_rung(self, executor, configs, budget, rung, bracket):
+        tasks, records = [], []
+        for config in configs:
+            record = self.completed.get(trial_id(self.family, config, budget))
+            if record is not None:
+                records.append(record)
+            else:
+                tasks.append((self.family, config, budget, rung, bracket))
+        if records:
+            print(f"   rung {rung}: {len(records)} trial(s) restored from checkpoint")
+        for record in executor.map(run_trial, tasks):
+            self._checkpoint(record)
+            records.append(record)
+            print(f"   rung {rung} budget {budget}: rmse {record['rmse']:.4f} "
+                  f"in {record['fit_seconds']:.1f}s, {record['peak_rss_mb']:.0f} MB")
+        return records
+
+    def successive_halving(self, executor, n_configs, halvings, bracket=0):
+        """Run n_configs at the smallest budget and promote the best 1/eta at every rung."""
+        configs = [sample_config(self.spec["space"], self.rng) for _ in range(n_configs)]
+        for rung, budget in enumerate(self.budgets(halvings)):
+            records = self._run_rung(executor, configs, budget, rung, bracket)
+            ranked = sorted(records, key=lambda record: record["rmse"])
+            keep = max(1, len(ranked) // self.eta)
+            configs = [record["config"] for record in ranked[:keep]]
+
+    def run(self, n_configs=27, hyperband=False):
+        os.makedirs(self.search_dir, exist_ok=True)
+        cache_dir = build_training_cache(self.data_path, self.cache_root, features=self.spec["features"])
+        halvings = self.max_halvings()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(cache_dir, self.threads_per_trial)) as executor:
+            if hyperband:
+                # Brackets trade many cheap trials against few full-budget ones
+                for bracket, s in enumerate(range(halvings, -1, -1)):
+                    n = int(math.ceil((halvings + 1) / (s + 1) * self.eta ** s))
+                    print(f"🔎 Bracket {bracket}: {n} configurations, {s} halvings")
+                    self.successive_halving(executor, n, s, bracket)
+            else:
+                print(f"🔎 Successive halving: {n_configs} configurations, {halvings} halvings")
+                self.successive_halving(executor, n_configs, halvings)
+        return self.leaderboard()
+
+    def leaderboard(self):
+        """Every finished trial ranked by validation RMSE; full-budget trials first."""
+        if not self.completed:
+            return pd.DataFrame()
+        table = pd.DataFrame(list(self.completed.values()))
+        table["config"] = table["config"].apply(lambda config: json.dumps(config, sort_keys=True))
+        table = table.sort_values(["budget", "rmse"], ascending=[False, True]).reset_index(drop=True)
+        columns = ["trial_id", "bracket", "rung", "budget", "rmse", "mae", "r2",
+                   "fit_seconds", "peak_rss_mb", "config"]
+        table = table[[col for col in columns if col in table]]
+        table.to_csv(os.path.join(self.search_dir, "leaderboard.csv"), index=False)
+        with open(os.path.join(self.search_dir, "best.json"), "w") as f:
+            json.dump({"family": self.family, **self.completed[table.loc[0, "trial_id"]]}, f, indent=2)
+        return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search with successive halving.")
+    parser.add_argument("family", choices=sorted(SEARCH_SPACES))
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--search-dir", default=None, help="Checkpoint directory (default: model/search/<family>)")
+    parser.add_argument("--configs", type=int, default=27, help="Configurations for plain successive halving")
+    parser.add_argument("--hyperband", action="store_true", help="Run all hyperband brackets instead")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-trial", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    search = HyperparameterSearch(args.family, args.search_dir or os.path.join("model", "search", args.family),
+                                  args.data, workers=args.workers, threads_per_trial=args.threads_per_trial,
+                                  eta=args.eta, seed=args.seed)
+    table = search.run(args.configs, args.hyperband)
+    print("\n🏆 Leaderboard:")
+    print(table.head(20).to_string(index=False))
+    print(f"\nAll trials in {search.checkpoint_path}, best configuration in {search.search_dir}/best.json")
+
+
+if __name__ == "__main__":
+    main()
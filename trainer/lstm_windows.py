@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from trainer.model_registry import file_fingerprint
+
+CACHE_ROOT = "model/cache/lstm_windows"
+
+
+def _count_rows(data_path, block_size=1 << 20):
+    rows = 0
+    with open(data_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            rows += block.count(b"\n")
+    return rows - 1  # header
+
+
+def prepare_series(data_path, input_columns, output_columns, cache_root=CACHE_ROOT, chunk_size=100000):
+    """Stream a prepared CSV into float32 X.npy / y.npy memmaps plus per-house segment bounds.
+
+    Houses are contiguous runs of house_id, which generator/prepare_training_data.py
+    carries through. Files without it are rejected rather than read as one series,
+    since windows and time-ordered folds would then run across houses.
+    The result is cached under a key of the data's sha256 and the column lists.
+    """
+    header = pd.read_csv(data_path, nrows=0).columns
+    if "house_id" not in header:
+        raise ValueError(f"{data_path} has no house_id column; re-run generator/prepare_training_data.py "
+                         "so rows can be split into per-house series")
+    fingerprint = file_fingerprint(data_path)
+    key_source = {"data_sha256": fingerprint["sha256"], "inputs": list(input_columns), "outputs": list(output_columns)}
+    key = hashlib.sha256(json.dumps(key_source, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    series_dir = os.path.join(cache_root, key)
+    if os.path.exists(os.path.join(series_dir, "meta.json")):
+        return series_dir
+
+    usecols = list(input_columns) + list(output_columns) + ["house_id"]
+    n_rows = _count_rows(data_path)
+
+    os.makedirs(cache_root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=cache_root)
+    X = open_memmap(os.path.join(staging, "X.npy"), mode="w+", dtype=np.float32, shape=(n_rows, len(input_columns)))
+    y = open_memmap(os.path.join(staging, "y.npy"), mode="w+", dtype=np.float32, shape=(n_rows, len(output_columns)))
+
+    boundaries = [0]
+    previous_house = None
+    offset = 0
+    for chunk in pd.read_csv(data_path, usecols=usecols, dtype={"house_id": str}, chunksize=chunk_size):
+        end = offset + len(chunk)
+        X[offset:end] = chunk[list(input_columns)].to_numpy(dtype=np.float32)
+        y[offset:end] = chunk[list(output_columns)].to_numpy(dtype=np.float32)
+        houses = chunk["house_id"].to_numpy()
+        changes = np.flatnonzero(houses[1:] != houses[:-1]) + 1
+        if previous_house is not None and houses[0] != previous_house:
+            boundaries.append(offset)
+        boundaries.extend((changes + offset).tolist())
+        previous_house = houses[-1]
+        offset = end
+    X.flush()
+    y.flush()
+    del X, y
+
+    np.save(os.path.join(staging, "segments.npy"), np.array(boundaries + [offset], dtype=np.int64))
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(dict(key_source, rows=offset, data=fingerprint), f, indent=2)
+    try:
+        os.rename(staging, series_dir)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return series_dir
+
+
+def load_series(series_dir):
+    """Memory-mapped (X, y, segment bounds) of a prepared series directory."""
+    X = np.load(os.path.join(series_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(series_dir, "y.npy"), mmap_mode="r")
+    return X, y, np.load(os.path.join(series_dir, "segments.npy"))
+
+
+def window_starts(segments, window_length, stride=1):
+    """Start rows of every window that lies entirely within one segment, and its segment id."""
+    starts, segment_ids = [], []
+    for segment_id, (begin, end) in enumerate(zip(segments[:-1], segments[1:])):
+        last_start = end - window_length
+        if last_start < begin:
+            continue
+        segment_starts = np.arange(begin, last_start + 1, stride, dtype=np.int64)
+        starts.append(segment_starts)
+        segment_ids.append(np.full(len(segment_starts), segment_id, dtype=np.int32))
+    if not starts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    return np.concatenate(starts), np.concatenate(segment_ids)
+
+
+def split_windows(starts, segment_ids, segments, window_length, validation_fraction=0.2):
+    """Hold out the windows lying in the last part of each segment, so training and
+    validation windows never share rows."""
+    begin = segments[segment_ids]
+    length = segments[segment_ids + 1] - begin
+    cutoff = begin + np.floor(length * (1 - validation_fraction)).astype(np.int64)
+    train = starts + window_length <= cutoff
+    validation = starts >= cutoff
+    return starts[train], starts[validation]
+
+
+def gather_windows(X, starts, window_length):
+    """(len(starts), window_length, n_features) block of windows read from X."""
+    rows = starts[:, None] + np.arange(window_length)
+    return np.asarray(X[rows.ravel()]).reshape(len(starts), window_length, X.shape[1])
+
+
+def gather_targets(y, starts, window_length, target="last"):
+    """Per-window target: the reading at the window's last step, or the window mean."""
+    if target == "mean":
+        return gather_windows(y, starts, window_length).mean(axis=1)
+    return np.asarray(y[starts + window_length - 1])
+
+
+def iter_window_batches(X, starts, window_length, batch_size=256, y=None, target="last"):
+    """Numpy batches of windows (and targets when y is given); memory is bounded by batch_size."""
+    for first in range(0, len(starts), batch_size):
+        batch_starts = starts[first:first + batch_size]
+        windows = gather_windows(X, batch_starts, window_length)
+        if y is None:
+            yield windows
+        else:
+            yield windows, gather_targets(y, batch_starts, window_length, target)
+
+
+def make_dataset(X, starts, window_length, batch_size=128, y=None, target="last", shuffle=False, seed=42):
+    """tf.data pipeline over window start rows.
+
+    Only the start indices live in the dataset; each batch is gathered from the
+    memory-mapped arrays in parallel map calls and prefetched, so memory stays at a
+    few batches regardless of how many windows there are.
+    """
+    import tensorflow as tf
+
+    n_features = X.shape[1]
+    dataset = tf.data.Dataset.from_tensor_slices(starts)
+    if shuffle:
+        dataset = dataset.shuffle(len(starts), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+
+    def load(batch_starts):
+        batch_starts = batch_starts.astype(np.int64)
+        windows = gather_windows(X, batch_starts, window_length)
+        if y is None:
+            return windows
+        return windows, gather_targets(y, batch_starts, window_length, target).astype(np.float32)
+
+    if y is None:
+        def load_batch(batch_starts):
+            windows = tf.numpy_function(load, [batch_starts], tf.float32)
+            windows.set_shape([None, window_length, n_features])
+            return windows
+    else:
+        n_targets = y.shape[1]
+
+        def load_batch(batch_starts):
+            windows, targets = tf.numpy_function(load, [batch_starts], [tf.float32, tf.float32])
+            windows.set_shape([None, window_length, n_features])
+            targets.set_shape([None, n_targets])
+            return windows, targets
+
+    return dataset.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import platform
+import shutil
+import stat
+import tempfile
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import OneHotEncoder
+
+from trainer.compact_forest import CompactForest, export_sklearn_forest, export_xgboost
+from trainer.monitoring_profile import PROFILE_FILE, load_profile, save_profile
+from trainer.prediction_surface import PredictionSurface
+
+DEFAULT_ROOT = "model/registry"
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """Content hash and size of a training data file, read in blocks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+            size += len(block)
+    return {"path": os.path.abspath(path), "sha256": digest.hexdigest(), "bytes": size}
+
+
+def build_date_range_encoder(feature_columns):
+    """Recreate the date_range OneHotEncoder from the one-hot column names of the training data."""
+    labels = [col[len("date_range_"):] for col in feature_columns if col.startswith("date_range_")]
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    encoder.fit(np.array(labels).reshape(-1, 1))
+    return encoder
+
+
+def build_pipeline(feature_columns):
+    """Feature pipeline stored with every model: date_range one-hot encoder and time encoder."""
+    from trainer.time_feature_encoder import TimeFeatureEncoder
+    return {"encoder": build_date_range_encoder(feature_columns), "time_encoder": TimeFeatureEncoder()}
+
+
+def _library_versions():
+    versions = {"python": platform.python_version()}
+    for module_name in ["sklearn", "xgboost", "numpy", "pandas", "joblib"]:
+        try:
+            versions[module_name] = __import__(module_name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def _export_compact(model):
+    if hasattr(model, "get_booster"):
+        return export_xgboost(model)
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        return export_sklearn_forest(model)
+    return None
+
+
+def _hash_directory(path):
+    digest = hashlib.sha256()
+    for folder, _, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            file_path = os.path.join(folder, name)
+            digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def _make_read_only(path):
+    for folder, _, files in os.walk(path):
+        for name in files:
+            os.chmod(os.path.join(folder, name), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+class ModelEntry:
+    """A loaded registry version: the model, its feature pipeline, its manifest and,
+    when one was registered, the training profile the readings monitor compares against."""
+
+    def __init__(self, name, version, path, model, pipeline, manifest, profile=None):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.model = model
+        self.pipeline = pipeline
+        self.manifest = manifest
+        self.profile = profile
+
+    @property
+    def encoder(self):
+        return self.pipeline["encoder"]
+
+    @property
+    def time_encoder(self):
+        return self.pipeline["time_encoder"]
+
+    @property
+    def feature_columns(self):
+        return self.manifest["feature_columns"]
+
+
+class ModelRegistry:
+    """Local file-based registry of immutable, content-hashed model versions.
+
+    Layout: <root>/<name>/<version>/{model.joblib, pipeline.joblib, manifest.json,
+    compact/, monitoring_profile.json} and <root>/<name>/LATEST holding the most recently registered version.
+    Prediction surfaces compiled from a version live beside it in <version>.surface/.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def _name_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def register(self, name, model, pipeline, feature_columns, target_columns,
+                 metrics=None, data_path=None, compact=True, profile=None):
+        """Store a trained model with its pipeline, schema and optional monitoring profile; returns the version id."""
+        name_dir = self._name_dir(name)
+        os.makedirs(name_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=name_dir)
+        try:
+            # Uncompressed joblib keeps numpy arrays contiguous so they can be memory-mapped
+            joblib.dump(model, os.path.join(staging, "model.joblib"))
+            joblib.dump(pipeline, os.path.join(staging, "pipeline.joblib"))
+            compact_model = _export_compact(model) if compact else None
+            if compact_model is not None:
+                compact_model.save(os.path.join(staging, "compact"))
+            if profile is not None:
+                save_profile(profile, os.path.join(staging, PROFILE_FILE))
+
+            content = {
+                "name": name,
+                "model_class": f"{type(model).__module__}.{type(model).__name__}",
+                "feature_columns": list(feature_columns),
+                "target_columns": list(target_columns),
+                "metrics": metrics or {},
+                "data": file_fingerprint(data_path) if data_path else None,
+                "artifacts_sha256": _hash_directory(staging),
+            }
+            version = hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+            manifest = dict(content, version=version,
+                            created_at=datetime.now().isoformat(timespec="seconds"),
+                            libraries=_library_versions(),
+                            formats=["joblib"] + (["compact"] if compact_model is not None else []))
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            version_dir = os.path.join(name_dir, version)
+            if os.path.exists(version_dir):
+                # Identical content was registered before; versions are never overwritten
+                shutil.rmtree(staging)
+            else:
+                _make_read_only(staging)
+                os.chmod(staging, 0o755)
+                os.rename(staging, version_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._set_latest(name, version)
+        return version
+
+    def version_path(self, name, version):
+        return os.path.join(self._name_dir(name), version)
+
+    def report_path(self, name, version):
+        """Run report kept beside, not inside, the immutable version directory."""
+        return os.path.join(self._name_dir(name), f"{version}.run.json")
+
+    def surface_path(self, name, version):
+        """Prediction surface compiled from a version, kept beside its immutable directory."""
+        return os.path.join(self._name_dir(name), f"{version}.surface")
+
+    def _set_latest(self, name, version):
+        pointer = os.path.join(self._name_dir(name), "LATEST")
+        with tempfile.NamedTemporaryFile("w", dir=self._name_dir(name), delete=False) as f:
+            f.write(version)
+        os.replace(f.name, pointer)
+
+    def _version_dirs(self, name):
+        name_dir = self._name_dir(name)
+        if not os.path.isdir(name_dir):
+            return []
+        return [entry for entry in os.listdir(name_dir)
+                if not entry.startswith(".") and "." not in entry and os.path.isdir(os.path.join(name_dir, entry))]
+
+    def versions(self, name):
+        """Manifests of every version of a model, oldest first."""
+        name_dir = self._name_dir(name)
+        manifests = []
+        for version in self._version_dirs(name):
+            manifest_path = os.path.join(name_dir, version, "manifest.json")
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda manifest: manifest["created_at"])
+
+    def resolve(self, name, version="latest"):
+        """Turn "latest" or a (prefix of a) pinned version into a concrete version id."""
+        name_dir = self._name_dir(name)
+        if version in (None, "latest"):
+            pointer = os.path.join(name_dir, "LATEST")
+            if not os.path.exists(pointer):
+                raise FileNotFoundError(f"No versions of '{name}' in {self.root}")
+            with open(pointer) as f:
+                return f.read().strip()
+        matches = [v for v in self._version_dirs(name) if v.startswith(version)]
+        if len(matches) != 1:
+            raise FileNotFoundError(f"Version '{version}' of '{name}' matches {len(matches)} entries")
+        return matches[0]
+
+    def load(self, name, version="latest", model_format="joblib", mmap=True):
+        """Load a version; model_format="compact" returns the CompactForest export when there is one
+        and model_format="surface" the prediction surface compiled from it."""
+        version = self.resolve(name, version)
+        path = os.path.join(self._name_dir(name), version)
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        # Models with no tree export (e.g. distilled students) are already compact; serve them as stored
+        if model_format == "surface":
+            surface_path = self.surface_path(name, version)
+            if not os.path.isdir(surface_path):
+                raise FileNotFoundError(f"No prediction surface compiled for {name}/{version}; "
+                                        "run trainer/prediction_surface.py")
+            model = PredictionSurface.load(surface_path, mmap=mmap)
+        elif model_format == "compact" and "compact" in manifest.get("formats", ["compact"]):
+            model = CompactForest.load(os.path.join(path, "compact"), mmap=mmap)
+        else:
+            model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode=mmap_mode)
+        pipeline = joblib.load(os.path.join(path, "pipeline.joblib"))
+        return ModelEntry(name, version, path, model, pipeline, manifest,
+                          profile=load_profile(os.path.join(path, PROFILE_FILE)))
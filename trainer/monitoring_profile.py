@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from trainer.features import parse_times
+
+# File name of the profile inside a registry version (and, for legacy model
+# directories without a registry, inside the model directory itself)
+PROFILE_FILE = "monitoring_profile.json"
+
+SLOT_SECONDS = 1800
+N_SLOTS = 24 * 3600 // SLOT_SECONDS
+POWER_BINS = 20
+TAIL_QUANTILES = (0.99, 0.999)
+
+
+def build_profile(consumed_power, seconds, bins=POWER_BINS, source=None):
+    """Reference distributions of the model's training inputs, as a JSON-serializable dict.
+
+    consumed_power is summarized by quantile bin edges and the share of readings per
+    bin, the time of day by the share of readings per half-hour slot, and each slot by
+    the mean and standard deviation of consumed_power (the per-slot baseline).
+    """
+    consumed_power = np.asarray(consumed_power, dtype=np.float64)
+    slots = np.asarray(seconds, dtype=np.int64) // SLOT_SECONDS % N_SLOTS
+    valid = ~np.isnan(consumed_power)
+    consumed_power, slots = consumed_power[valid], slots[valid]
+    if len(consumed_power) == 0:
+        raise ValueError("No readings to profile")
+
+    # Extra cut points in the upper tail, where anomalies and the p99 live
+    levels = np.concatenate([np.arange(1, bins) / bins, TAIL_QUANTILES])
+    edges = np.unique(np.quantile(consumed_power, levels))
+    power_counts = np.bincount(np.searchsorted(edges, consumed_power, side="right"), minlength=len(edges) + 1)
+    slot_counts = np.bincount(slots, minlength=N_SLOTS)
+    slot_sums = np.bincount(slots, consumed_power, minlength=N_SLOTS)
+    slot_squares = np.bincount(slots, consumed_power ** 2, minlength=N_SLOTS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slot_mean = np.where(slot_counts > 0, slot_sums / slot_counts, consumed_power.mean())
+        slot_std = np.sqrt(np.maximum(slot_squares / slot_counts - slot_mean ** 2, 0))
+    slot_std = np.where(slot_counts > 1, slot_std, consumed_power.std())
+
+    return {
+        "source": source,
+        "readings": int(len(consumed_power)),
+        "consumed_power": {
+            "edges": edges.tolist(),
+            "min": float(consumed_power.min()),
+            "max": float(consumed_power.max()),
+            "probabilities": (power_counts / power_counts.sum()).tolist(),
+        },
+        "time_of_day": {"slot_seconds": SLOT_SECONDS, "probabilities": (slot_counts / slot_counts.sum()).tolist()},
+        "slot_baseline": {"mean": slot_mean.tolist(), "std": slot_std.tolist()},
+    }
+
+
+def build_profile_from_csv(path, chunk_size=500000):
+    """Profile a training CSV (time in seconds, as written by prepare_training_data) or a raw CSV (HH:MM:SS)."""
+    powers, seconds = [], []
+    for chunk in pd.read_csv(path, usecols=["time", "consumed_power"], chunksize=chunk_size):
+        times = chunk["time"]
+        seconds.append(times.to_numpy(dtype=np.int64) if pd.api.types.is_numeric_dtype(times)
+                       else parse_times(times))
+        powers.append(chunk["consumed_power"].to_numpy(dtype=np.float64))
+    return build_profile(np.concatenate(powers), np.concatenate(seconds), source=os.path.abspath(path))
+
+
+def save_profile(profile, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=1)
+    return path
+
+
+def load_profile(path):
+    """The stored training profile, or None when there is none yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
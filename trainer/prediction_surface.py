@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.features import DATE_RANGE_LABELS, build_feature_frame, final_feature_order, output_categories
+
+DAY_SECONDS = 24 * 3600
+
+# Surface of a model directory without a registry
+LEGACY_SURFACE_DIR = "prediction_surface"
+
+TIME_STEP_MINUTES = 30
+POWER_POINTS = 257
+POWER_MAX = 10.0
+CHECK_SAMPLES = 50000
+
+
+class PredictionSurface:
+    """Model outputs tabulated over date_range x second of day x consumed_power.
+
+    values[label, t, p] is the model's prediction at time t * step_seconds and
+    consumed_power p * power_step, evaluated once by compile_surface. Both axes are
+    uniform, so a lookup finds its cell by arithmetic and blends the four corners
+    bilinearly; time wraps at midnight and consumed_power is clamped to
+    [0, power_max]. The table is memory-mapped on load, so forked workers share one
+    copy through the page cache. Takes the serving feature frame as well, so it is a
+    drop-in replacement for the model.
+    """
+
+    def __init__(self, values, step_seconds, power_max, labels=DATE_RANGE_LABELS, error=None, source=None):
+        # A plain ndarray view of a memmap indexes without the subclass overhead
+        self.values = values.view(np.ndarray)
+        self.step_seconds = int(step_seconds)
+        self.power_max = float(power_max)
+        self.labels = [str(label) for label in labels]
+        self.error = error or {}
+        self.source = source or {}
+        self.n_time, self.n_power = values.shape[1:3]
+        self.power_step = self.power_max / (self.n_power - 1)
+        self.label_positions = {label: i for i, label in enumerate(self.labels)}
+        self._label_order = np.argsort(self.labels)
+        self._sorted_labels = np.asarray(self.labels)[self._label_order]
+
+    @property
+    def n_outputs(self):
+        return self.values.shape[3]
+
+    @classmethod
+    def empty(cls, step_seconds, n_power, power_max, labels=DATE_RANGE_LABELS, n_outputs=len(output_categories)):
+        if DAY_SECONDS % step_seconds or n_power < 2:
+            raise ValueError("step must divide the day and the power axis needs at least two points")
+        values = np.zeros((len(labels), DAY_SECONDS // step_seconds, n_power, n_outputs), dtype=np.float32)
+        return cls(values, step_seconds, power_max, labels)
+
+    def grid(self):
+        """(label index, seconds, consumed_power) of every table entry, in table order."""
+        labels, seconds, power = np.meshgrid(np.arange(len(self.labels)),
+                                             np.arange(self.n_time) * self.step_seconds,
+                                             np.arange(self.n_power) * self.power_step, indexing="ij")
+        return labels.ravel(), seconds.ravel(), power.ravel()
+
+    def label_indices(self, labels):
+        """Table rows of date_range labels; unknown labels raise ValueError."""
+        labels = np.asarray(labels, dtype=str)
+        positions = np.clip(np.searchsorted(self._sorted_labels, labels), 0, len(self.labels) - 1)
+        unknown = self._sorted_labels[positions] != labels
+        if unknown.any():
+            raise ValueError(f"Unknown date_range label: {labels[unknown][0]!r}")
+        return self._label_order[positions]
+
+    def _cells(self, seconds, power):
+        position = (np.asarray(seconds, dtype=np.float64) % DAY_SECONDS) / self.step_seconds
+        t0 = np.floor(position).astype(np.int64)
+        wt = position - t0
+        position = np.clip(np.asarray(power, dtype=np.float64), 0.0, self.power_max) / self.power_step
+        p0 = np.minimum(np.floor(position).astype(np.int64), self.n_power - 2)
+        return t0, (t0 + 1) % self.n_time, wt, p0, position - p0
+
+    def predict_parts(self, label_index, seconds, power):
+        """Interpolated predictions (n_rows, n_outputs) for label indices, seconds and consumed_power."""
+        t0, t1, wt, p0, wp = self._cells(seconds, power)
+        label_index = np.asarray(label_index)
+        wt, wp = wt[..., None], wp[..., None]
+        v = self.values
+        return ((1 - wt) * ((1 - wp) * v[label_index, t0, p0] + wp * v[label_index, t0, p0 + 1])
+                + wt * ((1 - wp) * v[label_index, t1, p0] + wp * v[label_index, t1, p0 + 1])).reshape(-1, self.n_outputs)
+
+    def lookup(self, label, seconds, power):
+        """One interpolated prediction with scalar arithmetic, for single-row serving."""
+        try:
+            table = self.values[self.label_positions[label]]
+        except KeyError:
+            raise ValueError(f"Unknown date_range label: {label!r}")
+        position = (seconds % DAY_SECONDS) / self.step_seconds
+        t0 = int(position)
+        wt = position - t0
+        t1 = (t0 + 1) % self.n_time
+        position = min(max(float(power), 0.0), self.power_max) / self.power_step
+        p0 = min(int(position), self.n_power - 2)
+        wp = position - p0
+        value = ((1 - wt) * ((1 - wp) * table[t0, p0] + wp * table[t0, p0 + 1])
+                 + wt * ((1 - wp) * table[t1, p0] + wp * table[t1, p0 + 1]))
+        return value.astype(np.float64)
+
+    def predict(self, X):
+        """Predict from the serving feature frame (one-hot date_range, time, consumed_power, ...)."""
+        names = list(X.columns) if isinstance(X, pd.DataFrame) else final_feature_order
+        positions = [names.index(f"date_range_{label}") for label in self.labels]
+        values = np.asarray(X, dtype=np.float64)
+        return self.predict_parts(values[:, positions].argmax(axis=1), values[:, names.index("time")],
+                                  values[:, names.index("consumed_power")])
+
+    def save(self, path):
+        """Write values.npy and meta.json into a fresh directory, then swap it in for path."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+        try:
+            np.save(os.path.join(staging, "values.npy"), np.ascontiguousarray(self.values, dtype=np.float32))
+            meta = {"format": "prediction_surface", "version": 1, "labels": self.labels,
+                    "step_seconds": self.step_seconds, "power_max": self.power_max,
+                    "outputs": output_categories[:self.n_outputs], "error": self.error, "source": self.source}
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f, indent=2)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        # Move the old surface aside rather than deleting it first, so path is only ever
+        # missing between two renames; workers serving it keep their mapping of its files
+        retired = None
+        if os.path.isdir(path):
+            retired = tempfile.mkdtemp(prefix=".retired-", dir=parent)
+            os.rename(path, os.path.join(retired, "surface"))
+        try:
+            os.rename(staging, path)
+        except BaseException:
+            if retired is not None:
+                os.rename(os.path.join(retired, "surface"), path)
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            if retired is not None:
+                shutil.rmtree(retired, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != "prediction_surface":
+            raise ValueError(f"{path} is not a prediction surface export")
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode="r" if mmap else None)
+        return cls(values, meta["step_seconds"], meta["power_max"], meta["labels"],
+                   error=meta["error"], source=meta["source"])
+
+
+def compile_surface(teacher, step_minutes=TIME_STEP_MINUTES, power_points=POWER_POINTS, power_max=POWER_MAX):
+    """Evaluate the model at every grid point, in one batched pass."""
+    # trainer.distill loads models through the registry, which imports this module
+    from trainer.distill import teacher_predict
+
+    model, encoder, time_encoder = teacher
+    surface = PredictionSurface.empty(step_minutes * 60, power_points, power_max)
+    labels, seconds, power = surface.grid()
+    outputs = teacher_predict(model, encoder, time_encoder, labels, seconds, power)
+    surface.values[...] = outputs.reshape(surface.values.shape[:3] + (-1,))
+    return surface
+
+
+def measure_error(teacher, surface, n_samples=CHECK_SAMPLES, seed=1):
+    """Absolute error against the model on random points, overall and at half-hour slot times.
+
+    Points are drawn across [0, power_max]; half fall on the half-hour slots the
+    readings use and half anywhere in the day, so this is an empirical bound, not a
+    guarantee, and it says nothing about consumed_power above power_max.
+    """
+    from trainer.distill import sample_space, teacher_predict
+
+    model, encoder, time_encoder = teacher
+    labels, seconds, power = sample_space(n_samples, surface.power_max, seed=seed)
+    error = np.abs(surface.predict_parts(labels, seconds, power)
+                   - teacher_predict(model, encoder, time_encoder, labels, seconds, power))
+    on_slot = seconds % 1800 == 0
+
+    def summary(rows):
+        return {"max_abs_error": float(rows.max()), "p99_abs_error": float(np.quantile(rows.max(axis=1), 0.99)),
+                "mae": float(rows.mean())}
+
+    return {"samples": int(n_samples), "power_range": [0.0, surface.power_max],
+            **summary(error), "slot_times": summary(error[on_slot]),
+            "max_abs_error_per_target": dict(zip(output_categories, error.max(axis=0).round(6).tolist()))}
+
+
+def compare_latency(teacher, surface, batch_sizes=(1, 10000), seed=2):
+    """Best-of-5 latency of the model's serving path (feature frame + predict) against surface lookups."""
+    from trainer.distill import sample_space
+    from trainer.profiling import best_time
+
+    model, encoder, time_encoder = teacher
+    labels, seconds, power = sample_space(max(batch_sizes), surface.power_max, seed=seed)
+    names = DATE_RANGE_LABELS[labels]
+    report = {}
+    for n_rows in batch_sizes:
+        if n_rows == 1:
+            lookup = lambda: surface.lookup(names[0], int(seconds[0]), float(power[0]))
+        else:
+            lookup = lambda: surface.predict_parts(surface.label_indices(names[:n_rows]), seconds[:n_rows], power[:n_rows])
+        model_ms = best_time(lambda: model.predict(
+            build_feature_frame(names[:n_rows], seconds[:n_rows], power[:n_rows], encoder, time_encoder))) * 1000
+        surface_ms = best_time(lookup) * 1000
+        report[f"predict_{n_rows}_ms"] = {"model": round(model_ms, 3), "surface": round(surface_ms, 4),
+                                          "speedup": round(model_ms / surface_ms, 1)}
+    return report
+
+
+def main():
+    from app.artifacts import load_legacy_artifacts
+    from trainer.model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Compile the served model into an interpolated prediction surface.")
+    parser.add_argument("--model-dir", default="model", help="Model location, resolved like the app does")
+    parser.add_argument("--model-name", default="random_forest")
+    parser.add_argument("--version", default=None, help="Registry version to compile (default: latest)")
+    parser.add_argument("--output", default=None,
+                        help="Surface directory (default: beside the registry version, where MODEL_FORMAT=surface finds it)")
+    parser.add_argument("--step-minutes", type=int, default=TIME_STEP_MINUTES, help="Time-of-day grid spacing")
+    parser.add_argument("--power-points", type=int, default=POWER_POINTS, help="consumed_power grid points")
+    parser.add_argument("--power-max", type=float, default=None,
+                        help="Top of the consumed_power grid (default: 99.9th percentile of --data, else 10)")
+    parser.add_argument("--data", default=None, help="Prepared training CSV the consumed_power range is taken from")
+    parser.add_argument("--check-samples", type=int, default=CHECK_SAMPLES,
+                        help="Random points the error bound is measured on")
+    args = parser.parse_args()
+
+    power_max = args.power_max
+    if power_max is None:
+        power_max = float(np.quantile(pd.read_csv(args.data, usecols=["consumed_power"])["consumed_power"], 0.999)) \
+            if args.data else POWER_MAX
+
+    registry = ModelRegistry(os.path.join(args.model_dir, "registry"))
+    try:
+        entry = registry.load(args.model_name, args.version or "latest")
+        teacher = (entry.model, entry.encoder, entry.time_encoder)
+        source = {"model": entry.name, "version": entry.version}
+        output = args.output or registry.surface_path(entry.name, entry.version)
+    except FileNotFoundError:
+        if args.version:
+            raise
+        teacher = load_legacy_artifacts(args.model_dir)
+        source = {"model": os.path.join(args.model_dir, "random_forest_model.pkl")}
+        output = args.output or os.path.join(args.model_dir, LEGACY_SURFACE_DIR)
+
+    started = time.perf_counter()
+    surface = compile_surface(teacher, args.step_minutes, args.power_points, power_max)
+    print(f"🧮 Evaluated {surface.values[..., 0].size} grid points in {time.perf_counter() - started:.1f}s "
+          f"(consumed_power up to {power_max:.2f})")
+
+    surface.error = measure_error(teacher, surface, args.check_samples)
+    surface.source = dict(source, compiled_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    surface.save(output)
+    report = {"surface_mb": round(surface.values.nbytes / 1e6, 2), "error": surface.error,
+              **compare_latency(teacher, surface)}
+    print(json.dumps(report, indent=2))
+    print(f"✅ Prediction surface saved to {output}/; serve it with MODEL_FORMAT=surface")
+
+
+if __name__ == "__main__":
+    main()
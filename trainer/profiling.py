@@ -0,0 +1,197 @@
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (VmHWM) for this process; False where unsupported."""
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    return _proc_status_mb("VmRSS:")
+
+
+def peak_rss_mb(since_reset=True):
+    """Peak RSS since the last reset_peak_rss(), or of the whole process as a fallback."""
+    peak = _proc_status_mb("VmHWM:") if since_reset else None
+    if peak is None:
+        # ru_maxrss is in kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak
+
+
+def best_time(func, repeat=5):
+    """Best wall time in seconds of `repeat` calls, the usual latency figure for a warm call."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def path_size(path):
+    """Bytes used by a file, or by every file below a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, files in os.walk(path) for name in files)
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval_seconds=0.01):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trainer-stack-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if parts:
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def collapsed(self):
+        """Stacks in flamegraph collapsed format, most frequent first."""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+
+class RunProfiler:
+    """Wall time, CPU time and peak RSS per trainer stage, plus artifact sizes, as a JSON report.
+
+    Stages named in TRAINER_PROFILE (comma-separated, e.g. TRAINER_PROFILE=fit) also get a
+    sampling profile of their Python stacks, saved in collapsed format beside the report.
+    """
+
+    def __init__(self, name, sample_stages=None, interval_seconds=0.01):
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stages = []
+        self.artifacts = {}
+        self.metrics = {}
+        self.profiles = {}
+        if sample_stages is None:
+            sample_stages = [stage for stage in os.environ.get("TRAINER_PROFILE", "").split(",") if stage]
+        self.sample_stages = set(sample_stages)
+        self.interval_seconds = interval_seconds
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        resettable = reset_peak_rss()
+        rss_before = current_rss_mb()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        sampler = StackSampler(threading.get_ident(), self.interval_seconds) if name in self.sample_stages else None
+        try:
+            if sampler is not None:
+                with sampler:
+                    yield
+            else:
+                yield
+        finally:
+            wall = time.perf_counter() - start
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu = (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+            child_cpu = ((children.ru_utime - children_before.ru_utime)
+                         + (children.ru_stime - children_before.ru_stime))
+            self.stages.append({
+                "stage": name,
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4),
+                "child_cpu_seconds": round(child_cpu, 4),
+                # >1 means the stage used several cores
+                "cpu_utilization": round((cpu + child_cpu) / wall, 2) if wall > 0 else None,
+                "rss_before_mb": rss_before,
+                "peak_rss_mb": round(peak_rss_mb(resettable), 1),
+                "peak_rss_scope": "stage" if resettable else "process",
+            })
+            if sampler is not None:
+                self.profiles[name] = sampler.collapsed()
+
+    def add_artifact(self, path, label=None):
+        """Record the size of a saved file or directory."""
+        self.artifacts[label or path] = {"path": os.path.abspath(path), "bytes": path_size(path)}
+
+    def add_metrics(self, metrics):
+        self.metrics.update(metrics)
+
+    def stage_seconds(self):
+        return {stage["stage"]: stage["wall_seconds"] for stage in self.stages}
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_wall_seconds": round(time.perf_counter() - self._start, 4),
+            "command": sys.argv,
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "stages": self.stages,
+            "artifacts": self.artifacts,
+            "metrics": self.metrics,
+            "sampled_stages": {name: len(stacks) for name, stacks in self.profiles.items()},
+        }
+
+    def write(self, path):
+        """Write the JSON report and any sampled stacks (<report>.<stage>.collapsed)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        base = path[:-len(".json")] if path.endswith(".json") else path
+        for name, stacks in self.profiles.items():
+            with open(f"{base}.{name}.collapsed", "w") as f:
+                f.write("\n".join(stacks) + "\n")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=float)
+        return path
+
+    def summary(self):
+        lines = [f"  {'stage':<12} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}"]
+        for stage in self.stages:
+            lines.append(f"  {stage['stage']:<12} {stage['wall_seconds']:9.3f} "
+                         f"{stage['cpu_seconds'] + stage['child_cpu_seconds']:9.3f} {stage['peak_rss_mb']:9.1f}")
+        return "\n".join(lines)
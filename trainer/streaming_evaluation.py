@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+
+
+class GroupedRegressionMetrics:
+    """Per-group, per-target running sums from which MSE, MAE and R² are derived.
+
+    Targets are shifted by the first chunk's mean before summing, which keeps
+    sum(y²) - sum(y)²/n from cancelling catastrophically over millions of rows.
+    Without groups every row counts towards the single group "all".
+    """
+
+    def __init__(self, n_targets):
+        self.n_targets = n_targets
+        self.labels = {}
+        self.shift = None
+        shape = (0, n_targets)
+        self.count = np.zeros(0)
+        self.sum_y = np.zeros(shape)
+        self.sum_y2 = np.zeros(shape)
+        self.sum_squared_error = np.zeros(shape)
+        self.sum_absolute_error = np.zeros(shape)
+
+    def _codes(self, groups, n_rows):
+        if groups is None:
+            uniques, inverse = ["all"], np.zeros(n_rows, dtype=np.int64)
+        else:
+            uniques, inverse = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        mapping = np.array([self.labels.setdefault(label, len(self.labels)) for label in uniques], dtype=np.int64)
+        grow = len(self.labels) - len(self.count)
+        if grow > 0:
+            self.count = np.concatenate([self.count, np.zeros(grow)])
+            for name in ("sum_y", "sum_y2", "sum_squared_error", "sum_absolute_error"):
+                setattr(self, name, np.vstack([getattr(self, name), np.zeros((grow, self.n_targets))]))
+        return mapping[inverse]
+
+    def update(self, y_true, y_pred, groups=None):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        residual = y_true - np.asarray(y_pred, dtype=np.float64)[:, :self.n_targets]
+        if self.shift is None:
+            self.shift = y_true.mean(axis=0)
+        shifted = y_true - self.shift
+        codes = self._codes(groups, len(y_true))
+        n_groups = len(self.labels)
+
+        self.count += np.bincount(codes, minlength=n_groups)
+        for target in range(self.n_targets):
+            self.sum_y[:, target] += np.bincount(codes, shifted[:, target], n_groups)
+            self.sum_y2[:, target] += np.bincount(codes, shifted[:, target] ** 2, n_groups)
+            self.sum_squared_error[:, target] += np.bincount(codes, residual[:, target] ** 2, n_groups)
+            self.sum_absolute_error[:, target] += np.bincount(codes, np.abs(residual[:, target]), n_groups)
+
+    @staticmethod
+    def _metrics(count, sum_y, sum_y2, sse, sae):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_variance = sum_y2 - sum_y ** 2 / count
+            r2 = np.where(total_variance > 0, 1 - sse / total_variance, np.nan)
+            return sse / count, sae / count, r2
+
+    def per_target(self, target_names):
+        """Overall metrics per target, summed over all groups."""
+        count = self.count.sum()
+        mse, mae, r2 = self._metrics(count, self.sum_y.sum(axis=0), self.sum_y2.sum(axis=0),
+                                     self.sum_squared_error.sum(axis=0), self.sum_absolute_error.sum(axis=0))
+        return pd.DataFrame({"rows": int(count), "mse": mse, "mae": mae, "r2": r2}, index=list(target_names))
+
+    def result(self):
+        """Overall rows, MSE, MAE and R², averaged over targets like sklearn's uniform_average."""
+        count = self.count.sum()
+        if not count:
+            return {"rows": 0, "mse": float("nan"), "mae": float("nan"), "r2": float("nan")}
+        mse, mae, r2 = self._metrics(count, self.sum_y.sum(axis=0), self.sum_y2.sum(axis=0),
+                                     self.sum_squared_error.sum(axis=0), self.sum_absolute_error.sum(axis=0))
+        # A constant target scores 1 when predicted exactly and 0 otherwise, as sklearn does
+        r2 = np.where(np.isnan(r2), (mse == 0).astype(float), r2)
+        return {"rows": int(count), "mse": float(mse.mean()), "mae": float(mae.mean()), "r2": float(r2.mean())}
+
+    def per_group(self):
+        """One row per group with metrics averaged over targets (like sklearn's uniform_average)."""
+        count = self.count[:, None]
+        mse, mae, r2 = self._metrics(count, self.sum_y, self.sum_y2, self.sum_squared_error, self.sum_absolute_error)
+        valid = np.isfinite(r2)
+        r2_mean = np.where(valid.any(axis=1), np.where(valid, r2, 0).sum(axis=1) / np.maximum(valid.sum(axis=1), 1),
+                           np.nan)
+        table = pd.DataFrame({"rows": self.count.astype(int), "mse": mse.mean(axis=1), "mae": mae.mean(axis=1),
+                              "r2": r2_mean}, index=pd.Index(list(self.labels), name="group"))
+        return table.sort_index()
+
+
+class DensityHistogram:
+    """Fixed-size 2-D histogram of (actual, predicted) that widens its range as data arrives.
+
+    Both axes share one range so the diagonal is the perfect-prediction line. When a
+    value falls outside, the range doubles on that side and adjacent bins are merged
+    pairwise, so memory stays at bins² counts however many points are added.
+    """
+
+    def __init__(self, bins=200):
+        if bins % 2:
+            raise ValueError("bins must be even")
+        self.bins = bins
+        self.low = None
+        self.high = None
+        self.counts = np.zeros((bins, bins), dtype=np.int64)
+
+    def _merge_pairs(self, counts):
+        return counts.reshape(self.bins // 2, 2, self.bins // 2, 2).sum(axis=(1, 3))
+
+    def _extend(self, low, high):
+        while low < self.low or high > self.high:
+            width = self.high - self.low
+            merged = self._merge_pairs(self.counts)
+            counts = np.zeros_like(self.counts)
+            half = self.bins // 2
+            if high > self.high:
+                counts[:half, :half] = merged
+                self.high += width
+            else:
+                counts[half:, half:] = merged
+                self.low -= width
+            self.counts = counts
+
+    def update(self, actual, predicted):
+        actual = np.asarray(actual, dtype=np.float64)
+        predicted = np.asarray(predicted, dtype=np.float64)
+        finite = np.isfinite(actual) & np.isfinite(predicted)
+        actual, predicted = actual[finite], predicted[finite]
+        if not len(actual):
+            return
+        low = min(actual.min(), predicted.min())
+        high = max(actual.max(), predicted.max())
+        if self.low is None:
+            padding = (high - low) * 0.05 or 1.0
+            self.low, self.high = low - padding, high + padding
+        else:
+            self._extend(low, high)
+        counts, _, _ = np.histogram2d(actual, predicted, bins=self.bins, range=[[self.low, self.high]] * 2)
+        self.counts += counts.astype(np.int64)
+
+    def edges(self):
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+
+def date_range_labels_from_onehot(frame, columns):
+    """date_range label per row from the one-hot date_range_* columns."""
+    if not columns:
+        return np.full(len(frame), "all", dtype=object)
+    values = frame[columns].to_numpy()
+    labels = np.array([col[len("date_range_"):] for col in columns] + ["unknown"], dtype=object)
+    index = np.where(values.max(axis=1) > 0, values.argmax(axis=1), len(columns))
+    return labels[index]
+
+
+class StreamingEvaluator:
+    """Chunked predict loop accumulating overall, per-house and per-date_range metrics and
+    per-target density histograms; memory depends on chunk_size and bins, not on row count."""
+
+    def __init__(self, model, input_columns, output_columns, bins=200):
+        self.model = model
+        self.input_columns = list(input_columns)
+        self.output_columns = list(output_columns)
+        self.by_house = GroupedRegressionMetrics(len(output_columns))
+        self.by_date_range = GroupedRegressionMetrics(len(output_columns))
+        self.histograms = {category: DensityHistogram(bins) for category in output_columns}
+        self.rows = 0
+
+    def update(self, chunk):
+        X = chunk[self.input_columns]
+        y_true = chunk[self.output_columns].to_numpy(dtype=np.float64)
+        y_pred = np.asarray(self.model.predict(X), dtype=np.float64).reshape(len(chunk), -1)
+
+        houses = chunk["house_id"].to_numpy() if "house_id" in chunk else np.full(len(chunk), "all", dtype=object)
+        if "date_range" in chunk:
+            date_ranges = chunk["date_range"].to_numpy()
+        else:
+            date_ranges = date_range_labels_from_onehot(
+                chunk, [col for col in chunk.columns if col.startswith("date_range_")])
+        self.by_house.update(y_true, y_pred, houses)
+        self.by_date_range.update(y_true, y_pred, date_ranges)
+        for index, category in enumerate(self.output_columns):
+            self.histograms[category].update(y_true[:, index], y_pred[:, index])
+        self.rows += len(chunk)
+
+    def evaluate_csv(self, data_path, chunk_size=100000, prepare_chunk=None):
+        """Stream a CSV through update(); prepare_chunk can add derived columns per chunk."""
+        for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+            if prepare_chunk is not None:
+                chunk = prepare_chunk(chunk)
+            self.update(chunk)
+        return self
+
+    def per_target(self):
+        return self.by_house.per_target(self.output_columns)
+
+    def plot(self, path, columns=3):
+        """Save log-scaled density heatmaps of actual vs predicted, one panel per target."""
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LogNorm
+
+        rows = int(np.ceil(len(self.output_columns) / columns))
+        fig, axes = plt.subplots(rows, columns, figsize=(5 * columns, 5 * rows), squeeze=False)
+        for ax, category in zip(axes.ravel(), self.output_columns):
+            histogram = self.histograms[category]
+            if histogram.low is None:
+                ax.set_visible(False)
+                continue
+            edges = histogram.edges()
+            counts = np.ma.masked_equal(histogram.counts.T, 0)
+            mesh = ax.pcolormesh(edges, edges, counts, norm=LogNorm(vmin=1, vmax=max(1, counts.max())), cmap="viridis")
+            ax.plot([edges[0], edges[-1]], [edges[0], edges[-1]], 'r--', lw=1)
+            ax.set_xlabel('Actual Values')
+            ax.set_ylabel('Predicted Values')
+            ax.set_title(f'{category}')
+            fig.colorbar(mesh, ax=ax, label="rows")
+        for ax in axes.ravel()[len(self.output_columns):]:
+            ax.set_visible(False)
+        fig.tight_layout()
+        fig.savefig(path)
+        plt.close(fig)
+        return path
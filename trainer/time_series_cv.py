@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.lstm_windows import load_series, prepare_series
+from trainer.train_all import DATA_PATH, target_columns, time_columns
+
+CACHE_ROOT = "model/cache/time_series_cv"
+
+
+def prepare_time_ordered(data_path, input_columns, output_columns=target_columns, cache_root=CACHE_ROOT):
+    """Arrays re-ordered time-major: row k of every house, then row k+1, and so on.
+
+    Each house's rows are in chronological order in the prepared files, so a row's
+    position within its house is its time step. Files without house_id raise
+    ValueError: read as one house, "time-major" would be file order, which runs
+    house by house, and the folds would test on the last houses, not the latest steps. Sorting by (step, house) once makes
+    every rolling-origin training set a prefix and every test block a contiguous
+    slice, so folds are views of one memory-mapped array rather than copies.
+    """
+    series_dir = prepare_series(data_path, input_columns, output_columns, cache_root=cache_root)
+    ordered_dir = os.path.join(series_dir, "time_ordered")
+    if os.path.exists(os.path.join(ordered_dir, "steps.npy")):
+        return ordered_dir
+
+    X, y, segments = load_series(series_dir)
+    lengths = np.diff(segments)
+    house = np.repeat(np.arange(len(lengths)), lengths)
+    step = np.arange(segments[-1]) - np.repeat(segments[:-1], lengths)
+    order = np.lexsort((house, step))
+
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=series_dir)
+    for name, source in [("X", X), ("y", y)]:
+        target = open_memmap(os.path.join(staging, f"{name}.npy"), mode="w+", dtype=source.dtype, shape=source.shape)
+        for first in range(0, len(order), 100000):
+            target[first:first + 100000] = source[order[first:first + 100000]]
+        target.flush()
+        del target
+    np.save(os.path.join(staging, "house.npy"), house[order].astype(np.int32))
+    np.save(os.path.join(staging, "steps.npy"), step[order])
+    try:
+        os.rename(staging, ordered_dir)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return ordered_dir
+
+
+def load_time_ordered(ordered_dir):
+    arrays = {name: np.load(os.path.join(ordered_dir, f"{name}.npy"), mmap_mode="r") for name in ["X", "y"]}
+    arrays["steps"] = np.load(os.path.join(ordered_dir, "steps.npy"))
+    return arrays
+
+
+class TimeSeriesCV:
+    """Rolling-origin and blocked folds over time steps, applied to every house at once.
+
+    mode="expanding": train on all steps before the test block (minus the gap).
+    mode="sliding":   as expanding, limited to the last max_train_size steps.
+    mode="blocked":   the series is cut into n_splits blocks; each is tested once and
+                      the model trains on the other blocks, leaving `gap` steps out on
+                      both sides of the test block.
+    Folds are lists of (start, stop) row ranges into the time-ordered arrays.
+    """
+
+    def __init__(self, n_splits=5, test_size=None, gap=48, max_train_size=None, mode="expanding"):
+        if mode not in ("expanding", "sliding", "blocked"):
+            raise ValueError(f"Unknown mode '{mode}'")
+        if mode == "sliding" and not max_train_size:
+            raise ValueError("mode='sliding' needs max_train_size")
+        self.n_splits = n_splits
+        self.test_size = test_size
+        self.gap = gap
+        self.max_train_size = max_train_size
+        self.mode = mode
+
+    def key(self):
+        return {"n_splits": self.n_splits, "test_size": self.test_size, "gap": self.gap,
+                "max_train_size": self.max_train_size, "mode": self.mode}
+
+    def step_ranges(self, n_steps):
+        """(train step ranges, test step range) per fold."""
+        folds = []
+        if self.mode == "blocked":
+            bounds = np.linspace(0, n_steps, self.n_splits + 1).astype(int)
+            for begin, end in zip(bounds[:-1], bounds[1:]):
+                train = [(0, max(0, begin - self.gap)), (min(n_steps, end + self.gap), n_steps)]
+                folds.append(([r for r in train if r[1] > r[0]], (begin, end)))
+            return folds
+
+        test_size = self.test_size or n_steps // (self.n_splits + 1)
+        for fold in range(self.n_splits):
+            test_end = n_steps - (self.n_splits - 1 - fold) * test_size
+            test_begin = test_end - test_size
+            train_end = test_begin - self.gap
+            train_begin = max(0, train_end - self.max_train_size) if self.mode == "sliding" else 0
+            if train_end <= train_begin or test_begin < 0:
+                raise ValueError(f"Fold {fold} has no training data; reduce n_splits, test_size or gap")
+            folds.append(([(train_begin, train_end)], (test_begin, test_end)))
+        return folds
+
+    def split(self, steps):
+        """Row ranges per fold, given the (sorted) time step of every time-ordered row."""
+        n_steps = int(steps[-1]) + 1
+        to_rows = lambda step_range: (int(np.searchsorted(steps, step_range[0])),
+                                      int(np.searchsorted(steps, step_range[1])))
+        return [{"fold": fold, "train": [to_rows(r) for r in train], "test": [to_rows(test)]}
+                for fold, (train, test) in enumerate(self.step_ranges(n_steps))]
+
+
+def take_rows(array, ranges):
+    """A view for a single range; only multi-range (blocked) folds are concatenated."""
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        return array[start:stop]
+    return np.concatenate([array[start:stop] for start, stop in ranges])
+
+
+class StandardizeFeatures:
+    """Example fold featurizer: scaling statistics fit on the fold's training rows only."""
+
+    key = "standardize-v1"
+
+    def fit_transform(self, X_train, X_test):
+        mean = X_train.mean(axis=0)
+        std = X_train.std(axis=0)
+        std[std == 0] = 1.0
+        return ((X_train - mean) / std).astype(np.float32), ((X_test - mean) / std).astype(np.float32)
+
+
+class FoldFeatureCache:
+    """Per-fold featurized matrices on disk, keyed by data, fold layout and featurizer."""
+
+    def __init__(self, root, data_key, cv_key, featurizer):
+        key = hashlib.sha256(json.dumps({"data": data_key, "cv": cv_key, "featurizer": featurizer.key},
+                                        sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.directory = os.path.join(root, "fold_features", key)
+        self.featurizer = featurizer
+
+    def get(self, fold, X_train, X_test):
+        paths = [os.path.join(self.directory, f"fold_{fold}_{part}.npy") for part in ("train", "test")]
+        if all(os.path.exists(path) for path in paths):
+            return tuple(np.load(path, mmap_mode="r") for path in paths)
+        features = self.featurizer.fit_transform(np.asarray(X_train), np.asarray(X_test))
+        os.makedirs(self.directory, exist_ok=True)
+        for path, array in zip(paths, features):
+            # Write then rename, so a concurrent reader never sees a partial file
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".npy", delete=False) as f:
+                np.save(f, array)
+            os.replace(f.name, path)
+        return features
+
+
+_worker = {}
+
+
+def _init_worker(ordered_dir, feature_cache):
+    _worker["arrays"] = load_time_ordered(ordered_dir)
+    _worker["feature_cache"] = feature_cache
+
+
+def _evaluate_fold(task):
+    from sklearn.base import clone
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    estimator, fold = task
+    arrays = _worker["arrays"]
+    X_train, X_test = take_rows(arrays["X"], fold["train"]), take_rows(arrays["X"], fold["test"])
+    y_train, y_test = take_rows(arrays["y"], fold["train"]), take_rows(arrays["y"], fold["test"])
+    feature_cache = _worker["feature_cache"]
+
+    start = time.perf_counter()
+    if feature_cache is not None:
+        X_train, X_test = feature_cache.get(fold["fold"], X_train, X_test)
+    feature_seconds = time.perf_counter() - start
+    model = clone(estimator).fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return {"fold": fold["fold"], "train_rows": len(y_train), "test_rows": len(y_test),
+            "mse": float(mean_squared_error(y_test, y_pred)),
+            "mae": float(mean_absolute_error(y_test, y_pred)),
+            "r2": float(r2_score(y_test, y_pred)),
+            "feature_seconds": round(feature_seconds, 3),
+            "fit_seconds": round(time.perf_counter() - start - feature_seconds, 3)}
+
+
+def cross_validate(estimator, data_path=DATA_PATH, cv=None, featurizer=None, workers=None,
+                   cache_root=CACHE_ROOT, input_columns=None):
+    """Evaluate an sklearn-style estimator on time-aware folds in parallel; one row per fold."""
+    cv = cv or TimeSeriesCV()
+    if input_columns is None:
+        header = pd.read_csv(data_path, nrows=0).columns
+        input_columns = [col for col in header if col.startswith('date_range_') or col in time_columns]
+    ordered_dir = prepare_time_ordered(data_path, input_columns, cache_root=cache_root)
+    folds = cv.split(load_time_ordered(ordered_dir)["steps"])
+
+    feature_cache = None
+    if featurizer is not None:
+        feature_cache = FoldFeatureCache(cache_root, os.path.basename(os.path.dirname(ordered_dir)),
+                                         cv.key(), featurizer)
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(folds)),
+                             initializer=_init_worker, initargs=(ordered_dir, feature_cache)) as executor:
+        rows = list(executor.map(_evaluate_fold, [(estimator, fold) for fold in folds]))
+    return pd.DataFrame(rows).set_index("fold")
+
+
+def build_estimator(name, n_jobs=1):
+    if name == "linear":
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if name == "random_forest":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    if name == "xgboost":
+        import xgboost as xgb
+        return xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, max_depth=4,
+                                learning_rate=0.1, random_state=42, n_jobs=n_jobs)
+    raise ValueError(f"Unknown model '{name}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-aware cross-validation grouped by house.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--model", choices=["linear", "random_forest", "xgboost"], default="random_forest")
+    parser.add_argument("--mode", choices=["expanding", "sliding", "blocked"], default="expanding")
+    parser.add_argument("--splits", type=int, default=5)
+    parser.add_argument("--test-size", type=int, default=None, help="Time steps per test block")
+    parser.add_argument("--gap", type=int, default=48, help="Time steps left out between train and test")
+    parser.add_argument("--max-train-size", type=int, default=None, help="Time steps for mode=sliding")
+    parser.add_argument("--standardize", action="store_true", help="Scale features per fold (cached)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    cv = TimeSeriesCV(args.splits, args.test_size, args.gap, args.max_train_size, args.mode)
+    table = cross_validate(build_estimator(args.model), args.data, cv,
+                           StandardizeFeatures() if args.standardize else None, args.workers)
+    print(f"\n📊 {args.model}, {args.mode} time-series CV ({args.splits} folds, gap {args.gap}):")
+    print(table.to_string())
+    summary = table[["mse", "mae", "r2"]].agg(["mean", "std"])
+    print("\n" + summary.to_string())
+
+
+if __name__ == "__main__":
+    main()
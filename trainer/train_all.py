@@ -0,0 +1,310 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline
+from trainer.monitoring_profile import build_profile
+from trainer.profiling import RunProfiler
+
+DATA_PATH = "data/training_data_raw_data_20250508_20_25.csv"
+
+target_columns = ['white_goods', 'entertainment', 'air_conditioners', 'lighting', 'ev_charges', 'utility_appliances']
+time_columns = ['time', 'consumed_power', 'time_sin', 'time_cos',
+                'minute', 'second', 'minute_sin', 'minute_cos', 'second_sin', 'second_cos']
+# XGBoost was trained without the raw minute/second columns
+xgboost_excluded = ['minute', 'second']
+
+FAMILIES = ["linear", "random_forest", "xgboost", "lstm"]
+# Relative share of the core budget; random forest parallelises best, linear barely at all
+CORE_WEIGHTS = {"linear": 1, "random_forest": 4, "xgboost": 2, "lstm": 2}
+
+# What each family is scored on; only families sharing a hold-out are compared in one table
+HOLDOUT = f"random 20% of rows, {len(target_columns)} targets"
+LSTM_HOLDOUT = "last 20% of each house's windows, first 5 targets"
+
+# Share of XGBoost's training rows held back to pick its early-stopping round, so the
+# hold-out it is scored on plays no part in fitting it
+xgboost_stopping_fraction = 0.1
+
+# LSTM configuration, as in train_lstm.py; Keras models are saved where train_lstm.py saves them
+LSTM_PATH = "model/lstm_model.keras"
+lstm_sequence_length = 300
+lstm_stride = 30
+lstm_batch_size = 128
+lstm_epochs = 50
+
+
+def allocate_cores(families, budget):
+    """Split a core budget across families by weight; every family gets at least one core.
+
+    Returns ({family: n_jobs}, number of families to run at once).
+    """
+    if budget < len(families):
+        # Not enough cores to run everything at once: queue families one core each
+        return {family: 1 for family in families}, budget
+    weights = np.array([CORE_WEIGHTS[family] for family in families], dtype=float)
+    spare = budget - len(families)
+    shares = weights / weights.sum() * spare
+    extra = np.floor(shares).astype(int)
+    # Hand out the cores lost to rounding by largest remainder
+    for index in np.argsort(-(shares - extra))[:spare - extra.sum()]:
+        extra[index] += 1
+    return {family: 1 + int(n) for family, n in zip(families, extra)}, len(families)
+
+
+def share_dataset(data_path, workdir, test_size=0.2, random_state=42):
+    """Load and split the prepared data once, writing it as .npy files workers memory-map.
+
+    The split is the one train_xgboost.build_training_cache draws with the same
+    test_size and random_state, so the cached XGBoost hold-out is the same rows.
+    Per-house segment bounds (contiguous runs of house_id) are kept for the LSTM.
+    """
+    data = pd.read_csv(data_path, dtype={"house_id": str})
+    input_columns = [col for col in data.columns if col.startswith('date_range_') or col in time_columns]
+    X = data[input_columns].to_numpy(dtype=np.float64)
+    y = data[target_columns].to_numpy(dtype=np.float64)
+    train_rows, test_rows = train_test_split(np.arange(len(data)), test_size=test_size, random_state=random_state)
+    if "house_id" in data:
+        houses = data["house_id"].to_numpy()
+        segments = np.concatenate([[0], np.flatnonzero(houses[1:] != houses[:-1]) + 1, [len(data)]])
+    else:
+        segments = np.empty(0, dtype=np.int64)
+
+    for name, array in [("X", X), ("y", y), ("train_rows", train_rows), ("test_rows", test_rows),
+                        ("segments", segments)]:
+        np.save(os.path.join(workdir, f"{name}.npy"), array)
+    return input_columns
+
+
+def open_dataset(workdir):
+    return {name: np.load(os.path.join(workdir, f"{name}.npy"), mmap_mode="r")
+            for name in ["X", "y", "train_rows", "test_rows", "segments"]}
+
+
+def evaluate(y_true, y_pred):
+    return {
+        "mse": float(mean_squared_error(y_true, y_pred)),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "r2": float(r2_score(y_true, y_pred)),
+    }
+
+
+def _split(dataset, columns, input_columns):
+    """Train/test frames for the given feature columns, gathered from the shared arrays."""
+    positions = [input_columns.index(col) for col in columns]
+    X, y = dataset["X"], dataset["y"]
+    train_rows, test_rows = dataset["train_rows"], dataset["test_rows"]
+    X_train = pd.DataFrame(X[train_rows][:, positions], columns=columns)
+    X_test = pd.DataFrame(X[test_rows][:, positions], columns=columns)
+    return X_train, X_test, y[train_rows], y[test_rows]
+
+
+def train_linear(dataset, input_columns, n_jobs):
+    from sklearn.linear_model import LinearRegression
+    X_train, X_test, y_train, y_test = _split(dataset, input_columns, input_columns)
+    model = LinearRegression(n_jobs=n_jobs).fit(X_train, y_train)
+    return model, input_columns, evaluate(y_test, model.predict(X_test))
+
+
+def train_random_forest(dataset, input_columns, n_jobs):
+    from sklearn.ensemble import RandomForestRegressor
+    X_train, X_test, y_train, y_test = _split(dataset, input_columns, input_columns)
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs).fit(X_train, y_train)
+    return model, input_columns, evaluate(y_test, model.predict(X_test))
+
+
+def train_xgboost(dataset, input_columns, n_jobs):
+    """train_xgboost's early-stopped hist booster on its cached matrices.
+
+    The cache's validation rows are this run's test rows, so the stopping round is
+    picked on the tail of the (already shuffled) training rows instead.
+    """
+    from trainer.train_xgboost import as_regressor, build_matrices, load_training_cache, train_model
+
+    arrays, meta = load_training_cache(dataset["xgboost_cache"])
+    fit_rows = len(arrays["X_train"]) - max(1, int(len(arrays["X_train"]) * xgboost_stopping_fraction))
+    dfit, dstop = build_matrices({"X_train": arrays["X_train"][:fit_rows], "y_train": arrays["y_train"][:fit_rows],
+                                  "X_val": arrays["X_train"][fit_rows:], "y_val": arrays["y_train"][fit_rows:]},
+                                 meta["input_cols"])
+    booster = train_model(dfit, dstop, {"nthread": n_jobs})
+    y_pred = booster.inplace_predict(arrays["X_val"]).reshape(arrays["y_val"].shape)
+    return as_regressor(booster), meta["input_cols"], evaluate(arrays["y_val"], y_pred)
+
+
+def train_lstm(dataset, input_columns, n_jobs):
+    """LSTM on sliding windows within each house; the last 20% of each house's windows are held out."""
+    segments = np.asarray(dataset["segments"])
+    if not len(segments):
+        raise ValueError("the LSTM needs house_id to window each house separately; "
+                         "re-run generator/prepare_training_data.py")
+
+    import tensorflow as tf
+    from tensorflow.keras.layers import Dense, LSTM
+    from tensorflow.keras.models import Sequential
+    from trainer.lstm_windows import gather_targets, make_dataset, split_windows, window_starts
+
+    tf.config.threading.set_intra_op_parallelism_threads(n_jobs)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    X, y = dataset["X"], dataset["y"][:, :5]  # ev_charges and earlier, as in train_lstm.py
+    starts, segment_ids = window_starts(segments, lstm_sequence_length, lstm_stride)
+    train_starts, test_starts = split_windows(starts, segment_ids, segments, lstm_sequence_length)
+
+    model = Sequential()
+    model.add(LSTM(10, input_shape=(lstm_sequence_length, X.shape[1])))
+    model.add(Dense(y.shape[1], activation='sigmoid'))
+    model.compile(optimizer='adam', loss='binary_crossentropy')
+    model.fit(make_dataset(X, train_starts, lstm_sequence_length, lstm_batch_size, y=y, shuffle=True),
+              epochs=lstm_epochs, verbose=0)
+    y_pred = model.predict(make_dataset(X, test_starts, lstm_sequence_length, lstm_batch_size), verbose=0)
+    return model, input_columns, evaluate(gather_targets(y, test_starts, lstm_sequence_length), y_pred)
+
+
+def holdout_of(family):
+    return LSTM_HOLDOUT if family == "lstm" else HOLDOUT
+
+
+TRAINERS = {
+    "linear": train_linear,
+    "random_forest": train_random_forest,
+    "xgboost": train_xgboost,
+    "lstm": train_lstm,
+}
+
+
+def train_family(family, workdir, input_columns, n_jobs, registry_root, data_path, xgboost_cache=None,
+                 lstm_path=LSTM_PATH):
+    """Train, evaluate and save one model family inside a worker process.
+
+    Scikit-learn and XGBoost models are registered; the Keras LSTM, which the registry
+    cannot store, is saved to lstm_path as train_lstm.py does.
+    """
+    from threadpoolctl import threadpool_limits
+
+    dataset = dict(open_dataset(workdir), xgboost_cache=xgboost_cache)
+    profiler = RunProfiler(family)
+    # Caps BLAS/OpenMP pools so concurrent families stay inside their share of cores
+    with profiler.stage("fit"), threadpool_limits(limits=n_jobs):
+        model, columns, metrics = TRAINERS[family](dataset, input_columns, n_jobs)
+    fit_seconds = profiler.stage_seconds()["fit"]
+
+    version = None
+    if family == "lstm":
+        with profiler.stage("save"):
+            os.makedirs(os.path.dirname(lstm_path) or ".", exist_ok=True)
+            model.save(lstm_path)
+        artifact = lstm_path
+        profiler.add_metrics(metrics)
+        profiler.add_artifact(lstm_path, "model")
+        profiler.write(os.path.splitext(lstm_path)[0] + ".run.json")
+    else:
+        registry = ModelRegistry(registry_root)
+        with profiler.stage("save"):
+            X_train = dataset["X"][dataset["train_rows"]]
+            profile = build_profile(X_train[:, input_columns.index("consumed_power")],
+                                    X_train[:, input_columns.index("time")], source=data_path)
+            version = registry.register(
+                family, model, build_pipeline(columns), feature_columns=columns,
+                target_columns=target_columns, metrics=metrics, data_path=data_path, profile=profile)
+        artifact = registry.version_path(family, version)
+        profiler.add_metrics(metrics)
+        profiler.add_artifact(artifact, "model")
+        profiler.write(registry.report_path(family, version))
+    return {"family": family, "holdout": holdout_of(family), "version": version, "artifact": artifact,
+            "n_jobs": n_jobs, "fit_seconds": round(fit_seconds, 2), "peak_rss_mb": profiler.stages[0]["peak_rss_mb"],
+            **metrics}
+
+
+def run(families=FAMILIES, data_path=DATA_PATH, cores=None, registry_root="model/registry",
+        output_path="model/training_metrics.csv", xgboost_cache_root=None, lstm_path=LSTM_PATH):
+    """Train the selected families concurrently and return one metrics table.
+
+    The holdout column says what each family was scored on; LSTM rows are printed
+    as a separate table since they are not scored on the shared test rows.
+    """
+    cores = cores or os.cpu_count()
+    allocation, concurrency = allocate_cores(families, cores)
+    workdir = tempfile.mkdtemp(prefix="train-all-")
+    start = time.perf_counter()
+    try:
+        print(f"🔄 Loading {data_path} once for {', '.join(families)}...")
+        input_columns = share_dataset(data_path, workdir)
+        xgboost_cache = None
+        if "xgboost" in families:
+            from trainer.train_xgboost import CACHE_ROOT, build_training_cache
+            xgboost_cache = build_training_cache(data_path, xgboost_cache_root or CACHE_ROOT)
+        print(f"⚙️  Core budget {cores}: " + ", ".join(f"{f}={n}" for f, n in allocation.items()))
+
+        rows = []
+        # Longest-running families first so the short ones fill in around them
+        ordered = sorted(families, key=lambda family: -CORE_WEIGHTS[family])
+        with ProcessPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(train_family, family, workdir, input_columns, allocation[family],
+                                       registry_root, data_path, xgboost_cache, lstm_path): family
+                       for family in ordered}
+            for future in as_completed(futures):
+                family = futures[future]
+                try:
+                    row = future.result()
+                    print(f"✅ {family} finished in {row['fit_seconds']:.1f}s")
+                except Exception as e:
+                    row = {"family": family, "holdout": holdout_of(family), "n_jobs": allocation[family],
+                           "error": f"{type(e).__name__}: {e}"}
+                    print(f"❌ {family} failed: {row['error']}")
+                rows.append(row)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    columns = ["holdout", "version", "artifact", "n_jobs", "fit_seconds", "peak_rss_mb", "mse", "mae", "r2", "error"]
+    table = pd.DataFrame(rows).set_index("family").reindex(index=families, columns=columns)
+    if table["error"].isna().all():
+        table = table.drop(columns="error")
+    wall_seconds = time.perf_counter() - start
+    for holdout in (HOLDOUT, LSTM_HOLDOUT):
+        part = table[table["holdout"] == holdout]
+        if len(part):
+            title = "Model comparison" if holdout == HOLDOUT else "LSTM, not comparable with the table above"
+            print(f"\n📊 {title} (test set: {holdout}):")
+            print(part.drop(columns="holdout").to_string())
+    if "fit_seconds" in table:
+        print(f"\n⏱️  Wall time {wall_seconds:.1f}s vs {table['fit_seconds'].sum():.1f}s of sequential fitting")
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        table.to_csv(output_path)
+        print(f"Metrics table saved to {output_path}")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train all model families concurrently from one data load.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--families", default=",".join(FAMILIES),
+                        help="Comma-separated subset of: " + ", ".join(FAMILIES))
+    parser.add_argument("--cores", type=int, default=None, help="Total CPU cores to use (default: all)")
+    parser.add_argument("--registry", default="model/registry")
+    parser.add_argument("--output", default="model/training_metrics.csv")
+    parser.add_argument("--lstm-path", default=LSTM_PATH, help="Where the LSTM is saved (Keras format)")
+    args = parser.parse_args()
+
+    families = [family.strip() for family in args.families.split(",") if family.strip()]
+    unknown = sorted(set(families) - set(FAMILIES))
+    if unknown:
+        parser.error(f"unknown families: {', '.join(unknown)}")
+    run(families, args.data, args.cores, args.registry, args.output, lstm_path=args.lstm_path)
+
+
+if __name__ == "__main__":
+    main()
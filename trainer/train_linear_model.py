@@ -2,11 +2,22 @@ import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
-import pickle
+import sys
 import os
 
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline
+from trainer.profiling import RunProfiler
+
+DATA_PATH = "data/training_data_raw_data_20250508_20_25.csv"
+
+profiler = RunProfiler("linear")
+
 # Load data
-data = pd.read_csv("data/training_data_raw_data_20250508_20_25.csv")
+with profiler.stage("load"):
+    data = pd.read_csv(DATA_PATH)
 
 # Define input and output columns
 input_columns = [col for col in data.columns if col.startswith('date_range_') or 
@@ -17,30 +28,43 @@ output_columns = ['white_goods', 'entertainment', 'air_conditioners', 'lighting'
 
 
 # Split features and targets
-X = data[input_columns]
-y = data[output_columns]
+with profiler.stage("prepare"):
+    X = data[input_columns]
+    y = data[output_columns]
 
 # Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+with profiler.stage("split"):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Train model
 model = LinearRegression()
-model.fit(X_train, y_train)
+with profiler.stage("fit"):
+    model.fit(X_train, y_train)
 
 # Evaluate model
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
+with profiler.stage("predict"):
+    y_pred = model.predict(X_test)
+with profiler.stage("evaluate"):
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
 
 print(f"\nModel evaluation:")
 print(f"  - Mean Squared Error: {mse:.2f}")
 print(f"  - R² Score: {r2:.2f}")
 
-# Create model directory if it doesn't exist
-os.makedirs("model", exist_ok=True)
+# Register model with its feature pipeline, schema and metrics
+registry = ModelRegistry()
+with profiler.stage("save"):
+    version = registry.register(
+        "linear", model, build_pipeline(input_columns),
+        feature_columns=input_columns, target_columns=output_columns,
+        metrics={"mse_test": mse, "r2_test": r2},
+        data_path=DATA_PATH,
+    )
 
-# Save model
-with open("model/model.pkl", "wb") as f:
-    pickle.dump(model, f)
+profiler.add_metrics({"mse_test": mse, "r2_test": r2})
+profiler.add_artifact(registry.version_path("linear", version), "model")
+report_path = profiler.write(registry.report_path("linear", version))
 
-print("\nModel saved to model/model.pkl")
+print(f"\nStages:\n{profiler.summary()}")
+print(f"\nModel registered as linear/{version}, run report in {report_path}")
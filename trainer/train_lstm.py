@@ -1,82 +1,131 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
 import pandas as pd
 import tensorflow as tf
-from tensorflow.keras.layers import Embedding, Dense, LSTM
+from tensorflow.keras.layers import Dense, LSTM
 from tensorflow.keras.losses import BinaryCrossentropy
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 from sklearn.metrics import r2_score
 
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.profiling import RunProfiler, peak_rss_mb
+from trainer.lstm_windows import (iter_window_batches, gather_targets, load_series, make_dataset,
+                                  prepare_series, split_windows, window_starts)
+
 # Model configuration
 additional_metrics = ['accuracy']
 batch_size = 128
-embedding_output_dims = 15
 loss_function = BinaryCrossentropy()
-max_sequence_length = 300
-num_distinct_words = 5000
+window_length = 300
+window_stride = 30
+window_target = "last"  # "mean" averages the targets over the window like the old 300-row blocks
 number_of_epochs = 50
-optimizer = Adam()
 validation_split = 0.20
 verbosity_mode = 1
 
-# Disable eager execution
-# tf.compat.v1.disable_eager_execution()
-
-# Load dataset from a CSV file
-data = pd.read_csv('data/training_data_raw_data_20250508_20_25.csv')  # Update with your dataset path
-
-input_columns = [col for col in data.columns if col.startswith('date_range_') or 
-                col in ['time', 'consumed_power', 'time_sin', 'time_cos', 
-                       'minute', 'second', 'minute_sin', 'minute_cos', 
-                       'second_sin', 'second_cos']]
+DATA_PATH = 'data/training_data_raw_data_20250508_20_25.csv'
 output_columns = ['white_goods', 'entertainment', 'air_conditioners', 'lighting', 'ev_charges']
 
 
-x_data = data[input_columns].values  # Replace 'text_column' with the actual column name
-y_data = data[output_columns].values  # Replace 'label_column' with the actual label column name
-
-# Preprocess the text data (tokenization, etc.)
-# Assuming you have a function to preprocess your text data
-
-
-# Reshape x_data to 3D array (samples, max_sequence_length, num_features)
-num_samples = x_data.shape[0] // max_sequence_length
-num_features = x_data.shape[1]
-
-# Truncate x_data to have full sequences only
-x_data_trimmed = x_data[:num_samples * max_sequence_length, :]
-
-# Truncate y_data to have full sequences only
-y_data_trimmed = y_data[:num_samples * max_sequence_length, :]
-
-# Aggregate y_data_trimmed to shape (num_samples, 5) by taking mean over each sequence
-import numpy as np
-y_data_aggregated = y_data_trimmed.reshape(num_samples, max_sequence_length, y_data.shape[1]).mean(axis=1)
-
-# Reshape to (num_samples, max_sequence_length, num_features)
-padded_inputs = x_data_trimmed.reshape((num_samples, max_sequence_length, num_features))
-
-# Define the Keras model
-model = Sequential()
-model.add(LSTM(10, input_shape=(max_sequence_length, len(input_columns))))
-model.add(Dense(5, activation='sigmoid'))
-
-# Compile the model
-model.compile(optimizer=optimizer, loss=loss_function, metrics=additional_metrics)
-
-# Give a summary
-model.summary()
-
-# Train the model
-history = model.fit(padded_inputs, y_data_aggregated, batch_size=batch_size, epochs=number_of_epochs, verbose=verbosity_mode, validation_split=validation_split)
-
-# Test the model after training
-test_results = model.evaluate(padded_inputs, y_data_aggregated, verbose=False)
-print(f'Test results - Loss: {test_results[0]} - Accuracy: {100 * test_results[1]}%')
-
-# Predict on the training data
-y_pred = model.predict(padded_inputs)
-
-# Calculate R2 score
-r2 = r2_score(y_data_aggregated, y_pred)
-print(f'R2 score: {r2}')
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Windows per second and peak RSS for each training epoch."""
+
+    def __init__(self, windows_per_epoch):
+        super().__init__()
+        self.windows_per_epoch = windows_per_epoch
+        self.history = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._start
+        rate = self.windows_per_epoch / seconds
+        peak_mb = peak_rss_mb()
+        self.history.append({"epoch": epoch + 1, "seconds": seconds, "windows_per_second": rate,
+                             "peak_rss_mb": peak_mb})
+        print(f' - epoch {epoch + 1}: {rate:,.0f} windows/s, peak RSS {peak_mb:,.0f} MB')
+
+
+def build_model(n_features, n_outputs):
+    model = Sequential()
+    model.add(LSTM(10, input_shape=(window_length, n_features)))
+    model.add(Dense(n_outputs, activation='sigmoid'))
+    model.compile(optimizer=Adam(), loss=loss_function, metrics=additional_metrics)
+    return model
+
+
+def predict_windows(model, X, starts, batch_size=batch_size):
+    """Predict one row per window with the same windowing as training."""
+    return np.concatenate([model.predict_on_batch(windows) for windows in
+                           iter_window_batches(X, starts, window_length, batch_size)])
+
+
+def main(data_path=DATA_PATH):
+    header = pd.read_csv(data_path, nrows=0).columns
+    input_columns = [col for col in header if col.startswith('date_range_') or
+                     col in ['time', 'consumed_power', 'time_sin', 'time_cos',
+                             'minute', 'second', 'minute_sin', 'minute_cos',
+                             'second_sin', 'second_cos']]
+
+    profiler = RunProfiler("lstm")
+
+    # Stream the CSV once into memory-mapped arrays; later runs reuse them
+    with profiler.stage("load"):
+        series_dir = prepare_series(data_path, input_columns, output_columns)
+        X, y, segments = load_series(series_dir)
+    with profiler.stage("split"):
+        starts, segment_ids = window_starts(segments, window_length, window_stride)
+        train_starts, validation_starts = split_windows(starts, segment_ids, segments, window_length,
+                                                        validation_split)
+    print(f'{len(segments) - 1} house series, {len(train_starts):,} training and '
+          f'{len(validation_starts):,} validation windows of {window_length} rows (stride {window_stride})')
+
+    train_data = make_dataset(X, train_starts, window_length, batch_size, y=y, target=window_target, shuffle=True)
+    validation_data = make_dataset(X, validation_starts, window_length, batch_size, y=y, target=window_target)
+
+    model = build_model(len(input_columns), len(output_columns))
+    model.summary()
+
+    throughput = ThroughputCallback(len(train_starts))
+    with profiler.stage("fit"):
+        model.fit(train_data, epochs=number_of_epochs, verbose=verbosity_mode,
+                  validation_data=validation_data, callbacks=[throughput])
+
+    rates = [epoch["windows_per_second"] for epoch in throughput.history]
+    print(f'Training throughput: median {np.median(rates):,.0f} windows/s, '
+          f'peak RSS {throughput.history[-1]["peak_rss_mb"]:,.0f} MB')
+
+    # Evaluate on the held-out windows through the same windowing used for inference
+    test_results = model.evaluate(validation_data, verbose=False)
+    print(f'Test results - Loss: {test_results[0]} - Accuracy: {100 * test_results[1]}%')
+    with profiler.stage("predict"):
+        y_pred = predict_windows(model, X, validation_starts)
+    with profiler.stage("evaluate"):
+        y_true = gather_targets(y, validation_starts, window_length, window_target)
+        r2 = r2_score(y_true, y_pred)
+    print(f'R2 score: {r2}')
+
+    with profiler.stage("save"):
+        os.makedirs("model", exist_ok=True)
+        model.save("model/lstm_model.keras")
+    profiler.add_metrics({"r2": r2, "loss": test_results[0], "throughput": throughput.history})
+    profiler.add_artifact(series_dir, "window_cache")
+    profiler.add_artifact("model/lstm_model.keras", "model")
+    report_path = profiler.write("model/lstm_model.run.json")
+    print(f'Stages:\n{profiler.summary()}\nRun report in {report_path}')
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the LSTM on per-house sliding windows.")
+    parser.add_argument("--data", default=DATA_PATH)
+    args = parser.parse_args()
+    main(args.data)
@@ -0,0 +1,169 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline
+from trainer.profiling import RunProfiler
+from trainer.streaming_evaluation import GroupedRegressionMetrics
+from trainer.train_all import DATA_PATH, target_columns, time_columns, xgboost_excluded
+
+MODELS = ["sgd", "mlp", "xgboost"]
+
+
+def feature_columns_of(data_path, model_name):
+    """Input columns of a prepared feature CSV, read from its header only."""
+    header = pd.read_csv(data_path, nrows=0).columns
+    columns = [col for col in header if col.startswith('date_range_') or col in time_columns]
+    if model_name == "xgboost":
+        columns = [col for col in columns if col not in xgboost_excluded]
+    return columns
+
+
+def iter_chunks(data_path, columns, chunk_size, subset, test_fraction=0.2, seed=42):
+    """Stream (X, y) float32 chunks of the train or test subset.
+
+    Rows are assigned to the held-out set by a per-chunk seeded draw, so every pass
+    over the file sees the same split without ever holding more than one chunk.
+    """
+    reader = pd.read_csv(data_path, usecols=columns + target_columns, chunksize=chunk_size)
+    for index, chunk in enumerate(reader):
+        held_out = np.random.default_rng([seed, index]).random(len(chunk)) < test_fraction
+        mask = held_out if subset == "test" else ~held_out
+        if not mask.any():
+            continue
+        X = chunk[columns].to_numpy(dtype=np.float32)[mask]
+        y = chunk[target_columns].to_numpy(dtype=np.float32)[mask]
+        yield X, y
+
+
+def evaluate_streaming(predict, data_path, columns, chunk_size, test_fraction):
+    metrics = GroupedRegressionMetrics(len(target_columns))
+    for X, y in iter_chunks(data_path, columns, chunk_size, "test", test_fraction):
+        metrics.update(y, predict(X))
+    return metrics.result()
+
+
+def train_incremental(model_name, data_path, columns, chunk_size, epochs, test_fraction):
+    """Fit a scaler and a partial_fit regressor over repeated passes of the training chunks."""
+    from sklearn.linear_model import SGDRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    # time is in seconds (0-86399); unscaled it swamps the gradient updates
+    scaler = StandardScaler()
+    for X, _ in iter_chunks(data_path, columns, chunk_size, "train", test_fraction):
+        scaler.partial_fit(X)
+
+    if model_name == "sgd":
+        regressor = MultiOutputRegressor(SGDRegressor(learning_rate="adaptive", eta0=0.01, random_state=42))
+    else:
+        regressor = MLPRegressor(hidden_layer_sizes=(64, 32), learning_rate_init=0.001, random_state=42)
+
+    for epoch in range(epochs):
+        for X, y in iter_chunks(data_path, columns, chunk_size, "train", test_fraction):
+            regressor.partial_fit(scaler.transform(X), y)
+        print(f"   - epoch {epoch + 1}/{epochs} done")
+
+    return Pipeline([("scaler", scaler), ("regressor", regressor)])
+
+
+def train_xgboost_external_memory(data_path, columns, chunk_size, test_fraction, n_estimators=100):
+    """Train XGBoost from a data iterator backed by an on-disk page cache."""
+    import xgboost as xgb
+    from trainer.train_xgboost import as_regressor
+
+    class ChunkIterator(xgb.DataIter):
+        def __init__(self, cache_prefix):
+            self._chunks = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = iter_chunks(data_path, columns, chunk_size, "train", test_fraction)
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            input_data(data=pd.DataFrame(chunk[0], columns=columns), label=chunk[1])
+            return True
+
+        def reset(self):
+            self._chunks = None
+
+    with tempfile.TemporaryDirectory(prefix="xgb-cache-") as cache_dir:
+        iterator = ChunkIterator(os.path.join(cache_dir, "train"))
+        # ExtMemQuantileDMatrix (XGBoost >= 3.0) keeps only quantised pages on disk
+        matrix_class = getattr(xgb, "ExtMemQuantileDMatrix", None)
+        if matrix_class is not None:
+            dtrain = matrix_class(iterator, max_bin=256)
+        else:
+            dtrain = xgb.DMatrix(iterator)
+        params = {"objective": "reg:squarederror", "max_depth": 4, "learning_rate": 0.1,
+                  "tree_method": "hist", "seed": 42}
+        booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+
+    return as_regressor(booster)
+
+
+def train(model_name, data_path=DATA_PATH, chunk_size=50000, epochs=3, test_fraction=0.2,
+          registry_root="model/registry"):
+    """Train one model out of core, evaluate it on the streamed held-out rows and register it."""
+    columns = feature_columns_of(data_path, model_name)
+    profiler = RunProfiler(f"{model_name}_out_of_core")
+    print(f"🔄 Streaming {data_path} in chunks of {chunk_size} rows...")
+    # Loading is interleaved with fitting here, so both are timed as the fit stage
+    with profiler.stage("fit"):
+        if model_name == "xgboost":
+            model = train_xgboost_external_memory(data_path, columns, chunk_size, test_fraction)
+            predict = lambda X: model.get_booster().inplace_predict(X)
+        else:
+            model = train_incremental(model_name, data_path, columns, chunk_size, epochs, test_fraction)
+            predict = model.predict
+
+    with profiler.stage("evaluate"):
+        metrics = evaluate_streaming(predict, data_path, columns, chunk_size, test_fraction)
+    if model_name != "xgboost":
+        # Fitted on arrays; keep the column names so the registered pipeline checks serving DataFrames
+        model.named_steps["scaler"].feature_names_in_ = np.array(columns, dtype=object)
+    metrics["fit_seconds"] = profiler.stage_seconds()["fit"]
+    metrics["peak_rss_mb"] = max(stage["peak_rss_mb"] for stage in profiler.stages)
+
+    print(f"\n📊 {model_name} results (held-out rows, streamed):")
+    for key, value in metrics.items():
+        print(f"   - {key}: {value}")
+
+    registry = ModelRegistry(registry_root)
+    name = f"{model_name}_out_of_core"
+    with profiler.stage("save"):
+        version = registry.register(
+            name, model, build_pipeline(columns), feature_columns=columns,
+            target_columns=target_columns, metrics=metrics, data_path=data_path)
+    profiler.add_metrics(metrics)
+    profiler.add_artifact(registry.version_path(name, version), "model")
+    profiler.write(registry.report_path(name, version))
+    print(f"\n✅ Model registered as {name}/{version}")
+    return version, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train on prepared features larger than memory.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--model", choices=MODELS, default="sgd")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the data for partial_fit models")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--registry", default="model/registry")
+    args = parser.parse_args()
+    train(args.model, args.data, args.chunk_size, args.epochs, args.test_fraction, args.registry)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,38 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
-import pickle
+import sys
 import os
 
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline
+from trainer.profiling import RunProfiler
+from trainer.monitoring_profile import build_profile
+
+DATA_PATH = "data/training_data_raw_data_20250508_20_25.csv"
+
+profiler = RunProfiler("random_forest")
+
 # Load preprocessed data
 print("🔄 Loading preprocessed data...")
-data = pd.read_csv("data/training_data_raw_data_20250508_20_25.csv")
+with profiler.stage("load"):
+    data = pd.read_csv(DATA_PATH)
 
 # Define input and output columns
 target_columns = ['white_goods', 'entertainment', 'air_conditioners', 'lighting', 'ev_charges', 'utility_appliances']
-input_columns = [col for col in data.columns if col not in target_columns]
+# house_id only groups rows into per-house series; it is not a feature
+input_columns = [col for col in data.columns if col not in target_columns + ['house_id']]
 
 # Prepare features and targets
-X = data[input_columns]
-y = data[target_columns]
+with profiler.stage("prepare"):
+    X = data[input_columns]
+    y = data[target_columns]
 
 # Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+with profiler.stage("split"):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Train Random Forest Regressor
 print("\n🌲 Training Random Forest Regressor...")
@@ -27,19 +42,22 @@ rf_model = RandomForestRegressor(
     n_estimators=100,
     random_state=42
 )
-rf_model.fit(X_train, y_train)
+with profiler.stage("fit"):
+    rf_model.fit(X_train, y_train)
 
 # Make predictions
-y_pred_test = rf_model.predict(X_test)
-y_pred_train = rf_model.predict(X_train)
+with profiler.stage("predict"):
+    y_pred_test = rf_model.predict(X_test)
+    y_pred_train = rf_model.predict(X_train)
 
-# Evaluate test set
-mse_test = mean_squared_error(y_test, y_pred_test)
-r2_test = r2_score(y_test, y_pred_test)
+with profiler.stage("evaluate"):
+    # Evaluate test set
+    mse_test = mean_squared_error(y_test, y_pred_test)
+    r2_test = r2_score(y_test, y_pred_test)
 
-# Evaluate training set
-mse_train = mean_squared_error(y_train, y_pred_train)
-r2_train = r2_score(y_train, y_pred_train)
+    # Evaluate training set
+    mse_train = mean_squared_error(y_train, y_pred_train)
+    r2_train = r2_score(y_train, y_pred_train)
 
 print("\n📊 Random Forest Regressor Results (Test Set):")
 print(f"   - MSE: {mse_test:.4f}")
@@ -59,11 +77,25 @@ print("\n🔥 Top Features:")
 print(feature_importance.head(10))
 
 # Optionally export feature importance
+os.makedirs("model", exist_ok=True)
 feature_importance.to_csv("model/feature_importance.csv", index=False)
 
-# Save model
-os.makedirs("model", exist_ok=True)
-with open("model/random_forest_model.pkl", "wb") as f:
-    pickle.dump(rf_model, f)
+# Register model with its feature pipeline, schema and metrics
+registry = ModelRegistry()
+metrics = {"mse_test": mse_test, "r2_test": r2_test, "mse_train": mse_train, "r2_train": r2_train}
+with profiler.stage("save"):
+    version = registry.register(
+        "random_forest", rf_model, build_pipeline(input_columns),
+        feature_columns=input_columns, target_columns=target_columns,
+        metrics=metrics, data_path=DATA_PATH,
+        # Reference input distributions the API's readings monitor checks live traffic against
+        profile=build_profile(X_train["consumed_power"], X_train["time"], source=DATA_PATH),
+    )
+
+profiler.add_metrics(metrics)
+profiler.add_artifact(registry.version_path("random_forest", version), "model")
+profiler.add_artifact("model/feature_importance.csv", "feature_importance")
+report_path = profiler.write(registry.report_path("random_forest", version))
 
-print("\n✅ Model and feature importances saved to 'model/'")
+print(f"\n⏱️  Stages:\n{profiler.summary()}")
+print(f"\n✅ Model registered as random_forest/{version}, run report in {report_path}")
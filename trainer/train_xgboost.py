@@ -3,64 +3,198 @@ import numpy as np
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-import pickle
+import argparse
+import hashlib
+import json
+import shutil
+import tempfile
+import sys
 import os
 
+# Add the repository root to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trainer.model_registry import ModelRegistry, build_pipeline, file_fingerprint
+from trainer.profiling import RunProfiler
+
+DATA_PATH = "data/training_data_raw_data_20250508_20_25.csv"
+CACHE_ROOT = "model/cache/xgboost"
+
+feature_cols = ['time', 'consumed_power', 'time_sin', 'time_cos',
+                'minute_sin', 'minute_cos', 'second_sin', 'second_cos']
+output_cols = ['white_goods', 'entertainment', 'air_conditioners', 'lighting', 'ev_charges', 'utility_appliances']
+
+DEFAULT_PARAMS = {
+    "objective": "reg:squarederror",
+    "tree_method": "hist",
+    "multi_strategy": "multi_output_tree",
+    "max_depth": 4,
+    "learning_rate": 0.1,
+    "max_bin": 256,
+    "seed": 42,
+}
+
+
 def load_data(file_path):
-    """Load data and generate time features."""
+    """Load data and generate any time features the prepared file does not already have."""
     df = pd.read_csv(file_path)
-    
-    # Create minute and second from 'time' if needed
-    df['minute'] = df['time'] // 60 % 60
-    df['second'] = df['time'] % 60
-
-    # Create sine/cosine features
-    df['time_sin'] = np.sin(2 * np.pi * df['time'] / (24 * 3600))
-    df['time_cos'] = np.cos(2 * np.pi * df['time'] / (24 * 3600))
-    df['minute_sin'] = np.sin(2 * np.pi * df['minute'] / 60)
-    df['minute_cos'] = np.cos(2 * np.pi * df['minute'] / 60)
-    df['second_sin'] = np.sin(2 * np.pi * df['second'] / 60)
-    df['second_cos'] = np.cos(2 * np.pi * df['second'] / 60)
-    
+
+    if 'minute' not in df:
+        df['minute'] = df['time'] // 60 % 60
+    if 'second' not in df:
+        df['second'] = df['time'] % 60
+
+    periods = {'time': 24 * 3600, 'minute': 60, 'second': 60}
+    for col, period in periods.items():
+        if f'{col}_sin' not in df:
+            df[f'{col}_sin'] = np.sin(2 * np.pi * df[col] / period)
+            df[f'{col}_cos'] = np.cos(2 * np.pi * df[col] / period)
+
     return df
 
-def train_model(data):
-    input_cols = [col for col in data.columns if col.startswith('date_range_') or col in [
-        'time', 'consumed_power', 'time_sin', 'time_cos', 
-        'minute_sin', 'minute_cos', 'second_sin', 'second_cos']]
-    
-    output_cols = ['white_goods', 'entertainment', 'air_conditioners', 'lighting', 'ev_charges','utility_appliances']
-    
-    X = data[input_cols]
-    y = data[output_cols]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    model = xgb.XGBRegressor(
-        objective='reg:squarederror',
-        n_estimators=100,
-        max_depth=4,
-        learning_rate=0.1,
-        random_state=42
-    )
-    model.fit(X_train, y_train)
-    
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)  # Calculate RMSE manually
-    print(f"RMSE: {rmse:.2f}")
-    print(f"MAE: {mean_absolute_error(y_test, y_pred):.2f}")
-    print(f"R²: {r2_score(y_test, y_pred):.2f}")
-    
+
+def build_training_cache(data_path=DATA_PATH, cache_root=CACHE_ROOT, validation_fraction=0.2,
+                         random_state=42, rebuild=False, features=feature_cols):
+    """Parse, featurize and split the data once into float32 .npy files keyed by the data's content.
+
+    features are the non-date_range inputs (default: XGBoost's). Returns the cache
+    directory; later runs with the same data, features and split reuse it.
+    """
+    features = list(features)
+    fingerprint = file_fingerprint(data_path)
+    key_source = {"data_sha256": fingerprint["sha256"], "features": features, "targets": output_cols,
+                  "validation_fraction": validation_fraction, "random_state": random_state}
+    key = hashlib.sha256(json.dumps(key_source, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    cache_dir = os.path.join(cache_root, key)
+    if os.path.exists(os.path.join(cache_dir, "meta.json")) and not rebuild:
+        return cache_dir
+
+    data = load_data(data_path)
+    input_cols = [col for col in data.columns if col.startswith('date_range_') or col in features]
+    X = data[input_cols].to_numpy(dtype=np.float32)
+    y = data[output_cols].to_numpy(dtype=np.float32)
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=validation_fraction, random_state=random_state)
+
+    os.makedirs(cache_root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=cache_root)
+    for name, array in [("X_train", X_train), ("y_train", y_train), ("X_val", X_val), ("y_val", y_val)]:
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(dict(key_source, data=fingerprint, input_cols=input_cols), f, indent=2)
+    if rebuild:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.rename(staging, cache_dir)
+    except OSError:
+        # A concurrent run built the same cache first
+        shutil.rmtree(staging, ignore_errors=True)
+    return cache_dir
+
+
+def load_training_cache(cache_dir):
+    """Memory-map the cached arrays; returns (arrays, meta)."""
+    with open(os.path.join(cache_dir, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+              for name in ["X_train", "y_train", "X_val", "y_val"]}
+    return arrays, meta
+
+
+def build_matrices(arrays, input_cols, max_bin=256):
+    """Quantised train and validation matrices; validation reuses the training cuts."""
+    dtrain = xgb.QuantileDMatrix(arrays["X_train"], arrays["y_train"], max_bin=max_bin, feature_names=input_cols)
+    dval = xgb.QuantileDMatrix(arrays["X_val"], arrays["y_val"], ref=dtrain, max_bin=max_bin,
+                               feature_names=input_cols)
+    return dtrain, dval
+
+
+def train_model(dtrain, dval, params=None, num_boost_round=500, early_stopping_rounds=20):
+    """Train with early stopping on the validation matrix; returns the booster cut at the best round."""
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, evals=[(dval, "validation")],
+                        early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+    best_iteration = booster.best_iteration
+    booster = booster[: best_iteration + 1]
+    booster.set_attr(best_iteration=str(best_iteration))
+    return booster
+
+
+def evaluate(booster, arrays):
+    y_val = arrays["y_val"]
+    y_pred = booster.inplace_predict(arrays["X_val"]).reshape(y_val.shape)
+    mse = mean_squared_error(y_val, y_pred)
+    return {"rmse": float(np.sqrt(mse)), "mae": float(mean_absolute_error(y_val, y_pred)),
+            "r2": float(r2_score(y_val, y_pred)), "best_iteration": int(booster.attr("best_iteration"))}
+
+
+def as_regressor(booster):
+    """Wrap a trained booster in an XGBRegressor through the public load_model API."""
+    model = xgb.XGBRegressor()
+    model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
     return model
 
-def save_model(model, path="model/xgboost_model.pkl"):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb") as f:
-        pickle.dump(model, f)
-    print(f"Model saved to {path}")
+
+def save_model(booster, input_cols, metrics=None, data_path=None, registry_root="model/registry"):
+    """Register the model with its feature pipeline, schema and metrics."""
+    model = as_regressor(booster)
+    version = ModelRegistry(registry_root).register(
+        "xgboost", model, build_pipeline(input_cols),
+        feature_columns=input_cols, target_columns=output_cols,
+        metrics=metrics, data_path=data_path,
+    )
+    print(f"Model registered as xgboost/{version}")
+    return version
+
+
+def train(data_path=DATA_PATH, params=None, num_boost_round=500, early_stopping_rounds=20,
+          cache_root=CACHE_ROOT, rebuild_cache=False, registry_root="model/registry"):
+    """Full run: cached data construction, quantisation, training, evaluation and registration."""
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    profiler = RunProfiler("xgboost")
+
+    with profiler.stage("load"):
+        cache_dir = build_training_cache(data_path, cache_root, rebuild=rebuild_cache)
+        arrays, meta = load_training_cache(cache_dir)
+    with profiler.stage("prepare"):
+        dtrain, dval = build_matrices(arrays, meta["input_cols"], params["max_bin"])
+    with profiler.stage("fit"):
+        booster = train_model(dtrain, dval, params, num_boost_round, early_stopping_rounds)
+    with profiler.stage("evaluate"):
+        metrics = evaluate(booster, arrays)
+    print(f"RMSE: {metrics['rmse']:.2f}")
+    print(f"MAE: {metrics['mae']:.2f}")
+    print(f"R²: {metrics['r2']:.2f}")
+    print(f"Best iteration: {metrics['best_iteration']}")
+
+    metrics["stage_seconds"] = profiler.stage_seconds()
+    with profiler.stage("save"):
+        version = save_model(booster, meta["input_cols"], metrics, data_path, registry_root)
+
+    registry = ModelRegistry(registry_root)
+    profiler.add_metrics(metrics)
+    profiler.add_artifact(cache_dir, "training_cache")
+    profiler.add_artifact(registry.version_path("xgboost", version), "model")
+    report_path = profiler.write(registry.report_path("xgboost", version))
+    print(f"Stages (cache {cache_dir}):\n{profiler.summary()}")
+    print(f"Run report in {report_path}")
+    return version, metrics
 
 if __name__ == "__main__":
-    data = load_data("data/training_data_raw_data_20250508_20_25.csv")
-    model = train_model(data)
-    save_model(model)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the XGBoost model from a cached, quantised training matrix.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS["learning_rate"])
+    parser.add_argument("--max-bin", type=int, default=DEFAULT_PARAMS["max_bin"])
+    parser.add_argument("--multi-strategy", choices=["multi_output_tree", "one_output_per_tree"],
+                        default=DEFAULT_PARAMS["multi_strategy"])
+    parser.add_argument("--num-boost-round", type=int, default=500)
+    parser.add_argument("--early-stopping-rounds", type=int, default=20)
+    parser.add_argument("--cache-dir", default=CACHE_ROOT)
+    parser.add_argument("--rebuild-cache", action="store_true")
+    args = parser.parse_args()
+
+    train(args.data,
+          params={"max_depth": args.max_depth, "learning_rate": args.learning_rate,
+                  "max_bin": args.max_bin, "multi_strategy": args.multi_strategy},
+          num_boost_round=args.num_boost_round, early_stopping_rounds=args.early_stopping_rounds,
+          cache_root=args.cache_dir, rebuild_cache=args.rebuild_cache)